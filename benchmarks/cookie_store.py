@@ -0,0 +1,75 @@
+"""
+Time of storing notifications which do not fit into cookie with ``CookieStorage`` compared to previous
+implementation, which removed notifications one by one and re-encoded remaining list after every removal.
+
+No database is needed. Run from repository root::
+
+    python benchmarks/cookie_store.py
+"""
+import os
+import random
+import string
+import sys
+import timeit
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+django.setup()
+
+from django.http import HttpResponse, SimpleCookie  # noqa: E402
+
+from django_magnificent_messages import constants  # noqa: E402
+from django_magnificent_messages.storage.base import Message  # noqa: E402
+from django_magnificent_messages.storage.notification_storage.cookie import CookieStorage  # noqa: E402
+
+NOTIFICATIONS_COUNTS = (10, 100, 1000)
+
+
+class PopOneByOneCookieStorage(CookieStorage):
+    """
+    ``CookieStorage`` with ``_store`` loop used before size-aware packing
+    """
+
+    def _store(self, notifications, response, remove_oldest=True, *args, **kwargs):
+        unstored_notifications = []
+        encoded_data = self._encode(notifications)
+        cookie = SimpleCookie()
+
+        def stored_length(val):
+            return len(cookie.value_encode(val)[1])
+
+        while encoded_data and stored_length(encoded_data) > self.max_cookie_size:
+            if remove_oldest:
+                unstored_notifications.append(notifications.pop(0))
+            else:
+                unstored_notifications.insert(0, notifications.pop())
+            encoded_data = self._encode(notifications + [self.not_finished],
+                                        encode_empty=bool(unstored_notifications))
+        self._update_cookie(encoded_data, response)
+        return unstored_notifications
+
+
+def make_notifications(count):
+    rnd = random.Random(count)
+    return [Message(constants.INFO, "".join(rnd.choice(string.ascii_letters) for _ in range(40)), "Subject")
+            for _ in range(count)]
+
+
+def measure(storage_class, notifications):
+    storage = storage_class(None)
+    return min(timeit.repeat(lambda: storage._store(list(notifications), HttpResponse()), number=1, repeat=5))
+
+
+def main():
+    for count in NOTIFICATIONS_COUNTS:
+        notifications = make_notifications(count)
+        old = measure(PopOneByOneCookieStorage, notifications)
+        new = measure(CookieStorage, notifications)
+        print("{0:>5} notifications: pop one by one {1:8.2f} ms, size-aware packing {2:8.2f} ms".format(
+            count, old * 1000, new * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Memory and throughput of messages conversion in DatabaseStorage compared to eager dict-based conversion used before
+``StoredMessage`` got ``__slots__`` and lazy attributes.
+
+Converts unsaved model instances, so no database is needed. Run from repository root::
+
+    python benchmarks/stored_message.py
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+django.setup()
+
+from django.utils.safestring import mark_safe  # noqa: E402
+
+from django_magnificent_messages import constants, models  # noqa: E402
+from django_magnificent_messages.storage.message_storage.base import MessageIterator  # noqa: E402
+from django_magnificent_messages.storage.message_storage.db import DatabaseStorage  # noqa: E402
+
+MESSAGES_COUNT = 5000
+
+
+class DictMessage:
+    """
+    ``StoredMessage`` as it was before ``__slots__``: attributes are stored in instance ``__dict__``
+    """
+
+    def __init__(self, level, text, subject=None, extra=None, html_safe=False, **kwargs):
+        self.level = level
+        self.subject = subject
+        self.text = mark_safe(text) if html_safe else text
+        self.extra = extra
+        for k, v in kwargs.items():
+            setattr(self, k, v)
+
+
+def eager_stored_to_message(stored):
+    if stored is not None:
+        return DictMessage(
+            stored.level,
+            stored.text,
+            stored.subject,
+            stored.extra,
+            stored.html_safe,
+            author=stored.author,
+            user_generated=stored.user_generated,
+            reply_to=eager_stored_to_message(stored.reply_to),
+            pk=stored.pk,
+            created=stored.created,
+            modified=stored.modified,
+            replies=MessageIterator(stored.replies.all(), eager_stored_to_message),
+            replies_count=stored.replies.all().count
+        )
+    return None
+
+
+def make_stored_messages():
+    messages = []
+    for pk in range(1, MESSAGES_COUNT + 1):
+        parent = models.Message(pk=-pk, level=constants.INFO, text="Parent", subject="Subject", user_generated=True)
+        messages.append(models.Message(pk=pk, level=constants.INFO, text="Text", subject="Subject",
+                                       user_generated=True, reply_to=parent))
+    return messages
+
+
+def measure(convert, stored_messages):
+    tracemalloc.start()
+    converted = [convert(stored) for stored in stored_messages]
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del converted
+    seconds = min(timeit.repeat(lambda: [convert(stored) for stored in stored_messages], number=1, repeat=5))
+    return memory, seconds
+
+
+def main():
+    stored_messages = make_stored_messages()
+    storage = DatabaseStorage(None)
+    for name, convert in (("eager dict-based", eager_stored_to_message), ("StoredMessage", storage._stored_to_message)):
+        memory, seconds = measure(convert, stored_messages)
+        print("{0:>16}: {1:8.1f} bytes/message, {2:10.0f} messages/s".format(
+            name, memory / MESSAGES_COUNT, MESSAGES_COUNT / seconds))
+
+
+if __name__ == "__main__":
+    main()
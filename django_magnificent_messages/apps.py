@@ -11,3 +11,4 @@ class DjangoMagnificentMessagesConfig(AppConfig):
 
     def ready(self):
         from . import conf  # noqa
+        from .storage.message_storage import counter_cache  # noqa
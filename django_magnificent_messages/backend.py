@@ -24,6 +24,11 @@ class MessageBackend:
         """Get notifications count"""
         return len(self._notification_storage)
 
+    @cached_property
+    def has_notifications(self) -> bool:
+        """Check if there are any notifications"""
+        return self._notification_storage.has_notifications()
+
     @cached_property
     def all_messages(self) -> Iterable:
         """Get all messages"""
@@ -54,30 +59,35 @@ class MessageBackend:
         """Get sent messages"""
         return self._message_storage.sent
 
+    @cached_property
+    def messages_counts(self) -> dict:
+        """Get counts of all types of incoming messages"""
+        return self._message_storage.counts
+
     @cached_property
     def all_messages_count(self) -> int:
         """Get all messages count"""
-        return self._message_storage.all_count
+        return self.messages_counts["all"]
 
     @cached_property
     def read_messages_count(self) -> int:
         """Get read messages count"""
-        return self._message_storage.read_count
+        return self.messages_counts["read"]
 
     @cached_property
     def unread_messages_count(self) -> int:
         """Get unread messages count"""
-        return self._message_storage.unread_count
+        return self.messages_counts["unread"]
 
     @cached_property
     def archived_messages_count(self) -> int:
         """Get archived messages count"""
-        return self._message_storage.archived_count
+        return self.messages_counts["archived"]
 
     @cached_property
     def new_messages_count(self) -> int:
         """Get new messages count"""
-        return self._message_storage.new_count
+        return self.messages_counts["new"]
 
     @cached_property
     def sent_messages_count(self):
@@ -105,10 +115,32 @@ class MessageBackend:
                      to_groups_pk: Iterable = tuple(),
                      user_generated: bool = True,
                      html_safe: bool = False,
-                     reply_to_pk=None) -> None:
-        """Add new message with specified level"""
-        self._message_storage.send_message(level, text, subject, extra, to_users_pk, to_groups_pk, user_generated,
-                                           html_safe, reply_to_pk)
+                     reply_to_pk=None):
+        """Add new message with specified level. Returns stored message or ``None`` if message was not sent"""
+        return self._message_storage.send_message(level, text, subject, extra, to_users_pk, to_groups_pk,
+                                                  user_generated, html_safe, reply_to_pk)
+
+    def broadcast_message(self,
+                          level: int,
+                          text: str,
+                          subject: str = None,
+                          extra: object = None,
+                          to_users_pk: Iterable = tuple(),
+                          to_groups_pk: Iterable = tuple(),
+                          user_generated: bool = False,
+                          html_safe: bool = False,
+                          reply_to_pk=None):
+        """
+        Send message with specified level to large number of recipients. Returns stored message or ``None`` if message
+        was not sent
+        """
+        return self._message_storage.broadcast_message(level, text, subject, extra, to_users_pk, to_groups_pk,
+                                                       user_generated, html_safe, reply_to_pk)
+
+    @property
+    def notifications_changed(self) -> bool:
+        """Check if notifications were iterated or added, i.e. ``update`` has to store them"""
+        return self._notification_storage.used or self._notification_storage.added_new
 
     def update(self, response):
         return self._notification_storage.update(response)
@@ -125,5 +157,17 @@ class MessageBackend:
     def unarchive(self, message_pk):
         self._message_storage.unarchive(message_pk)
 
+    def mark_read_bulk(self, messages):
+        self._message_storage.mark_read_bulk(messages)
+
+    def mark_unread_bulk(self, messages):
+        self._message_storage.mark_unread_bulk(messages)
+
+    def archive_bulk(self, messages):
+        self._message_storage.archive_bulk(messages)
+
+    def unarchive_bulk(self, messages):
+        self._message_storage.unarchive_bulk(messages)
+
     def update_last_checked(self):
         self._message_storage.update_last_checked()
@@ -15,6 +15,33 @@ class MessageConfig(AppConf):
     MESSAGE_FILES_UPLOAD_TO = constants.MESSAGE_FILES_UPLOAD_TO
     NOTIFICATION_STORAGE = constants.DEFAULT_NOTIFICATION_STORAGE
     MESSAGE_STORAGE = constants.DEFAULT_MESSAGE_STORAGE
+    BULK_BATCH_SIZE = constants.BULK_BATCH_SIZE
+    STREAM_MESSAGES = constants.STREAM_MESSAGES
+    STREAM_CHUNK_SIZE = constants.STREAM_CHUNK_SIZE
+    PREFETCH_REPLIES = constants.PREFETCH_REPLIES
+    REPLY_TO_DEPTH = constants.REPLY_TO_DEPTH
+    USE_DELIVERY_TABLE = constants.USE_DELIVERY_TABLE
+    DELIVERY_BATCH_SIZE = constants.DELIVERY_BATCH_SIZE
+    INBOX_CACHE_ALIAS = constants.INBOX_CACHE_ALIAS
+    INBOX_CACHE_TIMEOUT = constants.INBOX_CACHE_TIMEOUT
+    COUNTER_CACHE = constants.COUNTER_CACHE
+    COUNTER_CACHE_ALIAS = constants.COUNTER_CACHE_ALIAS
+    COUNTER_CACHE_TIMEOUT = constants.COUNTER_CACHE_TIMEOUT
+    COUNTER_CACHE_LOCAL_SIZE = constants.COUNTER_CACHE_LOCAL_SIZE
+    COUNTER_CACHE_LOCAL_TIMEOUT = constants.COUNTER_CACHE_LOCAL_TIMEOUT
+    COUNTER_CACHE_MAX_INCREMENTS = constants.COUNTER_CACHE_MAX_INCREMENTS
+    JSON_CODEC = constants.JSON_CODEC
+    NATIVE_JSON_FIELD = constants.NATIVE_JSON_FIELD
+    LAZY_JSON_FIELD = constants.LAZY_JSON_FIELD
+    DEFER_MESSAGE_FIELDS = constants.DEFER_MESSAGE_FIELDS
+    COMPRESS_MESSAGES = constants.COMPRESS_MESSAGES
+    COMPRESSION_METHOD = constants.COMPRESSION_METHOD
+    COMPRESSION_THRESHOLD = constants.COMPRESSION_THRESHOLD
+    DEDUPLICATE_BODIES = constants.DEDUPLICATE_BODIES
+    FALLBACK_NOTIFICATION_STORAGES = constants.FALLBACK_NOTIFICATION_STORAGES
+    NOTIFICATION_ROUTE_SIZE = constants.NOTIFICATION_ROUTE_SIZE
+    NOTIFICATION_CACHE_ALIAS = constants.NOTIFICATION_CACHE_ALIAS
+    NOTIFICATION_CACHE_TIMEOUT = constants.NOTIFICATION_CACHE_TIMEOUT
 
     class Meta:
         prefix = 'DMM'
@@ -36,4 +36,45 @@ MESSAGE_DB_MODEL = "django_magnificent_messages.Message"
 DEFAULT_NOTIFICATION_STORAGE = "django_magnificent_messages.storage.notification_storage.session.SessionStorage"
 DEFAULT_MESSAGE_STORAGE = "django_magnificent_messages.storage.message_storage.db.DatabaseStorage"
 
+MESSAGES_COUNTS_KEYS = ("all", "read", "unread", "archived", "new")
+
+BULK_BATCH_SIZE = 1000
+
+STREAM_MESSAGES = False
+STREAM_CHUNK_SIZE = 2000
+
+PREFETCH_REPLIES = False
+REPLY_TO_DEPTH = None
+
+USE_DELIVERY_TABLE = False
+DELIVERY_BATCH_SIZE = 1000
+
+INBOX_CACHE_ALIAS = None
+INBOX_CACHE_TIMEOUT = 300
+
+COUNTER_CACHE = None
+COUNTER_CACHE_ALIAS = "default"
+COUNTER_CACHE_TIMEOUT = 300
+COUNTER_CACHE_LOCAL_SIZE = 1000
+COUNTER_CACHE_LOCAL_TIMEOUT = 5
+COUNTER_CACHE_MAX_INCREMENTS = 20
+
+JSON_CODEC = "django_magnificent_messages.fields.StdlibJSONCodec"
+NATIVE_JSON_FIELD = False
+LAZY_JSON_FIELD = False
+DEFER_MESSAGE_FIELDS = ()
+COMPRESS_MESSAGES = False
+COMPRESSION_METHOD = "zlib"
+COMPRESSION_THRESHOLD = 1024
+DEDUPLICATE_BODIES = False
+
+FALLBACK_NOTIFICATION_STORAGES = (
+    "django_magnificent_messages.storage.notification_storage.cookie.CookieStorage",
+    "django_magnificent_messages.storage.notification_storage.session.SessionStorage",
+)
+NOTIFICATION_ROUTE_SIZE = 8192
+
+NOTIFICATION_CACHE_ALIAS = "default"
+NOTIFICATION_CACHE_TIMEOUT = 60 * 60 * 24
+
 MIN_DATETIME = django.utils.timezone.make_aware(datetime.datetime(1900, 1, 1))
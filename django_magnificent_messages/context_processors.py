@@ -10,7 +10,8 @@ def django_magnificent_messages(request):
         "dmm": {
             'notifications': {
                 'all': notifications.get(request),
-                'count': notifications.count(request),
+                'count': partial(notifications.count, request),
+                'has': partial(notifications.has, request),
             },
             'messages': {
                 'all': partial(messages.all, request),
@@ -25,6 +26,7 @@ def django_magnificent_messages(request):
                 'sent_count': partial(messages.sent_count, request),
                 'new': partial(messages.new, request),
                 'new_count': partial(messages.new_count, request),
+                'counts': partial(messages.counts, request),
             }
         }
     }
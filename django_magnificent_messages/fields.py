@@ -1,13 +1,40 @@
 """
 Custom fields for django-magnificent-messages
 """
+import base64
+import binascii
 import json
+import zlib
+from functools import lru_cache, partial
 
 from django.core import checks
-from django.core.exceptions import ValidationError
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.signals import setting_changed
 from django.db import models
+from django.dispatch import receiver
+from django.utils.functional import empty, SimpleLazyObject
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 
+from django_magnificent_messages.conf import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Compressed values are stored as marker, compression method code and base64-encoded compressed UTF-8 bytes. Plain
+# values starting with marker are escaped with marker and raw code, so every stored value is decoded unambiguously
+COMPRESSED_MARKER = "\x1f"
+RAW_CODE = "r"
+ZLIB_CODE = "z"
+ZSTD_CODE = "s"
+
 
 class JSONFieldConvertError(Exception):
     """
@@ -28,6 +55,164 @@ class JSONFieldConvertError(Exception):
         self.code = code
 
 
+class StdlibJSONCodec:
+    """
+    JSON codec built on python standard ``json`` module.
+
+    Codec is any object with ``dumps(value: object) -> str`` and ``loads(json: str) -> object`` methods, which raise
+    ``TypeError`` or ``ValueError`` on errors. Codec used by ``JSONField`` by default is set by ``DMM_JSON_CODEC``
+    setting.
+    """
+
+    @staticmethod
+    def dumps(value: object) -> str:
+        return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+    @staticmethod
+    def loads(json_string: str) -> object:
+        return json.loads(json_string)
+
+
+class OrjsonJSONCodec(StdlibJSONCodec):
+    """
+    Codec built on much faster ``orjson``, falls back to standard ``json`` module if ``orjson`` is not installed.
+
+    Differences from standard ``json`` module:
+      * stored JSON is compact, so exact lookups do not match values stored with standard codec;
+      * integers not fitting in 64 bits are decoded as floats.
+
+    JSON rejected by ``orjson`` (e.g. ``NaN``) is decoded with standard ``json`` module.
+    """
+
+    @staticmethod
+    def dumps(value: object) -> str:
+        if orjson is None:
+            return StdlibJSONCodec.dumps(value)
+        # Dates are passed to default (which raises TypeError) as with standard json module
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME).decode()
+
+    @staticmethod
+    def loads(json_string: str) -> object:
+        if orjson is not None:
+            try:
+                return orjson.loads(json_string)
+            except ValueError:
+                pass
+        return json.loads(json_string)
+
+
+@lru_cache(maxsize=None)
+def _load_json_codec(path):
+    return import_string(path)
+
+
+def get_json_codec():
+    """
+    Return JSON codec set by ``DMM_JSON_CODEC`` setting
+    """
+    return _load_json_codec(settings.DMM_JSON_CODEC)
+
+
+@receiver(setting_changed)
+def _reset_json_codec(setting, **_):
+    if setting == "DMM_JSON_CODEC":
+        _load_json_codec.cache_clear()
+
+
+def compress_text(value: str) -> str:
+    """
+    Return compressed value if ``DMM_COMPRESS_MESSAGES`` is True, value is not shorter than
+    ``DMM_COMPRESSION_THRESHOLD`` and compressed value is shorter. Otherwise return value as is.
+
+    Compression method is set by ``DMM_COMPRESSION_METHOD`` setting: ``zlib`` or ``zstd`` (if ``zstandard`` is not
+    installed, ``zlib`` is used).
+
+    Values starting with ``COMPRESSED_MARKER`` are always escaped (even if compression is disabled), so they are not
+    mistaken for compressed ones.
+    """
+    if value.startswith(COMPRESSED_MARKER):
+        return COMPRESSED_MARKER + RAW_CODE + value
+    if not settings.DMM_COMPRESS_MESSAGES or len(value) < settings.DMM_COMPRESSION_THRESHOLD:
+        return value
+    data = value.encode()
+    if settings.DMM_COMPRESSION_METHOD == "zstd" and zstandard is not None:
+        code, compressed = ZSTD_CODE, zstandard.ZstdCompressor().compress(data)
+    else:
+        code, compressed = ZLIB_CODE, zlib.compress(data)
+    result = COMPRESSED_MARKER + code + base64.b64encode(compressed).decode("ascii")
+    return result if len(result) < len(value) else value
+
+
+def decompress_text(value: str) -> str:
+    """
+    Decompress value compressed (or escaped) by ``compress_text``. Not compressed values are returned as is.
+
+    Values starting with marker, but having unknown method code or broken payload, were stored before escaping was
+    introduced, so they are returned as is too.
+    """
+    if not value.startswith(COMPRESSED_MARKER):
+        return value
+    code = value[1:2]
+    if code == RAW_CODE:
+        return value[2:]
+    if code not in (ZLIB_CODE, ZSTD_CODE):
+        return value
+    try:
+        compressed = base64.b64decode(value[2:], validate=True)
+    except binascii.Error:
+        return value
+    if code == ZSTD_CODE:
+        if zstandard is None:
+            raise ImproperlyConfigured("zstandard package is required to read messages compressed with zstd")
+        try:
+            return zstandard.ZstdDecompressor().decompress(compressed).decode()
+        except (zstandard.ZstdError, UnicodeDecodeError):
+            return value
+    try:
+        return zlib.decompress(compressed).decode()
+    except (zlib.error, UnicodeDecodeError):
+        return value
+
+
+class CompressedTextField(models.TextField):
+    """
+    TextField, which values are compressed with ``compress_text`` when saved (so only if ``DMM_COMPRESS_MESSAGES`` is
+    True) and decompressed when loaded. Database-side lookups (e.g. ``contains``) do not see compressed values.
+    """
+
+    def from_db_value(self, value, *_):
+        if isinstance(value, str):
+            return decompress_text(value)
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if isinstance(value, str):
+            return compress_text(value)
+        return value
+
+
+class LazyJSON(SimpleLazyObject):
+    """
+    Proxy of JSON value, which is decoded on first access. Until then value is saved back to database as is, without
+    decoding and encoding.
+    """
+
+    def __init__(self, decode, json_string: str):
+        self.__dict__["json_string"] = json_string
+        super().__init__(partial(decode, json_string))
+
+    @property
+    def is_decoded(self) -> bool:
+        return self._wrapped is not empty
+
+    def __getattr__(self, name):
+        # Django probes saved values for these methods. JSON values never have them, so there is no need to decode
+        if name in ("resolve_expression", "prepare_database_save", "as_sql"):
+            raise AttributeError(name)
+        return super().__getattr__(name)
+
+
 class JSONField(models.TextField):
     """
     JSON object field.
@@ -40,7 +225,17 @@ class JSONField(models.TextField):
     This functions used to convert python object to and from JSON-string. If something went wrong during
     encoding/decoding function should raise JSONFieldConvertError
 
-    By default it's just use python standard json.loads and json.dumps with all of it's limitations. Check the docs.
+    By default it uses codec set by ``DMM_JSON_CODEC`` setting: python standard json.dumps and json.loads with all of
+    it's limitations (check the docs) or faster ``OrjsonJSONCodec``.
+
+    If ``native`` is True (by default ``DMM_NATIVE_JSON_FIELD`` setting), column has database native JSON type (one
+    used by Django ``models.JSONField``) on backends supporting it, e.g. ``jsonb`` on PostgreSQL. Changing it for
+    existing table requires altering column type manually.
+
+    If ``lazy`` is True (by default ``DMM_LAZY_JSON_FIELD`` setting), values loaded from database are ``LazyJSON``
+    proxies, decoded on first access. Decoding errors are raised on that access too.
+
+    If ``compress`` is True, encoded values are compressed with ``compress_text`` (if column is not native JSON).
     """
     description = _("String storing JSON-objects")
 
@@ -58,8 +253,8 @@ class JSONField(models.TextField):
     @staticmethod
     def _default_encode(value: object) -> str:
         try:
-            return json.dumps(value, ensure_ascii=False, sort_keys=True)
-        except TypeError:
+            return get_json_codec().dumps(value)
+        except (TypeError, ValueError):
             raise JSONFieldConvertError(
                 value,
                 message=_("Error while decoding value `%(value)r` in field `%(name)s`"),
@@ -69,16 +264,19 @@ class JSONField(models.TextField):
     @staticmethod
     def _default_decode(json_string: str) -> object:
         try:
-            return json.loads(json_string)
-        except (TypeError, json.decoder.JSONDecodeError):
+            return get_json_codec().loads(json_string)
+        except (TypeError, ValueError):
             raise JSONFieldConvertError(
                 json_string,
                 message=_("Error while decoding value `%(value)r` in field `%(name)s"),
                 code="encode_error"
             )
 
-    def __init__(self, encode=None, decode=None, **kwargs):
+    def __init__(self, encode=None, decode=None, native=None, lazy=None, compress=False, **kwargs):
         super(JSONField, self).__init__(**kwargs)
+        self.native = native
+        self.lazy = lazy
+        self.compress = compress
         self.encode = encode if encode is not None else self._default_encode
         self.decode = decode if decode is not None else self._default_decode
         self._encode_parameter = encode  # Saving for deconstruct
@@ -116,11 +314,40 @@ class JSONField(models.TextField):
             kwargs['encode'] = self._encode_parameter
         if self._decode_parameter is not None:
             kwargs['decode'] = self._decode_parameter
+        if self.native is not None:
+            kwargs['native'] = self.native
+        if self.compress:
+            kwargs['compress'] = True
         return name, path, args, kwargs
 
+    def _is_native(self, connection) -> bool:
+        native = settings.DMM_NATIVE_JSON_FIELD if self.native is None else self.native
+        # supports_json_field is missing before Django 3.1
+        return native and getattr(connection.features, 'supports_json_field', False)
+
+    def db_type(self, connection):
+        if self._is_native(connection):
+            return connection.data_types['JSONField']
+        return super().db_type(connection)
+
+    def db_check(self, connection):
+        if self._is_native(connection):
+            check = connection.data_type_check_constraints.get('JSONField')
+            if check is not None:
+                return check % self.db_type_parameters(connection)
+            return None
+        return super().db_check(connection)
+
     def from_db_value(self, value, *_):
-        if value is None:
+        if value is None or not isinstance(value, str):
+            # Some drivers return native JSON columns already decoded
             return value
+        value = decompress_text(value)
+        if settings.DMM_LAZY_JSON_FIELD if self.lazy is None else self.lazy:
+            return LazyJSON(self._decode_db_value, value)
+        return self._decode_db_value(value)
+
+    def _decode_db_value(self, value):
         try:
             return self.decode(value)
         except JSONFieldConvertError as err:
@@ -135,11 +362,21 @@ class JSONField(models.TextField):
         return value
 
     def get_prep_value(self, value):
+        if isinstance(value, LazyJSON):
+            if not value.is_decoded:
+                return value.json_string
+            value = value._wrapped
         try:
             return self.encode(value)
         except JSONFieldConvertError as err:
             self._raise_convert_validation_error(err)
 
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if self.compress and isinstance(value, str) and not self._is_native(connection):
+            return compress_text(value)
+        return value
+
     def value_to_string(self, obj):
         value = self.value_from_object(obj)
         return self.get_prep_value(value)
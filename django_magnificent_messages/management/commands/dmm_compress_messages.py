@@ -0,0 +1,50 @@
+"""
+Rewrite text and extra of existing messages and shared message bodies according to compression settings
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from django_magnificent_messages.conf import settings
+from django_magnificent_messages.models import Message, MessageBody
+
+
+class Command(BaseCommand):
+    help = "Rewrite text and extra of existing messages and shared message bodies in batches, compressing them " \
+           "if DMM_COMPRESS_MESSAGES is True (values shorter than DMM_COMPRESSION_THRESHOLD are left " \
+           "uncompressed) or decompressing them otherwise. Run it after changing compression settings on " \
+           "existing database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.DMM_BULK_BATCH_SIZE,
+                            help="Number of rows rewritten in one transaction")
+
+    def handle(self, *args, **options):
+        count = self._rewrite(Message, options["batch_size"])
+        bodies_count = self._rewrite(MessageBody, options["batch_size"])
+        self.stdout.write("{0} messages and {1} shared bodies rewritten with compression {2}".format(
+            count, bodies_count, "enabled" if settings.DMM_COMPRESS_MESSAGES else "disabled"))
+
+    @staticmethod
+    def _rewrite(model, batch_size: int) -> int:
+        """
+        Rewrite text and extra of all ``model`` rows in batches. Returns number of rewritten rows
+        """
+        rows = model.objects.order_by("pk").only("pk", "text", "extra")
+        # bulk_update is missing before Django 2.2
+        bulk_update = getattr(model.objects, "bulk_update", None)
+        count = 0
+        last_pk = None
+        while True:
+            batch = rows if last_pk is None else rows.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            with transaction.atomic():
+                if bulk_update is not None:
+                    bulk_update(batch, ["text", "extra"])
+                else:
+                    for obj in batch:
+                        model.objects.filter(pk=obj.pk).update(text=obj.text, extra=obj.extra)
+            count += len(batch)
+            last_pk = batch[-1].pk
+        return count
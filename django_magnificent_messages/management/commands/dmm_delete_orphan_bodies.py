@@ -0,0 +1,30 @@
+"""
+Delete shared message bodies, which are not used by any message
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from django_magnificent_messages.conf import settings
+from django_magnificent_messages.models import MessageBody
+
+
+class Command(BaseCommand):
+    help = "Delete shared message bodies (mm_message_body table) left without messages after messages deletion. " \
+           "Sending of message reusing body, which is deleted at the same moment, fails, so run it when few " \
+           "messages are sent."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=settings.DMM_BULK_BATCH_SIZE,
+                            help="Number of bodies deleted in one transaction")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        count = 0
+        while True:
+            with transaction.atomic():
+                pks = list(MessageBody.objects.orphans().order_by("pk").values_list("pk", flat=True)[:batch_size])
+                if not pks:
+                    break
+                # Bodies are checked again, so ones reused since selection are kept
+                count += MessageBody.objects.orphans().filter(pk__in=pks).delete()[0]
+        self.stdout.write("{0} orphan message bodies deleted".format(count))
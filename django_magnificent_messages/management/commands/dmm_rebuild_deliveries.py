@@ -0,0 +1,21 @@
+"""
+Rebuild delivery records for existing messages
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from django_magnificent_messages.models import Delivery, Message
+
+
+class Command(BaseCommand):
+    help = "Rebuild delivery records (mm_delivery table) from message recipients, read and archived relations. " \
+           "Run it after enabling DMM_USE_DELIVERY_TABLE on existing database."
+
+    def handle(self, *args, **options):
+        count = 0
+        for message in Message.objects.order_by("pk").iterator():
+            with transaction.atomic():
+                Delivery.objects.filter(message=message).delete()
+                Delivery.objects.sync_recipients(message)
+            count += 1
+        self.stdout.write("Deliveries rebuilt for {0} messages".format(count))
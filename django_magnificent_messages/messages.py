@@ -5,12 +5,20 @@ from django.http import HttpRequest
 from .backend import MessageBackend
 from . import constants
 from .storage.message_storage.base import MessageError
+from .utils import run_sync
 
 __all__ = (
     'all', 'all_count', 'read', 'read_count', 'unread', 'unread_count', 'archived', 'archived_count', 'new',
-    'new_count',
+    'new_count', 'counts',
     'add', 'secondary', 'primary', 'info', 'success', 'warning', 'error',
-    'MessageFailure', 'update_last_checked'
+    'mark_read_bulk', 'mark_unread_bulk', 'archive_bulk', 'unarchive_bulk',
+    'MessageFailure', 'update_last_checked',
+    'aall', 'aall_count', 'aread', 'aread_count', 'aunread', 'aunread_count', 'aarchived', 'aarchived_count', 'anew',
+    'anew_count', 'acounts', 'asent', 'asent_count',
+    'aadd', 'asecondary', 'aprimary', 'ainfo', 'asuccess', 'awarning', 'aerror',
+    'amark_read', 'amark_unread', 'aarchive', 'aunarchive',
+    'amark_read_bulk', 'amark_unread_bulk', 'aarchive_bulk', 'aunarchive_bulk',
+    'aupdate_last_checked'
 )
 
 
@@ -149,6 +157,16 @@ def new_count(request: HttpRequest):
         return 0
 
 
+def counts(request: HttpRequest):
+    """
+    Return counts of all types of incoming messages on the request if exist, otherwise return dict of zeros
+    """
+    try:
+        return request.dmm_backend.messages_counts
+    except AttributeError:
+        return dict.fromkeys(constants.MESSAGES_COUNTS_KEYS, 0)
+
+
 def sent(request: HttpRequest):
     """
     Return sent messages on the request if it exists, otherwise return an empty list.
@@ -340,8 +358,237 @@ def unarchive(request: HttpRequest, message_pk, fail_silently=False):
                 raise
 
 
+def mark_read_bulk(request: HttpRequest, messages: Iterable, fail_silently=False):
+    """
+    Mark several messages as read with constant number of queries.
+
+    ``messages`` is iterable of messages pks or messages iterator (e.g. ``unread(request)``)
+    """
+    try:
+        backend = request.dmm_backend  # type: MessageBackend
+    except AttributeError:
+        if not isinstance(request, HttpRequest):
+            raise TypeError(
+                "add() argument must be an HttpRequest object, not "
+                "'%s'." % request.__class__.__name__
+            )
+        if not fail_silently:
+            raise MessageFailure(
+                'You cannot work with messages without installing '
+                'django_magnificent_messages.middleware.MessageMiddleware'
+            )
+    else:
+        try:
+            backend.mark_read_bulk(messages)
+        except MessageError:
+            if not fail_silently:
+                raise
+
+
+def mark_unread_bulk(request: HttpRequest, messages: Iterable, fail_silently=False):
+    """
+    Mark several messages as unread with constant number of queries.
+
+    ``messages`` is iterable of messages pks or messages iterator (e.g. ``read(request)``)
+    """
+    try:
+        backend = request.dmm_backend  # type: MessageBackend
+    except AttributeError:
+        if not isinstance(request, HttpRequest):
+            raise TypeError(
+                "add() argument must be an HttpRequest object, not "
+                "'%s'." % request.__class__.__name__
+            )
+        if not fail_silently:
+            raise MessageFailure(
+                'You cannot work with messages without installing '
+                'django_magnificent_messages.middleware.MessageMiddleware'
+            )
+    else:
+        try:
+            backend.mark_unread_bulk(messages)
+        except MessageError:
+            if not fail_silently:
+                raise
+
+
+def archive_bulk(request: HttpRequest, messages: Iterable, fail_silently=False):
+    """
+    Archive several messages with constant number of queries.
+
+    ``messages`` is iterable of messages pks or messages iterator (e.g. ``all(request)``)
+    """
+    try:
+        backend = request.dmm_backend  # type: MessageBackend
+    except AttributeError:
+        if not isinstance(request, HttpRequest):
+            raise TypeError(
+                "add() argument must be an HttpRequest object, not "
+                "'%s'." % request.__class__.__name__
+            )
+        if not fail_silently:
+            raise MessageFailure(
+                'You cannot work with messages without installing '
+                'django_magnificent_messages.middleware.MessageMiddleware'
+            )
+    else:
+        try:
+            backend.archive_bulk(messages)
+        except MessageError:
+            if not fail_silently:
+                raise
+
+
+def unarchive_bulk(request: HttpRequest, messages: Iterable, fail_silently=False):
+    """
+    Unarchive several messages with constant number of queries.
+
+    ``messages`` is iterable of messages pks or messages iterator (e.g. ``archived(request)``)
+    """
+    try:
+        backend = request.dmm_backend  # type: MessageBackend
+    except AttributeError:
+        if not isinstance(request, HttpRequest):
+            raise TypeError(
+                "add() argument must be an HttpRequest object, not "
+                "'%s'." % request.__class__.__name__
+            )
+        if not fail_silently:
+            raise MessageFailure(
+                'You cannot work with messages without installing '
+                'django_magnificent_messages.middleware.MessageMiddleware'
+            )
+    else:
+        try:
+            backend.unarchive_bulk(messages)
+        except MessageError:
+            if not fail_silently:
+                raise
+
+
 def update_last_checked(request: HttpRequest) -> None:
     try:
         request.dmm_backend.update_last_checked()
     except AttributeError:
         pass
+
+
+# Async API
+#
+# Every function runs its sync counterpart with ``run_sync`` and accepts same arguments. Messages lists are fetched
+# in thread and returned as lists.
+
+async def aall(request: HttpRequest) -> list:
+    return await run_sync(lambda: list(all(request)))
+
+
+async def aall_count(request: HttpRequest) -> int:
+    return await run_sync(all_count, request)
+
+
+async def aread(request: HttpRequest) -> list:
+    return await run_sync(lambda: list(read(request)))
+
+
+async def aread_count(request: HttpRequest) -> int:
+    return await run_sync(read_count, request)
+
+
+async def aunread(request: HttpRequest) -> list:
+    return await run_sync(lambda: list(unread(request)))
+
+
+async def aunread_count(request: HttpRequest) -> int:
+    return await run_sync(unread_count, request)
+
+
+async def aarchived(request: HttpRequest) -> list:
+    return await run_sync(lambda: list(archived(request)))
+
+
+async def aarchived_count(request: HttpRequest) -> int:
+    return await run_sync(archived_count, request)
+
+
+async def anew(request: HttpRequest) -> list:
+    return await run_sync(lambda: list(new(request)))
+
+
+async def anew_count(request: HttpRequest) -> int:
+    return await run_sync(new_count, request)
+
+
+async def acounts(request: HttpRequest) -> dict:
+    return await run_sync(counts, request)
+
+
+async def asent(request: HttpRequest) -> list:
+    return await run_sync(lambda: list(sent(request)))
+
+
+async def asent_count(request: HttpRequest) -> int:
+    return await run_sync(sent_count, request)
+
+
+async def aadd(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(add, request, *args, **kwargs)
+
+
+async def asecondary(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(secondary, request, *args, **kwargs)
+
+
+async def aprimary(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(primary, request, *args, **kwargs)
+
+
+async def ainfo(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(info, request, *args, **kwargs)
+
+
+async def asuccess(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(success, request, *args, **kwargs)
+
+
+async def awarning(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(warning, request, *args, **kwargs)
+
+
+async def aerror(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(error, request, *args, **kwargs)
+
+
+async def amark_read(request: HttpRequest, message_pk, fail_silently=False):
+    await run_sync(mark_read, request, message_pk, fail_silently)
+
+
+async def amark_unread(request: HttpRequest, message_pk, fail_silently=False):
+    await run_sync(mark_unread, request, message_pk, fail_silently)
+
+
+async def aarchive(request: HttpRequest, message_pk, fail_silently=False):
+    await run_sync(archive, request, message_pk, fail_silently)
+
+
+async def aunarchive(request: HttpRequest, message_pk, fail_silently=False):
+    await run_sync(unarchive, request, message_pk, fail_silently)
+
+
+async def amark_read_bulk(request: HttpRequest, messages: Iterable, fail_silently=False):
+    await run_sync(mark_read_bulk, request, messages, fail_silently)
+
+
+async def amark_unread_bulk(request: HttpRequest, messages: Iterable, fail_silently=False):
+    await run_sync(mark_unread_bulk, request, messages, fail_silently)
+
+
+async def aarchive_bulk(request: HttpRequest, messages: Iterable, fail_silently=False):
+    await run_sync(archive_bulk, request, messages, fail_silently)
+
+
+async def aunarchive_bulk(request: HttpRequest, messages: Iterable, fail_silently=False):
+    await run_sync(unarchive_bulk, request, messages, fail_silently)
+
+
+async def aupdate_last_checked(request: HttpRequest) -> None:
+    await run_sync(update_last_checked, request)
@@ -2,11 +2,16 @@ from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 
 from django_magnificent_messages import MessageBackend
+from django_magnificent_messages.utils import run_sync
 
 
 class MessageMiddleware(MiddlewareMixin):
     """
     Middleware that handles temporary messages.
+
+    Works in both sync and async middleware chains. In async chain backend is created right in event loop (storages do
+    not touch request data until they are used) and notifications are stored in thread only if they were iterated or
+    added during request, so most requests do not switch to thread at all.
     """
 
     def process_request(self, request):
@@ -25,3 +30,13 @@ class MessageMiddleware(MiddlewareMixin):
             if unstored_messages and settings.DEBUG:
                 raise ValueError('Not all temporary messages could be stored.')
         return response
+
+    async def __acall__(self, request):
+        # Called by MiddlewareMixin.__call__ only in async chains, which exist since Django 3.1. Older versions never
+        # call it, so it does not require asgiref
+        self.process_request(request)
+        response = await self.get_response(request)
+        backend = getattr(request, 'dmm_backend', None)
+        if backend is not None and backend.notifications_changed:
+            response = await run_sync(self.process_response, request, response)
+        return response
@@ -0,0 +1,24 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:27
+
+from django.db import migrations
+import django_magnificent_messages.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_magnificent_messages', '0004_delivery'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='extra',
+            field=django_magnificent_messages.fields.JSONField(blank=True, compress=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='text',
+            field=django_magnificent_messages.fields.CompressedTextField(),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.14 on 2026-10-18 08:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django_magnificent_messages.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_magnificent_messages', '0005_compressed_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageBody',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=64, unique=True)),
+                ('subject', models.TextField(blank=True, null=True)),
+                ('text', django_magnificent_messages.fields.CompressedTextField()),
+                ('extra', django_magnificent_messages.fields.JSONField(blank=True, compress=True, null=True)),
+            ],
+            options={
+                'db_table': 'mm_message_body',
+                'default_permissions': (),
+            },
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='body',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='messages', to='django_magnificent_messages.messagebody'),
+        ),
+    ]
@@ -1,8 +1,14 @@
 """
 Models for django_magnificent_messages
 """
-from django.db import models
+import hashlib
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import IntegrityError, connections, models, router, transaction
 from django.db.models import Q, QuerySet
+from django.db.models.query import ModelIterable
+from django.db.models.signals import m2m_changed
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
@@ -10,15 +16,131 @@ from django.core.exceptions import ValidationError
 from model_utils.models import TimeStampedModel
 
 from django_magnificent_messages import constants
-from django_magnificent_messages.fields import JSONField
+from django_magnificent_messages.fields import CompressedTextField, JSONField, StdlibJSONCodec
+from django_magnificent_messages.utils import chunked
 from .conf import settings
-from .storage.message_storage.db_signals import message_archived, message_read, message_unarchived, message_unread
+from .storage.message_storage.base import InvalidMessagePkError
+from .storage.message_storage.db_signals import message_archived, message_read, message_unarchived, \
+    message_unread, messages_bulk_archived, messages_bulk_read, messages_bulk_unarchived, messages_bulk_unread
 
 
 class MessageNotSentToUserError(Exception):
     pass
 
 
+class BatchModelIterable(ModelIterable):
+    """
+    Iterable yielding model instances. If some fields are deferred, instances fetched together are linked into batches
+    (of iterable chunk size), so ``Message.refresh_from_db`` loads deferred field for whole batch with one query.
+    """
+
+    def __iter__(self):
+        if not self.queryset.query.deferred_loading[0]:
+            yield from super().__iter__()
+            return
+        batch = []
+        for obj in super().__iter__():
+            if len(batch) >= self.chunk_size:
+                batch = []
+            batch.append(obj)
+            obj._dmm_batch = batch
+            yield obj
+
+
+class MessageQuerySet(QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._iterable_class = BatchModelIterable
+
+
+class MessageBodyManager(models.Manager):
+    """
+    Manager for ``MessageBody`` model.
+
+    Provides method to find bodies by content and create missing ones
+    """
+
+    def get_for_contents(self, contents: list) -> list:
+        """
+        Get bodies for list of ``(subject, text, extra)`` tuples, creating missing bodies.
+
+        Existing bodies are found with one query. Missing ones are inserted with one ``bulk_create`` (conflicts with
+        bodies created concurrently are ignored if database supports it, otherwise bodies are inserted one by one on
+        conflict) and fetched with one more query. Returns bodies in order of contents
+        """
+        hashes = [self.model.get_hash(*content) for content in contents]
+        bodies = self.in_bulk(set(hashes), field_name="hash")
+        missing = {}
+        for content_hash, (subject, text, extra) in zip(hashes, contents):
+            if content_hash not in bodies and content_hash not in missing:
+                missing[content_hash] = self.model(hash=content_hash, subject=subject, text=text, extra=extra)
+        if missing:
+            # supports_ignore_conflicts is missing before Django 2.2
+            if getattr(connections[router.db_for_write(self.model)].features, "supports_ignore_conflicts", False):
+                self.bulk_create(missing.values(), ignore_conflicts=True)
+            else:
+                self._create_missing(missing.values())
+            bodies.update(self.in_bulk(list(missing), field_name="hash"))
+        return [bodies[content_hash] for content_hash in hashes]
+
+    def _create_missing(self, bodies):
+        try:
+            with transaction.atomic(using=router.db_for_write(self.model)):
+                self.bulk_create(bodies)
+        except IntegrityError:
+            for body in bodies:
+                try:
+                    with transaction.atomic(using=router.db_for_write(self.model)):
+                        body.save(force_insert=True)
+                except IntegrityError:
+                    pass
+
+    def orphans(self) -> QuerySet:
+        """
+        Get bodies, which are not used by any message
+        """
+        return self.filter(messages__isnull=True)
+
+
+class MessageBody(models.Model):
+    """
+    Message body model.
+
+    Content (subject, text and extra) shared by all messages with identical content, so same text sent to many users
+    as separate messages is stored once. Bodies are addressed by SHA-256 hash of content. Used only if
+    ``DMM_DEDUPLICATE_BODIES`` is True, messages saved before keep their own content. Use ``Message.content_*``
+    properties to read content of any message.
+
+    Bodies are not deleted with their messages. Run ``dmm_delete_orphan_bodies`` management command to delete bodies
+    without messages.
+    """
+    hash = models.CharField(max_length=64, unique=True)
+    subject = models.TextField(blank=True, null=True)
+    text = CompressedTextField()
+    extra = JSONField(blank=True, null=True, compress=True)
+
+    objects = MessageBodyManager()
+
+    class Meta:
+        db_table = "mm_message_body"
+        default_permissions = ()
+
+    @staticmethod
+    def get_hash(subject, text, extra) -> str:
+        """
+        Get SHA-256 hash of content. ``extra`` is validated like on save and normalized with stdlib codec, so hash does
+        not depend on ``DMM_JSON_CODEC``
+        """
+        extra = MessageBody._meta.get_field("extra").get_prep_value(extra)
+        if extra is not None:
+            extra = StdlibJSONCodec.loads(extra)
+        content = StdlibJSONCodec.dumps([subject, str(text), extra])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def __str__(self):
+        return "<MessageBody: {0}>".format(self.hash)
+
+
 class Message(TimeStampedModel):
     """
     Main model for app.
@@ -28,8 +150,9 @@ class Message(TimeStampedModel):
     level = models.IntegerField()
 
     subject = models.TextField(blank=True, null=True)
-    text = models.TextField()
-    extra = JSONField(blank=True, null=True)
+    text = CompressedTextField()
+    extra = JSONField(blank=True, null=True, compress=True)
+    body = models.ForeignKey(MessageBody, on_delete=models.PROTECT, related_name="messages", null=True)
 
     author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name="outbox")
     user_generated = models.BooleanField()
@@ -45,6 +168,8 @@ class Message(TimeStampedModel):
                                          db_table="mm_message_archived_by_user")
     html_safe = models.BooleanField(default=False)
 
+    objects = MessageQuerySet.as_manager()
+
     # @property
     # def text(self):
     #     if self.html_safe:
@@ -61,14 +186,152 @@ class Message(TimeStampedModel):
         )
         ordering = ("-created",)
 
-    def _is_user_in_recipients(self, user):
-        if user in self.sent_to_users.all():
-            return True
-        if hasattr(user, "groups"):
-            for group in user.groups.all():
-                if group in self.sent_to_groups.all():
-                    return True
-        return False
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Reload field values from the database.
+
+        If deferred fields are loaded (i.e. on first access to deferred field) and message was fetched in batch (see
+        ``BatchModelIterable``), fields are loaded for all messages of batch, which still have them deferred, with one
+        query.
+        """
+        batch = getattr(self, "_dmm_batch", None)
+        if fields is None or batch is None or not set(fields) <= self.get_deferred_fields():
+            return super().refresh_from_db(using, fields)
+        fields = list(fields)
+        pending = {obj.pk: obj for obj in batch if set(fields) <= obj.get_deferred_fields()}
+        rows = self.__class__._base_manager.db_manager(using or self._state.db).filter(pk__in=list(pending)) \
+            .values_list("pk", *fields)
+        for row in rows:
+            obj = pending[row[0]]
+            for field, value in zip(fields, row[1:]):
+                setattr(obj, field, value)
+        if set(fields) & self.get_deferred_fields():
+            # Message was deleted, let Django raise DoesNotExist
+            super().refresh_from_db(using, fields)
+
+    @property
+    def content_subject(self):
+        """
+        Subject of message. Taken from shared body if message has one (see ``DMM_DEDUPLICATE_BODIES``)
+        """
+        return self.body.subject if self.body_id is not None else self.subject
+
+    @property
+    def content_text(self) -> str:
+        """
+        Text of message. Taken from shared body if message has one, message own text is empty then
+        """
+        return self.body.text if self.body_id is not None else self.text
+
+    @property
+    def content_extra(self):
+        """
+        Extra of message. Taken from shared body if message has one
+        """
+        return self.body.extra if self.body_id is not None else self.extra
+
+    def get_recipient_pks(self) -> QuerySet:
+        """
+        Get pks of users, this message was sent to directly or through some of their groups
+        """
+        user_model = Message.sent_to_users.field.related_model
+        return user_model.objects.filter(Q(messages=self) | Q(groups__messages=self)).values_list("pk", flat=True) \
+            .distinct()
+
+    @staticmethod
+    def sent_to_user_q(user) -> Q:
+        """
+        Get Q object matching messages sent to user directly or through some of user groups
+        """
+        to_user_q = Q(sent_to_users=user)
+        if hasattr(user, "groups") and hasattr(user.groups, "all") and callable(user.groups.all):
+            to_user_q = to_user_q | Q(sent_to_groups__pk__in=user.groups.values_list("pk", flat=True))
+        return to_user_q
+
+    @classmethod
+    def archive_bulk(cls, user, message_pks: Iterable) -> list:
+        """
+        Archive several messages with constant number of queries. Returns list of archived messages pks
+        """
+        return cls._change_state_bulk(user, message_pks, "archived_messages", True, messages_bulk_archived)
+
+    @classmethod
+    def unarchive_bulk(cls, user, message_pks: Iterable) -> list:
+        """
+        Unarchive several messages with constant number of queries. Returns list of unarchived messages pks
+        """
+        return cls._change_state_bulk(user, message_pks, "archived_messages", False, messages_bulk_unarchived)
+
+    @classmethod
+    def mark_read_bulk(cls, user, message_pks: Iterable) -> list:
+        """
+        Mark several messages as read with constant number of queries. Returns list of marked messages pks
+        """
+        return cls._change_state_bulk(user, message_pks, "read_messages", True, messages_bulk_read)
+
+    @classmethod
+    def mark_unread_bulk(cls, user, message_pks: Iterable) -> list:
+        """
+        Mark several messages as unread with constant number of queries. Returns list of marked messages pks
+        """
+        return cls._change_state_bulk(user, message_pks, "read_messages", False, messages_bulk_unread)
+
+    @classmethod
+    def _change_state_bulk(cls, user, message_pks: Iterable, relation: str, add: bool, signal) -> list:
+        """
+        Add messages to (or remove from) user ``relation`` (``read_messages`` or ``archived_messages``).
+
+        Messages are processed in chunks of ``DMM_BULK_BATCH_SIZE``: recipients of every chunk are validated with one
+        query and rows of relation are inserted or deleted with one statement per chunk. If some of messages were not
+        sent to user, nothing is changed and ``MessageNotSentToUserError`` is raised. Invalid pks raise
+        ``InvalidMessagePkError``.
+        """
+        message_pks = {cls._to_pk(pk) for pk in message_pks}
+        if not message_pks:
+            return []
+        if user is None:
+            raise MessageNotSentToUserError("Messages were not sent to anonymous user")
+        sent_pks = sorted(message_pks)
+        not_sent = set()
+        for chunk in chunked(sent_pks, settings.DMM_BULK_BATCH_SIZE):
+            not_sent.update(set(chunk) - set(cls.objects.filter(cls.sent_to_user_q(user), pk__in=chunk).order_by()
+                                             .values_list("pk", flat=True).distinct()))
+        if not_sent:
+            raise MessageNotSentToUserError(
+                "Messages {0} were not sent to user, who tried to change them".format(sorted(not_sent))
+            )
+        with transaction.atomic(savepoint=False):
+            for chunk in chunked(sent_pks, settings.DMM_BULK_BATCH_SIZE):
+                if add:
+                    getattr(user, relation).add(*chunk)
+                else:
+                    getattr(user, relation).remove(*chunk)
+        signal.send(sender=cls, message_pks=sent_pks, user=user)
+        return sent_pks
+
+    @classmethod
+    def _to_pk(cls, value):
+        try:
+            return cls._meta.pk.to_python(value)
+        except ValidationError:
+            raise InvalidMessagePkError(value)
+
+    def _is_user_in_recipients(self, user) -> bool:
+        """
+        Check if message was sent to user directly or through some of user groups.
+
+        Uses single ``EXISTS`` query over recipients relations, so recipients are never loaded. Result is memoized on
+        message instance per user and reset when recipients of this instance are changed.
+        """
+        if user is None or user.pk is None:
+            return False
+        memo = self.__dict__.setdefault("_dmm_recipients_memo", {})
+        if user.pk not in memo:
+            in_recipients = Q(sent_to_users=user)
+            if hasattr(user, "groups") and hasattr(user.groups, "all") and callable(user.groups.all):
+                in_recipients |= Q(sent_to_groups__in=user.groups.values("pk"))
+            memo[user.pk] = Message.objects.filter(pk=self.pk).filter(in_recipients).exists()
+        return memo[user.pk]
 
     def archive(self, user):
 
@@ -153,7 +416,7 @@ class Inbox(models.Model):
 
     @property
     def archived(self) -> QuerySet:
-        return self._get_messages(archived=True)
+        return self._archived()
 
     @property
     def archived_count(self) -> int:
@@ -167,6 +430,33 @@ class Inbox(models.Model):
     def new_count(self) -> int:
         return self._new().count()
 
+    def counts(self) -> dict:
+        """
+        Get counts of all types of messages in this inbox with single query.
+
+        Returns dict with ``all``, ``read``, ``unread``, ``archived`` and ``new`` keys. Values are the same as
+        corresponding ``*_count`` properties return, but computed with one conditional aggregation query instead of
+        five ``COUNT(*)`` queries.
+        """
+        if settings.DMM_USE_DELIVERY_TABLE:
+            rows = Delivery.objects.filter(user=self.user)
+            archived_q = Q(archived=True)
+            read_q = Q(read=True)
+        else:
+            rows = Message.objects.filter(pk__in=self._get_recipient_message_pks())
+            archived_q = Q(pk__in=self.user.archived_messages.values("pk"))
+            read_q = Q(pk__in=self.user.read_messages.values("pk"))
+        new_q = Q(created__gt=self.last_checked)
+        # Aliases are suffixed to avoid clashes with Delivery fields names
+        counts = rows.order_by().aggregate(
+            all_count=models.Count("pk", filter=~archived_q),
+            read_count=models.Count("pk", filter=~archived_q & read_q),
+            unread_count=models.Count("pk", filter=~archived_q & ~read_q),
+            archived_count=models.Count("pk", filter=archived_q),
+            new_count=models.Count("pk", filter=~archived_q & new_q),
+        )
+        return {key: counts[key + "_count"] or 0 for key in constants.MESSAGES_COUNTS_KEYS}
+
     class Meta:
         db_table = "mm_inbox"
         unique_together = (
@@ -188,45 +478,82 @@ class Inbox(models.Model):
             )
         super(Inbox, self).save(force_insert, force_update, using, update_fields)
 
-    def _get_messages(self, archived: bool = False, q: Q = Q()) -> QuerySet:
+    def _get_messages(self, archived: bool = False, read: bool = None, since=None, q: Q = Q()) -> QuerySet:
         """
         Get messages in this inbox and filter them with q.
 
         Get messages sent to user directly or through some of user groups. Excepts archived messages
 
-        Uses two queries to avoid duplication of messages sent to user directly and through the groups, or through
-        two and more groups. Can't use distinct() because Oracle does not support distinct on NCLOB fields and
+        If ``DMM_USE_DELIVERY_TABLE`` is True, messages are taken from ``Delivery`` table with single indexed query.
+        Otherwise uses two queries to avoid duplication of messages sent to user directly and through the groups, or
+        through two and more groups. Can't use distinct() because Oracle does not support distinct on NCLOB fields and
         Message model has such fields (subject, text and extra)
 
         **You should not use this method directly. Use properties instead**
 
         :param archived: If False (default) - exclude archived. If true - notifications_show only archived
+        :param read: If None (default) - read and unread messages. If True - only read, if False - only unread
+        :param since: If not None - only messages created after this moment
         :param q: Q object to filter messages
         :return: Messages QuerySet
         """
+        if settings.DMM_USE_DELIVERY_TABLE:
+            messages = self._get_delivered_messages(archived, read, since)
+        else:
+            messages = self._get_recipient_messages(archived, read, since)
 
-        # Get distinct messages pks
-        to_user_q = Q(sent_to_users=self.user)
-        if hasattr(self.user, "groups") and hasattr(self.user.groups, "all") and callable(self.user.groups.all):
-            to_user_q = to_user_q | Q(sent_to_groups__pk__in=self.user.groups.values_list("pk", flat=True))
-        message_pks = Message.objects.filter(to_user_q).values("id").distinct()
+        messages = messages.filter(q)
+
+        messages = messages.select_related("author", "reply_to")
+
+        messages = messages.prefetch_related("sent_to_users", "sent_to_groups", "read_by", "archived_by")
 
-        # Get messages with pk in message_pks
-        messages = Message.objects.filter(pk__in=message_pks)
+        return messages
+
+    def _get_recipient_messages(self, archived: bool, read: bool = None, since=None) -> QuerySet:
+        """
+        Get messages in this inbox using message recipients relations
+        """
+        # Get messages with pk in distinct messages pks
+        messages = Message.objects.filter(pk__in=self._get_recipient_message_pks())
 
         if archived:
             messages = messages.filter(archived_by=self.user)
         else:
             messages = messages.exclude(archived_by=self.user)
 
-        messages = messages.filter(q)
+        if read is not None:
+            read_q = Q(pk__in=self.user.read_messages.values("pk"))
+            messages = messages.filter(read_q if read else ~read_q)
 
-        messages = messages.select_related("author", "reply_to")
-
-        messages = messages.prefetch_related("sent_to_users", "sent_to_groups", "read_by", "archived_by")
+        if since is not None:
+            messages = messages.filter(created__gt=since)
 
         return messages
 
+    def _get_recipient_message_pks(self) -> QuerySet:
+        """
+        Get distinct pks of messages sent to user directly or through some of user groups
+        """
+        return Message.objects.filter(Message.sent_to_user_q(self.user)).values("id").distinct()
+
+    def _get_delivered_messages(self, archived: bool, read: bool = None, since=None) -> QuerySet:
+        """
+        Get messages in this inbox using ``Delivery`` table
+
+        All conditions passed into single ``filter`` call, so only one join with ``Delivery`` table is made and query
+        is served by ``mm_delivery_inbox_idx`` index
+        """
+        lookups = {
+            "deliveries__user": self.user,
+            "deliveries__archived": archived,
+        }
+        if read is not None:
+            lookups["deliveries__read"] = read
+        if since is not None:
+            lookups["deliveries__created__gt"] = since
+        return Message.objects.filter(**lookups)
+
     def _all(self) -> QuerySet:
         """
         Returns all messages in inbox except archived
@@ -234,14 +561,184 @@ class Inbox(models.Model):
         return self._get_messages()
 
     def _read(self) -> QuerySet:
-        return self._get_messages(q=Q(pk__in=self.user.read_messages.values("pk")))
+        return self._get_messages(read=True)
 
     def _unread(self) -> QuerySet:
-        return self._get_messages(q=~Q(pk__in=self.user.read_messages.values("pk")))
+        return self._get_messages(read=False)
+
+    def _archived(self) -> QuerySet:
+        return self._get_messages(archived=True)
 
     def _new(self) -> QuerySet:
-        return self._get_messages(q=Q(created__gt=self.last_checked))
+        return self._get_messages(since=self.last_checked)
 
     def update_last_checked(self):
         self.last_checked = timezone.now()
         self.save()
+
+
+class DeliveryManager(models.Manager):
+    """
+    Manager for ``Delivery`` model.
+
+    Provides methods to keep delivery records in sync with message recipients
+    """
+
+    def sync_recipients(self, message: Message) -> None:
+        """
+        Create delivery records for new recipients of message and delete records of users, who are not recipients
+        anymore.
+
+        Recipients are users message was sent to directly or through one of their groups. Read and archived flags of
+        new records are taken from ``read_by`` and ``archived_by`` relations.
+        """
+        recipients = set(message.get_recipient_pks())
+        existing = set(self.filter(message=message).values_list("user_id", flat=True))
+
+        removed = existing - recipients
+        if removed:
+            self.filter(message=message, user_id__in=removed).delete()
+
+        added = recipients - existing
+        if added:
+            read = set(message.read_by.filter(pk__in=added).values_list("pk", flat=True))
+            archived = set(message.archived_by.filter(pk__in=added).values_list("pk", flat=True))
+            self.bulk_create(
+                (
+                    self.model(message=message, user_id=user_pk, read=user_pk in read, archived=user_pk in archived,
+                               created=message.created)
+                    for user_pk in added
+                ),
+                batch_size=settings.DMM_DELIVERY_BATCH_SIZE
+            )
+
+    def deliver_new_message(self, message: Message) -> None:
+        """
+        Create delivery records for message, which has no delivery records yet.
+
+        Unlike ``sync_recipients`` it does not load recipients into memory, but streams them and inserts records in
+        batches of ``DMM_DELIVERY_BATCH_SIZE``.
+        """
+        for user_pks in chunked(message.get_recipient_pks().iterator(), settings.DMM_DELIVERY_BATCH_SIZE):
+            self.bulk_create(self.model(message=message, user_id=user_pk, created=message.created)
+                             for user_pk in user_pks)
+
+    def deliver_new_messages(self, messages: Iterable) -> None:
+        """
+        Create delivery records for several messages, which have no delivery records yet.
+
+        Recipients of all messages are fetched with three queries (direct recipients, recipient groups and members of
+        these groups), so it should be called with reasonably sized batches of messages.
+        """
+        messages = {message.pk: message for message in messages}
+        recipients = {message_pk: set() for message_pk in messages}
+        for message_pk, user_pk in Message.sent_to_users.through.objects.filter(message_id__in=messages) \
+                .values_list("message_id", "user_id"):
+            recipients[message_pk].add(user_pk)
+
+        user_model = Message.sent_to_users.field.related_model
+        message_groups = list(Message.sent_to_groups.through.objects.filter(message_id__in=messages)
+                              .values_list("message_id", "group_id"))
+        if message_groups and hasattr(user_model, "groups"):
+            user_groups_field = user_model.groups.field
+            group_members = defaultdict(list)
+            for group_pk, user_pk in user_groups_field.remote_field.through.objects \
+                    .filter(group_id__in={group_pk for _, group_pk in message_groups}) \
+                    .values_list("group_id", user_groups_field.m2m_field_name()):
+                group_members[group_pk].append(user_pk)
+            for message_pk, group_pk in message_groups:
+                recipients[message_pk].update(group_members[group_pk])
+
+        self.bulk_create(
+            (
+                self.model(message_id=message_pk, user_id=user_pk, created=messages[message_pk].created)
+                for message_pk, user_pks in recipients.items()
+                for user_pk in user_pks
+            ),
+            batch_size=settings.DMM_DELIVERY_BATCH_SIZE
+        )
+
+
+class Delivery(models.Model):
+    """
+    Delivery model.
+
+    Denormalized per-recipient message state. Stores one record for every user message was delivered to (directly or
+    through some of user groups) with user read and archived flags, so inbox queries become single indexed range scans.
+
+    Records are created when message is sent and kept in sync with ``sent_to_users``, ``sent_to_groups``, ``read_by``
+    and ``archived_by`` relations. Changes of group membership after message was sent are not reflected. Used only if
+    ``DMM_USE_DELIVERY_TABLE`` is True. Run ``dmm_rebuild_deliveries`` management command after enabling it on
+    existing database.
+    """
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, related_name="deliveries")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="message_deliveries")
+    read = models.BooleanField(default=False)
+    archived = models.BooleanField(default=False)
+    created = models.DateTimeField()
+
+    objects = DeliveryManager()
+
+    class Meta:
+        db_table = "mm_delivery"
+        default_permissions = ()
+        unique_together = (
+            ("message", "user")
+        )
+        indexes = [
+            models.Index(fields=["user", "archived", "read", "created"], name="mm_delivery_inbox_idx"),
+        ]
+
+    def __str__(self):
+        return "<Delivery: {0.message_id} to {0.user_id}>".format(self)
+
+
+def _sync_deliveries_on_recipients_change(sender, instance, action, reverse, pk_set, **_):
+    """
+    Keep delivery records in sync with ``sent_to_users`` and ``sent_to_groups`` relations and reset memoized
+    recipients checks of changed message
+    """
+    if not reverse:
+        instance.__dict__.pop("_dmm_recipients_memo", None)
+    if not settings.DMM_USE_DELIVERY_TABLE:
+        return
+    if action == "pre_clear" and reverse:
+        # Messages are unknown after clear, so remember them before
+        instance._dmm_cleared_message_pks = list(instance.messages.values_list("pk", flat=True))
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        Delivery.objects.sync_recipients(instance)
+    else:
+        if action == "post_clear":
+            pk_set = instance.__dict__.pop("_dmm_cleared_message_pks", None)
+        for message in Message.objects.filter(pk__in=pk_set or ()):
+            Delivery.objects.sync_recipients(message)
+
+
+def _flag_updater(flag: str):
+    """
+    Create ``m2m_changed`` handler, which keeps delivery ``flag`` in sync with ``read_by`` or ``archived_by`` relation
+    """
+
+    def update_flag(sender, instance, action, reverse, pk_set, **_):
+        if not settings.DMM_USE_DELIVERY_TABLE or action not in ("post_add", "post_remove", "pre_clear"):
+            return
+        deliveries = Delivery.objects.filter(user=instance) if reverse else Delivery.objects.filter(message=instance)
+        if action != "pre_clear":
+            if reverse:
+                deliveries = deliveries.filter(message_id__in=pk_set)
+            else:
+                deliveries = deliveries.filter(user_id__in=pk_set)
+        deliveries.update(**{flag: action == "post_add"})
+
+    return update_flag
+
+
+_update_read_flag = _flag_updater("read")
+_update_archived_flag = _flag_updater("archived")
+
+m2m_changed.connect(_sync_deliveries_on_recipients_change, sender=Message.sent_to_users.through)
+m2m_changed.connect(_sync_deliveries_on_recipients_change, sender=Message.sent_to_groups.through)
+m2m_changed.connect(_update_read_flag, sender=Message.read_by.through)
+m2m_changed.connect(_update_archived_flag, sender=Message.archived_by.through)
@@ -2,10 +2,13 @@ from django.http import HttpRequest
 
 from .backend import MessageBackend
 from . import constants
+from .utils import run_sync
 
 __all__ = (
     'add', 'get',
     'secondary', 'primary', 'info', 'success', 'warning', 'error',
+    'aadd', 'aget', 'acount', 'ahas',
+    'asecondary', 'aprimary', 'ainfo', 'asuccess', 'awarning', 'aerror',
 )
 
 
@@ -56,6 +59,17 @@ def count(request: HttpRequest):
         return 0
 
 
+def has(request: HttpRequest) -> bool:
+    """
+    Return whether there are notifications on the request. Stored notifications
+    are not decoded if notification storage can count them cheaply.
+    """
+    try:
+        return request.dmm_backend.has_notifications
+    except AttributeError:
+        return False
+
+
 def secondary(request: HttpRequest, text: str, subject: str = None, extra=None, fail_silently: bool = False) -> None:
     """Add a notification with the ``SECONDARY`` level."""
     add(request, constants.SECONDARY, text, subject, extra=extra, fail_silently=fail_silently)
@@ -84,3 +98,48 @@ def warning(request: HttpRequest, text: str, subject: str = None, extra=None, fa
 def error(request: HttpRequest, text: str, subject: str = None, extra=None, fail_silently: bool = False) -> None:
     """Add a notification with the ``ERROR`` level."""
     add(request, constants.ERROR, text, subject, extra=extra, fail_silently=fail_silently)
+
+
+# Async API
+#
+# Notification storages may read session or cache, so every function runs its sync counterpart with ``run_sync`` and
+# accepts same arguments. Notifications are returned as list.
+
+async def aadd(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(add, request, *args, **kwargs)
+
+
+async def aget(request: HttpRequest) -> list:
+    return await run_sync(lambda: list(get(request)))
+
+
+async def acount(request: HttpRequest) -> int:
+    return await run_sync(count, request)
+
+
+async def ahas(request: HttpRequest) -> bool:
+    return await run_sync(has, request)
+
+
+async def asecondary(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(secondary, request, *args, **kwargs)
+
+
+async def aprimary(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(primary, request, *args, **kwargs)
+
+
+async def ainfo(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(info, request, *args, **kwargs)
+
+
+async def asuccess(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(success, request, *args, **kwargs)
+
+
+async def awarning(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(warning, request, *args, **kwargs)
+
+
+async def aerror(request: HttpRequest, *args, **kwargs) -> None:
+    await run_sync(error, request, *args, **kwargs)
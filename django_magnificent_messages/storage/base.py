@@ -6,6 +6,7 @@ class Message:
     Represent an actual message that can be stored in any of the supported
     storage classes and rendered in a view or template.
     """
+    __slots__ = ("level", "subject", "text", "extra")
 
     def __init__(self,
                  level,
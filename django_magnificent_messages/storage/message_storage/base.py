@@ -1,9 +1,18 @@
-from typing import Iterable, Callable
-
-from django.core.paginator import Paginator, Page
+import collections.abc
+import json
+from typing import Iterable, Iterator, Callable
+
+from django.core import signing
+from django.core.paginator import EmptyPage, InvalidPage, Paginator, Page
+from django.db import connections
+from django.db.models import prefetch_related_objects, Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.dateparse import parse_datetime
 from django.utils.safestring import mark_safe
 
+from django_magnificent_messages.conf import settings
 from django_magnificent_messages.storage.base import BaseStorage, Message
+from django_magnificent_messages.utils import chunked, run_sync
 
 
 class MessageError(Exception):
@@ -24,40 +33,152 @@ class MultipleMessagesFoundError(MessageError):
     MESSAGE_TEMPLATE = "Multiple messages found in storage for pk `{message_pk}`"
 
 
+class InvalidMessagePkError(MessageError):
+    MESSAGE_TEMPLATE = "Invalid message pk `{message_pk}`"
+
+
 class OperationNotSupprotedError(Exception):
     pass
 
 
+class Deferred:
+    """
+    Value of ``StoredMessage`` lazy attribute, which is computed as ``func(*args)`` on first access
+    """
+    __slots__ = ("func", "args")
+
+    def __init__(self, func: Callable, *args):
+        self.func = func
+        self.args = args
+
+    def resolve(self):
+        return self.func(*self.args)
+
+
+class LazyAttribute:
+    """
+    Descriptor of ``StoredMessage`` attribute, that may be passed as ``Deferred`` and materialized on first access
+    """
+
+    def __init__(self, slot: str):
+        self.slot = slot
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = getattr(instance, self.slot)
+        if isinstance(value, Deferred):
+            value = value.resolve()
+            setattr(instance, self.slot, value)
+        return value
+
+    def __set__(self, instance, value):
+        setattr(instance, self.slot, value)
+
+
+def _resolve_safe(text: Deferred):
+    return mark_safe(text.resolve())
+
+
 class StoredMessage(Message):
+    """
+    Message retrieved from message storage.
+
+    Known attributes are stored in ``__slots__``. Any other keyword arguments are set as instance attributes, their
+    ``__dict__`` is created only if there are some. ``text``, ``extra``, ``author``, ``reply_to`` and ``replies`` may
+    be passed as ``Deferred`` values, which are computed only if attribute is accessed.
+    """
+    __slots__ = ("pk", "user_generated", "reply_to_pk", "created", "modified", "replies_count", "_text", "_extra",
+                 "_author", "_reply_to", "_replies", "__dict__")
+
+    text = LazyAttribute("_text")
+    extra = LazyAttribute("_extra")
+    author = LazyAttribute("_author")
+    reply_to = LazyAttribute("_reply_to")
+    replies = LazyAttribute("_replies")
+
     def __init__(self,
                  level: int,
                  text: str,
                  subject: str = None,
                  extra=None,
                  html_safe: bool = False,
+                 pk=None,
+                 author=None,
+                 user_generated: bool = False,
+                 reply_to=None,
+                 reply_to_pk=None,
+                 created=None,
+                 modified=None,
+                 replies=tuple(),
+                 replies_count=None,
                  **kwargs):
-        if html_safe:
+        if html_safe and isinstance(text, Deferred):
+            super().__init__(level, Deferred(_resolve_safe, text), subject, extra)
+        elif html_safe:
             super().__init__(level, mark_safe(text), subject, extra)
         else:
             super().__init__(level, text, subject, extra)
+        self.pk = pk
+        self.author = author
+        self.user_generated = user_generated
+        self.reply_to = reply_to
+        self.reply_to_pk = reply_to_pk
+        self.created = created
+        self.modified = modified
+        self.replies = replies
+        self.replies_count = replies_count
         for k, v in kwargs.items():
             setattr(self, k, v)
 
 
 class MessageIterator:
-    def __init__(self, stored_messages, convert_function: Callable, fetch_all: bool = True):
+    """
+    Iterator over stored messages, converting them with ``convert_function``.
+
+    By default stored messages are fetched all at once on iteration start. If stored messages are QuerySet, two lazy
+    modes are available:
+
+    * If ``fetch_all`` is False, messages are fetched with slices of ``chunk_size`` rows, so partial iteration does not
+      load all messages.
+    * If ``stream`` is True (default is ``DMM_STREAM_MESSAGES`` setting), messages are fetched with
+      ``QuerySet.iterator(chunk_size)`` (server-side cursor, where database supports it) and QuerySet prefetch lookups
+      are applied to every chunk, so iteration over any number of messages takes constant memory.
+
+    ``chunk_size`` defaults to ``DMM_STREAM_CHUNK_SIZE`` setting. Every chunk is converted with ``convert_chunk``.
+
+    ``count`` is number of messages or callable returning it (e.g. storage count, which may be cached). It is used
+    by ``paginate`` instead of counting stored messages and is dropped when iterator is filtered or otherwise changed.
+    """
+
+    def __init__(self, stored_messages, convert_function: Callable, fetch_all: bool = True, stream: bool = None,
+                 chunk_size: int = None, count=None):
         self._stored_messages = stored_messages
+        self._count = count
         self._convert_function = convert_function
         self._fetch_all = fetch_all
+        self._stream = settings.DMM_STREAM_MESSAGES if stream is None else stream
+        self._chunk_size = chunk_size or settings.DMM_STREAM_CHUNK_SIZE
+        self._chunks = None
         self._index = 0
 
     def __iter__(self):
+        self._chunks = None
+        if isinstance(self._stored_messages, QuerySet):
+            if self._stream:
+                self._chunks = self._iter_stream()
+                return self
+            if not self._fetch_all:
+                self._chunks = self._iter_slices()
+                return self
         if self._fetch_all:
             self._stored_messages = list(self._stored_messages)
         self._index = 0
         return self
 
     def __next__(self):
+        if self._chunks is not None:
+            return next(self._chunks)
         try:
             value = self._convert_function(self._stored_messages[self._index])
             self._index += 1
@@ -65,80 +186,122 @@ class MessageIterator:
         except IndexError:
             raise StopIteration()
 
+    def convert_chunk(self, chunk: list) -> list:
+        """
+        Convert chunk of stored messages. Override it in subclass to convert messages in batch
+        """
+        return [self._convert_function(stored) for stored in chunk]
+
+    def _iter_slices(self) -> Iterator:
+        offset = 0
+        while True:
+            chunk = list(self._stored_messages[offset:offset + self._chunk_size])
+            yield from self.convert_chunk(chunk)
+            if len(chunk) < self._chunk_size:
+                return
+            offset += len(chunk)
+
+    def _iter_stream(self) -> Iterator:
+        # QuerySet.iterator() ignores prefetch_related, so lookups are applied to every chunk manually
+        lookups = self._stored_messages._prefetch_related_lookups
+        stored_messages = self._stored_messages.prefetch_related(None).iterator(chunk_size=self._chunk_size)
+        for chunk in chunked(stored_messages, self._chunk_size):
+            if lookups:
+                prefetch_related_objects(chunk, *lookups)
+            yield from self.convert_chunk(chunk)
+
+    def stream(self, chunk_size: int = None) -> "MessageIterator":
+        """
+        Return iterator over same messages in streaming mode
+        """
+        return self.__class__(self._stored_messages, self._convert_function, self._fetch_all, True,
+                              chunk_size or self._chunk_size, self._count)
+
+    def _clone(self, stored_messages) -> "MessageIterator":
+        return self.__class__(stored_messages, self._convert_function, self._fetch_all, self._stream,
+                              self._chunk_size)
+
+    @property
+    def stored_messages(self):
+        """
+        Messages in storage internal representation (e.g. QuerySet for database storage)
+        """
+        return self._stored_messages
+
     def filter(self, *args, **kwargs):
         if hasattr(self._stored_messages, "filter") and callable(self._stored_messages.filter):
             new_stored_messages = self._stored_messages.filter(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `filter` operation")
 
     def exclude(self, *args, **kwargs):
         if hasattr(self._stored_messages, "exclude") and callable(self._stored_messages.exclude):
             new_stored_messages = self._stored_messages.exclude(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `exclude` operation")
 
     def annotate(self, *args, **kwargs):
         if hasattr(self._stored_messages, "annotate") and callable(self._stored_messages.annotate):
             new_stored_messages = self._stored_messages.annotate(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `annotate` operation")
 
     def order_by(self, *args, **kwargs):
         if hasattr(self._stored_messages, "order_by") and callable(self._stored_messages.order_by):
             new_stored_messages = self._stored_messages.order_by(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `order_by` operation")
 
     def reverse(self, *args, **kwargs):
         if hasattr(self._stored_messages, "reverse") and callable(self._stored_messages.reverse):
             new_stored_messages = self._stored_messages.reverse(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `reverse` operation")
 
     def distinct(self, *args, **kwargs):
         if hasattr(self._stored_messages, "distinct") and callable(self._stored_messages.distinct):
             new_stored_messages = self._stored_messages.distinct(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `distinct` operation")
 
     def values(self, *args, **kwargs):
         if hasattr(self._stored_messages, "values") and callable(self._stored_messages.values):
             new_stored_messages = self._stored_messages.values(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `annotate` operation")
 
     def values_list(self, *args, **kwargs):
         if hasattr(self._stored_messages, "values_list") and callable(self._stored_messages.values_list):
             new_stored_messages = self._stored_messages.values_list(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `annotate` operation")
 
     def dates(self, *args, **kwargs):
         if hasattr(self._stored_messages, "dates") and callable(self._stored_messages.dates):
             new_stored_messages = self._stored_messages.dates(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `dates` operation")
 
     def datetimes(self, *args, **kwargs):
         if hasattr(self._stored_messages, "datetimes") and callable(self._stored_messages.datetimes):
             new_stored_messages = self._stored_messages.datetimes(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `datetimes` operation")
 
     def select_related(self, *args, **kwargs):
         if hasattr(self._stored_messages, "select_related") and callable(self._stored_messages.select_related):
             new_stored_messages = self._stored_messages.select_related(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `select_related` "
                                              "operation")
@@ -146,7 +309,7 @@ class MessageIterator:
     def prefetch_related(self, *args, **kwargs):
         if hasattr(self._stored_messages, "prefetch_related") and callable(self._stored_messages.prefetch_related):
             new_stored_messages = self._stored_messages.prefetch_related(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `prefetch_related` "
                                              "operation")
@@ -154,34 +317,119 @@ class MessageIterator:
     def defer(self, *args, **kwargs):
         if hasattr(self._stored_messages, "defer") and callable(self._stored_messages.defer):
             new_stored_messages = self._stored_messages.defer(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `defer` operation")
 
     def only(self, *args, **kwargs):
         if hasattr(self._stored_messages, "only") and callable(self._stored_messages.only):
             new_stored_messages = self._stored_messages.only(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `only` operation")
 
     def using(self, *args, **kwargs):
         if hasattr(self._stored_messages, "using") and callable(self._stored_messages.using):
             new_stored_messages = self._stored_messages.using(*args, **kwargs)
-            return MessageIterator(new_stored_messages, self._convert_function, self._fetch_all)
+            return self._clone(new_stored_messages)
         else:
             raise OperationNotSupprotedError("`stored_messages` of type {0} does not support `using` operation")
 
-    def paginate(self, per_page, orphans=0, allow_empty_first_page=True):
+    def paginate(self, per_page, orphans=0, allow_empty_first_page=True, count=None, estimate_count=False):
+        """
+        Paginate messages.
+
+        Total count of messages is taken from ``count`` argument (number or callable), then from iterator ``count``.
+        If neither is set, messages are counted, or, if ``estimate_count`` is True, their number is estimated by
+        database planner (see ``estimate_count`` function).
+        """
+        if count is None:
+            count = self._count
         return MessagePaginator(self._stored_messages, self._convert_function, self._fetch_all, per_page, orphans,
-                                allow_empty_first_page)
+                                allow_empty_first_page, count, estimate_count)
+
+    def cursor_paginate(self, per_page):
+        """
+        Paginate messages by cursor (keyset) on ``(created, pk)``.
+
+        Unlike ``paginate`` it never counts messages and never uses ``OFFSET``, so cost of page does not depend on its
+        position. Requires ``stored_messages`` to be QuerySet
+        """
+        if isinstance(self._stored_messages, QuerySet):
+            return CursorPaginator(self._stored_messages, self._convert_function, per_page)
+        else:
+            raise OperationNotSupprotedError("`stored_messages` of type {0} does not support cursor pagination")
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    Estimate number of rows returned by queryset using database planner instead of running ``COUNT(*)``.
+
+    Estimates are available on PostgreSQL only (``EXPLAIN`` row estimate of top plan node, precision depends on
+    table statistics), other databases fall back to exact count.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class MessagePaginator(Paginator):
-    def __init__(self, object_list, convert_function, fetch_all, per_page, orphans=0, allow_empty_first_page=True):
+    def __init__(self, object_list, convert_function, fetch_all, per_page, orphans=0, allow_empty_first_page=True,
+                 count=None, estimate_count=False):
         super().__init__(object_list, per_page, orphans, allow_empty_first_page)
         self._convert_function = convert_function
         self._fetch_all = fetch_all
+        self._count = count
+        self._estimate_count = estimate_count
+        self.count_estimated = False
+
+    @cached_property
+    def count(self):
+        """
+        Return the total number of messages. Precomputed count is used if it was passed
+        """
+        if self._count is not None:
+            return self._count() if callable(self._count) else self._count
+        if self._estimate_count and isinstance(self.object_list, QuerySet):
+            self.count_estimated = True
+            return estimate_count(self.object_list)
+        return super().count
+
+    def validate_number(self, number):
+        """
+        Validate page number. If count is estimated, it may be too low, so pages past estimated last page are valid
+        if they actually have messages
+        """
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            number = int(number)
+            if number < 1 or not self.count_estimated or not self.has_messages_from((number - 1) * self.per_page):
+                raise
+            return number
+
+    def page(self, number):
+        """
+        Return page by number. If count is estimated, page slice is not clamped by count (orphans are not joined)
+        """
+        number = self.validate_number(number)
+        if not self.count_estimated:
+            return super().page(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(self.object_list[bottom:bottom + self.per_page], number, self)
+
+    def has_messages_from(self, index: int) -> bool:
+        """
+        Check if there are messages starting from ``index`` with one query
+        """
+        return self.object_list[index:index + 1].exists()
 
     def _get_page(self, *args, **kwargs):
         """
@@ -202,6 +450,116 @@ class MessagePage(Page):
     def __getitem__(self, index):
         return self._convert_function(super(MessagePage, self).__getitem__(index))
 
+    def has_next(self):
+        if self.paginator.count_estimated:
+            return self.paginator.has_messages_from(self.number * self.paginator.per_page)
+        return super().has_next()
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorPaginator:
+    """
+    Keyset paginator for messages ordered from newest to oldest by ``(created, pk)``.
+
+    Pages are addressed by opaque signed cursor tokens instead of numbers. Every page is fetched with one query
+    selecting ``per_page + 1`` rows, the extra row only tells if there are more messages in fetch direction.
+    """
+    salt = "django_magnificent_messages.cursor"
+    forward = "n"
+    backward = "p"
+
+    def __init__(self, object_list: QuerySet, convert_function: Callable, per_page: int):
+        self.object_list = object_list
+        self._convert_function = convert_function
+        self.per_page = int(per_page)
+        if self.per_page < 1:
+            raise ValueError("per_page must be positive")
+
+    def get_page(self, cursor: str = None) -> "CursorPage":
+        """
+        Return page after (or before) message encoded in ``cursor``. First page is returned if cursor is empty.
+
+        Raises ``InvalidCursor`` if cursor is malformed or tampered.
+        """
+        direction, created, pk = self.decode_cursor(cursor) if cursor else (self.forward, None, None)
+        messages = self.object_list
+        if direction == self.forward:
+            if created is not None:
+                messages = messages.filter(Q(created__lt=created) | Q(created=created, pk__lt=pk))
+            messages = messages.order_by("-created", "-pk")
+        else:
+            messages = messages.filter(Q(created__gt=created) | Q(created=created, pk__gt=pk)) \
+                .order_by("created", "pk")
+        rows = list(messages[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if direction == self.forward:
+            return CursorPage(rows, self, has_next=has_more, has_previous=created is not None)
+        rows.reverse()
+        return CursorPage(rows, self, has_next=True, has_previous=has_more)
+
+    def encode_cursor(self, direction: str, stored) -> str:
+        return signing.dumps([direction, stored.created.isoformat(), stored.pk], salt=self.salt)
+
+    def decode_cursor(self, cursor: str) -> tuple:
+        try:
+            direction, created, pk = signing.loads(cursor, salt=self.salt)
+            created = parse_datetime(created)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise InvalidCursor("Invalid cursor")
+        if direction not in (self.forward, self.backward) or created is None:
+            raise InvalidCursor("Invalid cursor")
+        return direction, created, pk
+
+
+class CursorPage(collections.abc.Sequence):
+    """
+    Page of ``CursorPaginator``. Messages are converted on access
+    """
+
+    def __init__(self, object_list: list, paginator: CursorPaginator, has_next: bool, has_previous: bool):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __repr__(self):
+        return "<Cursor page of {0} messages>".format(len(self))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.paginator._convert_function(stored) for stored in self.object_list[index]]
+        return self.paginator._convert_function(self.object_list[index])
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        """Cursor of next (older messages) page or ``None``"""
+        if self.has_next():
+            return self.paginator.encode_cursor(CursorPaginator.forward, self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        """Cursor of previous (newer messages) page or ``None``"""
+        if self.has_previous():
+            return self.paginator.encode_cursor(CursorPaginator.backward, self.object_list[0])
+        return None
+
 
 class BaseMessageStorage(BaseStorage):
     """
@@ -227,32 +585,32 @@ class BaseMessageStorage(BaseStorage):
 
     # Storage API
 
-    def wrap_in_iterator(self, messages):
-        return self.ITERATOR_CLASS(messages, self._stored_to_message)
+    def wrap_in_iterator(self, messages, count=None):
+        return self.ITERATOR_CLASS(messages, self._stored_to_message, count=count)
 
     @property
     def all(self) -> Iterable:
-        return self.wrap_in_iterator(self._get_all_messages())
+        return self.wrap_in_iterator(self._get_all_messages(), self._get_all_messages_count)
 
     @property
     def read(self) -> Iterable:
-        return self.wrap_in_iterator(self._get_read_messages())
+        return self.wrap_in_iterator(self._get_read_messages(), self._get_read_messages_count)
 
     @property
     def unread(self) -> Iterable:
-        return self.wrap_in_iterator(self._get_unread_messages())
+        return self.wrap_in_iterator(self._get_unread_messages(), self._get_unread_messages_count)
 
     @property
     def archived(self) -> Iterable:
-        return self.wrap_in_iterator(self._get_archived_messages())
+        return self.wrap_in_iterator(self._get_archived_messages(), self._get_archived_messages_count)
 
     @property
     def new(self) -> Iterable:
-        return self.wrap_in_iterator(self._get_new_messages())
+        return self.wrap_in_iterator(self._get_new_messages(), self._get_new_messages_count)
 
     @property
     def sent(self) -> Iterable:
-        return self.wrap_in_iterator(self._get_sent_messages())
+        return self.wrap_in_iterator(self._get_sent_messages(), self._get_sent_messages_count)
 
     @property
     def all_count(self) -> int:
@@ -278,6 +636,15 @@ class BaseMessageStorage(BaseStorage):
     def sent_count(self) -> int:
         return self._get_sent_messages_count()
 
+    @property
+    def counts(self) -> dict:
+        """
+        Counts of all types of incoming messages.
+
+        Dict with ``all``, ``read``, ``unread``, ``archived`` and ``new`` keys.
+        """
+        return self._get_messages_counts()
+
     def get_message(self, message_pk):
         return self._stored_to_message(self._get_message(message_pk))
 
@@ -299,15 +666,73 @@ class BaseMessageStorage(BaseStorage):
         """
         message = self._construct(level, text, subject, extra)
         if message is not None and (to_users_pk or to_groups_pk):
-            if user_generated and hasattr(self.request, 'user') and getattr(self.request.user,
-                                                                            "is_authenticated", False):
-                author_pk = getattr(self.request.user, "pk")
-            else:
-                author_pk = None
-
+            author_pk = self._get_author_pk(user_generated)
             return self._save_message(message, author_pk=author_pk, to_users_pk=to_users_pk, to_groups_pk=to_groups_pk,
                                       user_generated=user_generated, reply_to_pk=reply_to_pk, html_safe=html_safe)
 
+    def broadcast_message(self,
+                          level: int,
+                          text: str,
+                          subject: str = None,
+                          extra: object = None,
+                          to_users_pk: Iterable = tuple(),
+                          to_groups_pk: Iterable = tuple(),
+                          user_generated: bool = False,
+                          html_safe: bool = False,
+                          reply_to_pk=None) -> StoredMessage:
+        """
+        Send one message to large number of recipients.
+
+        Same as ``send_message``, but ``to_users_pk`` and ``to_groups_pk`` may be any iterables (e.g. generators or
+        ``values_list`` querysets iterators) and are consumed only once, so recipients are never loaded into memory
+        at once. Message is passed into ``_save_broadcast_message`` method.
+        """
+        message = self._construct(level, text, subject, extra)
+        if message is not None:
+            author_pk = self._get_author_pk(user_generated)
+            return self._save_broadcast_message(message, author_pk=author_pk, to_users_pk=to_users_pk,
+                                                to_groups_pk=to_groups_pk, user_generated=user_generated,
+                                                reply_to_pk=reply_to_pk, html_safe=html_safe)
+
+    def send_messages_bulk(self, messages: Iterable[dict]) -> list:
+        """
+        Send many distinct messages at once.
+
+        ``messages`` is iterable of dicts with ``send_message`` arguments (``level``, ``text``, ``subject``,
+        ``extra``, ``to_users_pk``, ``to_groups_pk``, ``user_generated``, ``html_safe`` and ``reply_to_pk``).
+        ``user_generated`` defaults to ``False``. Request is not required, so storage may be created with ``None``
+        request (e.g. in management commands or background jobs).
+
+        Checks every message like ``send_message`` does and passes ``(Message, options)`` pairs of passed messages into
+        ``_save_messages_bulk`` method. Returns list of stored messages pks in order of ``messages`` with ``None`` for
+        messages, which were not sent.
+        """
+        return self._save_messages_bulk(self._construct_bulk(messages))
+
+    def _construct_bulk(self, messages: Iterable[dict]) -> Iterator:
+        for spec in messages:
+            message = self._construct(spec["level"], spec.get("text"), spec.get("subject"), spec.get("extra"))
+            # Iterators are truthy even if empty, so recipients are materialized before check
+            to_users_pk = tuple(spec.get("to_users_pk", tuple()))
+            to_groups_pk = tuple(spec.get("to_groups_pk", tuple()))
+            if message is None or not (to_users_pk or to_groups_pk):
+                yield None, None
+                continue
+            user_generated = spec.get("user_generated", False)
+            yield message, {
+                "author_pk": self._get_author_pk(user_generated),
+                "to_users_pk": to_users_pk,
+                "to_groups_pk": to_groups_pk,
+                "user_generated": user_generated,
+                "html_safe": spec.get("html_safe", False),
+                "reply_to_pk": spec.get("reply_to_pk")
+            }
+
+    def _get_author_pk(self, user_generated: bool):
+        if user_generated and hasattr(self.request, 'user') and getattr(self.request.user, "is_authenticated", False):
+            return getattr(self.request.user, "pk")
+        return None
+
     def mark_read(self, message_pk):
         self._mark_read(message_pk)
 
@@ -320,6 +745,122 @@ class BaseMessageStorage(BaseStorage):
     def unarchive(self, message_pk):
         self._unarchive(message_pk)
 
+    def mark_read_bulk(self, messages: Iterable) -> None:
+        """
+        Mark several messages as read.
+
+        ``messages`` is iterable of messages pks or ``MessageIterator`` returned by storage (e.g. ``storage.unread``)
+        """
+        self._mark_read_bulk(messages)
+
+    def mark_unread_bulk(self, messages: Iterable) -> None:
+        """
+        Mark several messages as unread. Accepts same arguments as ``mark_read_bulk``
+        """
+        self._mark_unread_bulk(messages)
+
+    def archive_bulk(self, messages: Iterable) -> None:
+        """
+        Archive several messages. Accepts same arguments as ``mark_read_bulk``
+        """
+        self._archive_bulk(messages)
+
+    def unarchive_bulk(self, messages: Iterable) -> None:
+        """
+        Unarchive several messages. Accepts same arguments as ``mark_read_bulk``
+        """
+        self._unarchive_bulk(messages)
+
+    # Async storage API
+    #
+    # Django ORM is synchronous, so async methods run sync ones in thread (see ``run_sync``). Messages lists are
+    # fetched in that thread and returned as lists. Lazy attributes of returned messages (``author``, ``reply_to``,
+    # ``replies``, deferred fields) still query database on first access, so touch them in sync code.
+
+    async def aall(self) -> list:
+        return await run_sync(lambda: list(self.all))
+
+    async def aread(self) -> list:
+        return await run_sync(lambda: list(self.read))
+
+    async def aunread(self) -> list:
+        return await run_sync(lambda: list(self.unread))
+
+    async def aarchived(self) -> list:
+        return await run_sync(lambda: list(self.archived))
+
+    async def anew(self) -> list:
+        return await run_sync(lambda: list(self.new))
+
+    async def asent(self) -> list:
+        return await run_sync(lambda: list(self.sent))
+
+    async def aall_count(self) -> int:
+        return await run_sync(self._get_all_messages_count)
+
+    async def aread_count(self) -> int:
+        return await run_sync(self._get_read_messages_count)
+
+    async def aunread_count(self) -> int:
+        return await run_sync(self._get_unread_messages_count)
+
+    async def aarchived_count(self) -> int:
+        return await run_sync(self._get_archived_messages_count)
+
+    async def anew_count(self) -> int:
+        return await run_sync(self._get_new_messages_count)
+
+    async def asent_count(self) -> int:
+        return await run_sync(self._get_sent_messages_count)
+
+    async def acounts(self) -> dict:
+        return await run_sync(self._get_messages_counts)
+
+    async def aget_message(self, message_pk):
+        return await run_sync(self.get_message, message_pk)
+
+    async def asend_message(self, *args, **kwargs) -> StoredMessage:
+        """
+        Async version of ``send_message``. Accepts same arguments
+        """
+        return await run_sync(self.send_message, *args, **kwargs)
+
+    async def abroadcast_message(self, *args, **kwargs) -> StoredMessage:
+        """
+        Async version of ``broadcast_message``. Accepts same arguments, recipients iterables are consumed in thread
+        """
+        return await run_sync(self.broadcast_message, *args, **kwargs)
+
+    async def asend_messages_bulk(self, messages: Iterable[dict]) -> list:
+        return await run_sync(self.send_messages_bulk, messages)
+
+    async def amark_read(self, message_pk):
+        await run_sync(self.mark_read, message_pk)
+
+    async def amark_unread(self, message_pk):
+        await run_sync(self.mark_unread, message_pk)
+
+    async def aarchive(self, message_pk):
+        await run_sync(self.archive, message_pk)
+
+    async def aunarchive(self, message_pk):
+        await run_sync(self.unarchive, message_pk)
+
+    async def amark_read_bulk(self, messages: Iterable) -> None:
+        await run_sync(self.mark_read_bulk, messages)
+
+    async def amark_unread_bulk(self, messages: Iterable) -> None:
+        await run_sync(self.mark_unread_bulk, messages)
+
+    async def aarchive_bulk(self, messages: Iterable) -> None:
+        await run_sync(self.archive_bulk, messages)
+
+    async def aunarchive_bulk(self, messages: Iterable) -> None:
+        await run_sync(self.unarchive_bulk, messages)
+
+    async def aupdate_last_checked(self):
+        await run_sync(self.update_last_checked)
+
     # Storage internal methods to implement in subclass
 
     def _get_all_messages(self) -> Iterable:
@@ -374,6 +915,21 @@ class BaseMessageStorage(BaseStorage):
         """This method must be implemented by a subclass."""
         raise NotImplementedError('subclasses of BaseMessageStorage must provide a _get_sent_messages_count() method')
 
+    def _get_messages_counts(self) -> dict:
+        """
+        Get counts of all types of incoming messages.
+
+        Default implementation calls every ``_get_*_messages_count`` method. Subclasses should override it if storage
+        can get all counts at once.
+        """
+        return {
+            "all": self._get_all_messages_count(),
+            "read": self._get_read_messages_count(),
+            "unread": self._get_unread_messages_count(),
+            "archived": self._get_archived_messages_count(),
+            "new": self._get_new_messages_count(),
+        }
+
     def _save_message(self,
                       message: Message,
                       author_pk,
@@ -385,6 +941,42 @@ class BaseMessageStorage(BaseStorage):
         """This method must be implemented by a subclass."""
         raise NotImplementedError('subclasses of BaseMessageStorage must provide a _save_message() method')
 
+    def _save_broadcast_message(self,
+                                message: Message,
+                                author_pk,
+                                to_users_pk: Iterable,
+                                to_groups_pk: Iterable,
+                                user_generated: bool = True,
+                                html_safe: bool = False,
+                                reply_to_pk=None) -> StoredMessage:
+        """
+        Save message sent to large number of recipients.
+
+        Default implementation materializes recipients and calls ``_save_message``. Subclasses should override it if
+        storage can stream recipients.
+        """
+        to_users_pk = list(to_users_pk)
+        to_groups_pk = list(to_groups_pk)
+        if to_users_pk or to_groups_pk:
+            return self._save_message(message, author_pk=author_pk, to_users_pk=to_users_pk, to_groups_pk=to_groups_pk,
+                                      user_generated=user_generated, html_safe=html_safe, reply_to_pk=reply_to_pk)
+
+    def _save_messages_bulk(self, messages: Iterable[tuple]) -> list:
+        """
+        Save many messages. ``messages`` is iterable of ``(Message, options)`` pairs, where options are keyword
+        arguments of ``_save_message``. Pair is ``(None, None)`` for messages, which should not be saved.
+
+        Default implementation saves messages one by one. Subclasses should override it if storage can save messages
+        in bulk.
+        """
+        pks = []
+        for message, options in messages:
+            if message is None:
+                pks.append(None)
+            else:
+                pks.append(self._save_message(message, **options).pk)
+        return pks
+
     def _stored_to_message(self, stored) -> StoredMessage:
         """
         Convert message from internal storage representation to StoredMessage instance
@@ -405,6 +997,35 @@ class BaseMessageStorage(BaseStorage):
     def _unarchive(self, message_pk):
         raise NotImplementedError('subclasses of BaseMessageStorage must provide a _unarchive() method')
 
+    def _mark_read_bulk(self, messages: Iterable):
+        """
+        Default implementation marks messages one by one. Subclasses should override it if storage can change state of
+        several messages at once. Same for other ``*_bulk`` methods
+        """
+        for message_pk in self._get_pks(messages):
+            self._mark_read(message_pk)
+
+    def _mark_unread_bulk(self, messages: Iterable):
+        for message_pk in self._get_pks(messages):
+            self._mark_unread(message_pk)
+
+    def _archive_bulk(self, messages: Iterable):
+        for message_pk in self._get_pks(messages):
+            self._archive(message_pk)
+
+    def _unarchive_bulk(self, messages: Iterable):
+        for message_pk in self._get_pks(messages):
+            self._unarchive(message_pk)
+
+    @staticmethod
+    def _get_pks(messages: Iterable) -> Iterable:
+        """
+        Get pks of messages passed into ``*_bulk`` methods
+        """
+        if isinstance(messages, MessageIterator):
+            return [message.pk for message in messages]
+        return messages
+
     def _get_message(self, message_pk):
         raise NotImplementedError('subclasses of BaseMessageStorage must provide a _get_message() method')
 
@@ -0,0 +1,244 @@
+"""
+Cache of incoming messages counts
+"""
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from django_magnificent_messages import constants
+from django_magnificent_messages.conf import settings
+from django_magnificent_messages.storage.message_storage.db_signals import message_archived, message_read, \
+    message_sent, message_unarchived, message_unread, messages_bulk_archived, messages_bulk_read, \
+    messages_bulk_sent, messages_bulk_unarchived, messages_bulk_unread
+
+
+class BaseCounterCache:
+    """
+    This is the base counter cache.
+
+    Counter cache stores counts of incoming messages (dict with keys from ``constants.MESSAGES_COUNTS_KEYS``, as
+    returned by ``BaseMessageStorage.counts``) per user. If counts are not found in cache, storage recomputes them and
+    puts into cache.
+
+    **This is not a complete class; to be a usable counter cache, it must be subclassed and all methods overridden.**
+    """
+
+    def get(self, user_pk):
+        """
+        Return counts dict for user or ``None`` if counts are not cached.
+        """
+        raise NotImplementedError('subclasses of BaseCounterCache must provide a get() method')
+
+    def set(self, user_pk, counts: dict) -> None:
+        """
+        Store counts dict for user
+        """
+        raise NotImplementedError('subclasses of BaseCounterCache must provide a set() method')
+
+    def incr(self, user_pk, deltas: dict) -> None:
+        """
+        Add deltas to user cached counts. Should do nothing if user counts are not cached.
+        """
+        raise NotImplementedError('subclasses of BaseCounterCache must provide a incr() method')
+
+    def delete(self, user_pk) -> None:
+        """
+        Remove user counts from cache, so they will be recomputed on next access.
+        """
+        raise NotImplementedError('subclasses of BaseCounterCache must provide a delete() method')
+
+    def clear(self) -> None:
+        """
+        Remove counts of all users from cache. Used after bulk operations affecting unknown number of users.
+        """
+        raise NotImplementedError('subclasses of BaseCounterCache must provide a clear() method')
+
+
+class LocalLRUCache:
+    """
+    Thread-safe in-process LRU cache with entries expiration.
+    """
+
+    def __init__(self, max_size: int, timeout: float):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return None
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        if not self.max_size:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class CounterCache(BaseCounterCache):
+    """
+    Counter cache built on Django cache framework.
+
+    Every count is stored under its own key, so incremental updates use atomic ``cache.incr``. Cache alias and timeout
+    are set by ``DMM_COUNTER_CACHE_ALIAS`` and ``DMM_COUNTER_CACHE_TIMEOUT`` settings. Keys are versioned with
+    shared version number, so ``clear`` just increments it. Version starts from current time in milliseconds (with
+    random suffix), so if version key is evicted, entries of versions used before are not served again.
+
+    In front of Django cache there is an in-process LRU tier (``DMM_COUNTER_CACHE_LOCAL_SIZE`` entries living
+    ``DMM_COUNTER_CACHE_LOCAL_TIMEOUT`` seconds). Updates made by other processes become visible after local entry
+    expiration, so keep local timeout short or set local size to 0 to disable this tier.
+    """
+    key_prefix = "dmm:counts"
+    version_key = "dmm:counts:version"
+
+    def __init__(self):
+        self._cache = caches[settings.DMM_COUNTER_CACHE_ALIAS]
+        self._timeout = settings.DMM_COUNTER_CACHE_TIMEOUT
+        self._local = LocalLRUCache(settings.DMM_COUNTER_CACHE_LOCAL_SIZE, settings.DMM_COUNTER_CACHE_LOCAL_TIMEOUT)
+
+    def _make_key(self, user_pk, count_key):
+        return "{0}:{1}:{2}".format(self.key_prefix, user_pk, count_key)
+
+    def _get_version(self) -> int:
+        version = self._cache.get(self.version_key)
+        if version is None:
+            seed = int(time.time() * 1000) * 1000 + random.randrange(1000)
+            self._cache.add(self.version_key, seed, None)
+            version = self._cache.get(self.version_key, seed)
+        return version
+
+    def get(self, user_pk):
+        counts = self._local.get(user_pk)
+        if counts is not None:
+            return dict(counts)
+        keys = {self._make_key(user_pk, count_key): count_key for count_key in constants.MESSAGES_COUNTS_KEYS}
+        cached = self._cache.get_many(keys, version=self._get_version())
+        if len(cached) != len(keys):
+            return None
+        counts = {count_key: cached[key] for key, count_key in keys.items()}
+        self._local.set(user_pk, counts)
+        return dict(counts)
+
+    def set(self, user_pk, counts: dict) -> None:
+        self._cache.set_many({self._make_key(user_pk, count_key): counts[count_key]
+                              for count_key in constants.MESSAGES_COUNTS_KEYS}, self._timeout,
+                             version=self._get_version())
+        self._local.set(user_pk, dict(counts))
+
+    def incr(self, user_pk, deltas: dict) -> None:
+        self._local.delete(user_pk)
+        version = self._get_version()
+        for count_key, delta in deltas.items():
+            if delta:
+                try:
+                    self._cache.incr(self._make_key(user_pk, count_key), delta, version=version)
+                except ValueError:
+                    # Counts are not cached (or partially expired), they will be recomputed on next access
+                    self.delete(user_pk)
+                    return
+
+    def delete(self, user_pk) -> None:
+        self._cache.delete_many([self._make_key(user_pk, count_key)
+                                 for count_key in constants.MESSAGES_COUNTS_KEYS], version=self._get_version())
+        self._local.delete(user_pk)
+
+    def clear(self) -> None:
+        # Entries of old version are left to expire. Local tiers of other processes expire in
+        # DMM_COUNTER_CACHE_LOCAL_TIMEOUT seconds
+        try:
+            self._cache.incr(self.version_key)
+        except ValueError:
+            # Version key was evicted, new one is seeded with current time
+            self._get_version()
+        self._local.clear()
+
+
+@lru_cache(maxsize=None)
+def _load_counter_cache(path):
+    return import_string(path)()
+
+
+def get_counter_cache():
+    """
+    Return counter cache instance set by ``DMM_COUNTER_CACHE`` setting or ``None`` if counter cache is disabled
+    """
+    if not settings.DMM_COUNTER_CACHE:
+        return None
+    return _load_counter_cache(settings.DMM_COUNTER_CACHE)
+
+
+@receiver(setting_changed)
+def _reset_counter_cache(setting, **_):
+    if setting.startswith("DMM_COUNTER_CACHE"):
+        _load_counter_cache.cache_clear()
+
+
+@receiver(message_sent)
+def _count_sent_message(message, **_):
+    counter_cache = get_counter_cache()
+    if counter_cache is None:
+        return
+    if settings.DMM_USE_DELIVERY_TABLE:
+        recipient_pks = message.deliveries.values_list("user_id", flat=True)
+    else:
+        recipient_pks = message.get_recipient_pks()
+    # Every increment takes several cache round trips, so if there are more recipients than
+    # DMM_COUNTER_CACHE_MAX_INCREMENTS, all counts are recomputed on next access instead
+    recipient_pks = list(recipient_pks[:settings.DMM_COUNTER_CACHE_MAX_INCREMENTS + 1])
+    if len(recipient_pks) > settings.DMM_COUNTER_CACHE_MAX_INCREMENTS:
+        counter_cache.clear()
+        return
+    # New message is always unread and new for every recipient
+    for user_pk in recipient_pks:
+        counter_cache.incr(user_pk, {"all": 1, "unread": 1, "new": 1})
+
+
+@receiver(messages_bulk_sent)
+def _clear_counts(**_):
+    # Recipients of bulk sent messages may be countless, so all counts are recomputed on next access
+    counter_cache = get_counter_cache()
+    if counter_cache is not None:
+        counter_cache.clear()
+
+
+@receiver(message_read)
+@receiver(message_unread)
+@receiver(message_archived)
+@receiver(message_unarchived)
+@receiver(messages_bulk_read)
+@receiver(messages_bulk_unread)
+@receiver(messages_bulk_archived)
+@receiver(messages_bulk_unarchived)
+def _invalidate_user_counts(user, **_):
+    # Signals do not say whether user state was actually changed (e.g. message could be already read), so counts
+    # can't be adjusted safely and are recomputed on next access
+    counter_cache = get_counter_cache()
+    if counter_cache is not None:
+        counter_cache.delete(user.pk)
@@ -1,10 +1,20 @@
+from functools import partial
 from typing import Iterable, Union
 
-from django_magnificent_messages import models
+from django.core.cache import caches
+from django.db import connections, router, transaction
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
+
+from django_magnificent_messages import constants, models
+from django_magnificent_messages.conf import settings
 from django_magnificent_messages.storage.base import StorageError, Message
 from django_magnificent_messages.storage.message_storage.base import BaseMessageStorage, StoredMessage, \
-    MessageNotFoundError, MultipleMessagesFoundError, MessageIterator
-from django_magnificent_messages.storage.message_storage.db_signals import message_sent
+    MessageNotFoundError, MultipleMessagesFoundError, MessageIterator, Deferred
+from django_magnificent_messages.storage.message_storage.counter_cache import get_counter_cache
+from django_magnificent_messages.storage.message_storage.db_signals import message_sent, messages_bulk_sent
+from django_magnificent_messages.utils import chunked
 
 
 class DatabaseStorage(BaseMessageStorage):
@@ -17,68 +27,181 @@ class DatabaseStorage(BaseMessageStorage):
 
     MESSAGE_MODEL = models.Message
     INBOX_MODEL = models.Inbox
+    DELIVERY_MODEL = models.Delivery
+    BODY_MODEL = models.MessageBody
 
     def update_last_checked(self):
         if self._inbox:
             self._inbox.update_last_checked()
+            self._cache_inbox(self._inbox)
+            counter_cache = get_counter_cache()
+            if counter_cache is not None:
+                counter_cache.delete(self.user.pk)
 
-    def __init__(self, request, *args, **kwargs):
-        super(DatabaseStorage, self).__init__(request, *args, **kwargs)
+    @cached_property
+    def user(self):
+        """
+        Authenticated request user or ``None``
+        """
         try:
-            if request.user.is_authenticated:
-                self.user = request.user
-                self._inbox, _ = self.INBOX_MODEL.objects.get_or_create(user=request.user, main=True)
-            else:
-                self.user = None
-                self._inbox = None
+            if self.request.user.is_authenticated:
+                return self.request.user
         except AttributeError:
-            self.user = None
-            self._inbox = None
-        except self.INBOX_MODEL.MultipleObjectsReturned:
-            raise StorageError(self.__class__.__name__, "User `{0}` has more then one main inbox".format(request.user))
+            pass
+        return None
+
+    @cached_property
+    def _inbox(self):
+        """
+        User main inbox.
+
+        Inbox is resolved on first access, so requests which never touch messages do not query it. If
+        ``DMM_INBOX_CACHE_ALIAS`` is set, inbox is also stored in that cache (use locmem cache for process-local
+        caching), so steady-state requests do not query it at all.
+        """
+        if self.user is None:
+            return None
+        inbox = self._get_cached_inbox()
+        if inbox is None:
+            try:
+                inbox, _ = self.INBOX_MODEL.objects.get_or_create(user=self.user, main=True)
+            except self.INBOX_MODEL.MultipleObjectsReturned:
+                raise StorageError(self.__class__.__name__,
+                                   "User `{0}` has more then one main inbox".format(self.user))
+            self._cache_inbox(inbox)
+        # Avoid query for user, who is already known
+        inbox.user = self.user
+        return inbox
+
+    def _get_inbox_cache(self):
+        if settings.DMM_INBOX_CACHE_ALIAS is None:
+            return None
+        return caches[settings.DMM_INBOX_CACHE_ALIAS]
+
+    def _get_inbox_cache_key(self):
+        return "dmm:inbox:{0}".format(self.user.pk)
+
+    def _get_cached_inbox(self):
+        cache = self._get_inbox_cache()
+        if cache is None:
+            return None
+        values = cache.get(self._get_inbox_cache_key())
+        if values is None:
+            return None
+        field_names = [field.attname for field in self.INBOX_MODEL._meta.concrete_fields]
+        return self.INBOX_MODEL.from_db(router.db_for_read(self.INBOX_MODEL), field_names, values)
+
+    def _cache_inbox(self, inbox):
+        """
+        Store inbox fields values (without related objects) in inbox cache
+        """
+        cache = self._get_inbox_cache()
+        if cache is not None:
+            values = [getattr(inbox, field.attname) for field in self.INBOX_MODEL._meta.concrete_fields]
+            cache.set(self._get_inbox_cache_key(), values, settings.DMM_INBOX_CACHE_TIMEOUT)
 
     def _get_all_messages(self) -> Iterable:
-        return getattr(self._inbox, "all", [])
+        return self._prepare_messages(getattr(self._inbox, "all", []))
 
     def _get_read_messages(self) -> Iterable:
-        return getattr(self._inbox, "read", [])
+        return self._prepare_messages(getattr(self._inbox, "read", []))
 
     def _get_unread_messages(self) -> Iterable:
-        return getattr(self._inbox, "unread", [])
+        return self._prepare_messages(getattr(self._inbox, "unread", []))
 
     def _get_archived_messages(self) -> Iterable:
-        return getattr(self._inbox, "archived", [])
+        return self._prepare_messages(getattr(self._inbox, "archived", []))
 
     def _get_new_messages(self) -> Iterable:
-        return getattr(self._inbox, "new", [])
+        return self._prepare_messages(getattr(self._inbox, "new", []))
+
+    def _prepare_messages(self, messages: Iterable) -> Iterable:
+        """
+        Add related data used by ``_stored_to_message`` to messages queryset.
+
+        If ``DMM_REPLY_TO_DEPTH`` is set, ``reply_to`` chain (with authors) is selected up to this depth. If
+        ``DMM_PREFETCH_REPLIES`` is True, replies count is annotated with subquery and replies are prefetched with
+        one query for all messages, so converting page of messages takes constant number of queries.
+
+        Fields listed in ``DMM_DEFER_MESSAGE_FIELDS`` (e.g. ``extra`` and ``text``) are deferred. They are loaded on
+        first access for all messages fetched together with one query.
+
+        If ``DMM_DEDUPLICATE_BODIES`` is True, shared bodies are prefetched with one query for all messages.
+        Otherwise bodies of messages saved before setting was disabled are loaded on conversion one by one.
+        """
+        if not isinstance(messages, QuerySet):
+            return messages
+        if settings.DMM_DEFER_MESSAGE_FIELDS:
+            messages = messages.defer(*settings.DMM_DEFER_MESSAGE_FIELDS)
+        if settings.DMM_DEDUPLICATE_BODIES:
+            messages = messages.prefetch_related("body")
+        if settings.DMM_REPLY_TO_DEPTH:
+            related = []
+            for depth in range(1, settings.DMM_REPLY_TO_DEPTH + 1):
+                reply_to = "__".join(["reply_to"] * depth)
+                related += [reply_to, reply_to + "__author"]
+                if settings.DMM_DEDUPLICATE_BODIES:
+                    related.append(reply_to + "__body")
+            messages = messages.select_related(*related)
+        if settings.DMM_PREFETCH_REPLIES:
+            replies = self.MESSAGE_MODEL.objects.select_related("author") \
+                .annotate(dmm_replies_count=self._get_replies_count_subquery())
+            if settings.DMM_DEDUPLICATE_BODIES:
+                replies = replies.select_related("body")
+            messages = messages.annotate(dmm_replies_count=self._get_replies_count_subquery()) \
+                .prefetch_related(Prefetch("replies", queryset=replies))
+        return messages
+
+    def _get_replies_count_subquery(self):
+        replies = self.MESSAGE_MODEL.objects.filter(reply_to=OuterRef("pk")).order_by().values("reply_to") \
+            .annotate(count=Count("pk")).values("count")
+        return Coalesce(Subquery(replies, output_field=IntegerField()), 0)
 
     def _get_all_messages_count(self) -> int:
-        return getattr(self._inbox, "all_count", 0)
+        return self._get_count("all")
 
     def _get_read_messages_count(self) -> int:
-        return getattr(self._inbox, "read_count", 0)
+        return self._get_count("read")
 
     def _get_unread_messages_count(self) -> int:
-        return getattr(self._inbox, "unread_count", 0)
+        return self._get_count("unread")
 
     def _get_archived_messages_count(self) -> int:
-        return getattr(self._inbox, "archived_count", 0)
+        return self._get_count("archived")
 
     def _get_new_messages_count(self) -> int:
-        return getattr(self._inbox, "new_count", 0)
+        return self._get_count("new")
+
+    def _get_count(self, key: str) -> int:
+        if get_counter_cache() is not None:
+            return self._get_messages_counts()[key]
+        return getattr(self._inbox, key + "_count", 0)
+
+    def _get_messages_counts(self) -> dict:
+        """
+        Get counts from counter cache if it is enabled, otherwise (or on cache miss) compute them with inbox
+        """
+        if self.user is None:
+            return dict.fromkeys(constants.MESSAGES_COUNTS_KEYS, 0)
+        counter_cache = get_counter_cache()
+        if counter_cache is None:
+            return self._inbox.counts()
+        counts = counter_cache.get(self.user.pk)
+        if counts is None:
+            counts = self._inbox.counts()
+            counter_cache.set(self.user.pk, counts)
+        return counts
 
     def _save_message(self, message: Message, author_pk, to_users_pk: Iterable, to_groups_pk: Iterable,
                       user_generated: bool = True, html_safe: bool = False, reply_to_pk=None) -> StoredMessage:
         reply_to = self._get_message(reply_to_pk)
         new_message = self.MESSAGE_MODEL(
             level=message.level,
-            text=message.text,
             author_id=author_pk,
-            subject=message.subject,
-            extra=message.extra,
             reply_to=reply_to,
             user_generated=user_generated,
-            html_safe=html_safe
+            html_safe=html_safe,
+            **self._get_content_fields([message])[0]
         )
         new_message.save()
         new_message.sent_to_users.set(to_users_pk)
@@ -86,6 +209,147 @@ class DatabaseStorage(BaseMessageStorage):
         message_sent.send(sender=self.__class__, message=new_message)
         return self._stored_to_message(new_message)
 
+    def _save_broadcast_message(self, message: Message, author_pk, to_users_pk: Iterable, to_groups_pk: Iterable,
+                                user_generated: bool = True, html_safe: bool = False,
+                                reply_to_pk=None) -> StoredMessage:
+        """
+        Save message and insert recipients links with ``bulk_create`` in batches of ``DMM_BULK_BATCH_SIZE``.
+
+        Message is new, so there is no need to diff recipients against existing links like ``set()`` does. Sends one
+        ``messages_bulk_sent`` signal instead of ``message_sent``. If no recipients were passed message is not saved.
+        """
+        reply_to = self._get_message(reply_to_pk)
+        with transaction.atomic():
+            new_message = self.MESSAGE_MODEL.objects.create(
+                level=message.level,
+                author_id=author_pk,
+                reply_to=reply_to,
+                user_generated=user_generated,
+                html_safe=html_safe,
+                **self._get_content_fields([message])[0]
+            )
+            linked = self._bulk_link(self.MESSAGE_MODEL.sent_to_users.through, "user_id", new_message.pk,
+                                     to_users_pk)
+            linked += self._bulk_link(self.MESSAGE_MODEL.sent_to_groups.through, "group_id", new_message.pk,
+                                      to_groups_pk)
+            if not linked:
+                transaction.set_rollback(True)
+                return None
+            if settings.DMM_USE_DELIVERY_TABLE:
+                self.DELIVERY_MODEL.objects.deliver_new_message(new_message)
+        messages_bulk_sent.send(sender=self.__class__, message_pks=[new_message.pk])
+        return self._stored_to_message(new_message)
+
+    def _save_messages_bulk(self, messages: Iterable[tuple]) -> list:
+        """
+        Save messages in batches of ``DMM_BULK_BATCH_SIZE``.
+
+        Every batch is saved in its own transaction with one ``bulk_create`` for messages (or one ``INSERT`` per
+        message if database can't return pks from bulk insert) and one ``bulk_create`` per recipients relation.
+        ``reply_to`` messages of batch are checked with one query. Sends one ``messages_bulk_sent`` signal per batch
+        instead of ``message_sent``.
+        """
+        pks = []
+        for chunk in chunked(messages, settings.DMM_BULK_BATCH_SIZE):
+            pks.extend(self._save_messages_chunk(chunk))
+        return pks
+
+    def _save_messages_chunk(self, chunk: list) -> list:
+        reply_to_pks = {options["reply_to_pk"] for message, options in chunk
+                        if message is not None and options["reply_to_pk"] is not None}
+        if reply_to_pks:
+            missing = reply_to_pks - set(self.MESSAGE_MODEL.objects.filter(pk__in=reply_to_pks)
+                                         .values_list("pk", flat=True))
+            if missing:
+                raise MessageNotFoundError(missing.pop())
+
+        contents = iter(self._get_content_fields([message for message, _ in chunk if message is not None]))
+        new_messages = []
+        recipients = []
+        for message, options in chunk:
+            if message is None:
+                new_messages.append(None)
+                continue
+            new_messages.append(self.MESSAGE_MODEL(
+                level=message.level,
+                author_id=options["author_pk"],
+                reply_to_id=options["reply_to_pk"],
+                user_generated=options["user_generated"],
+                html_safe=options["html_safe"],
+                **next(contents)
+            ))
+            recipients.append((dict.fromkeys(options["to_users_pk"]), dict.fromkeys(options["to_groups_pk"])))
+        saved_messages = [new_message for new_message in new_messages if new_message is not None]
+        if not saved_messages:
+            return [None] * len(new_messages)
+
+        with transaction.atomic():
+            connection = connections[router.db_for_write(self.MESSAGE_MODEL)]
+            # Feature was named can_return_ids_from_bulk_insert before Django 3.0
+            if getattr(connection.features, "can_return_rows_from_bulk_insert",
+                       getattr(connection.features, "can_return_ids_from_bulk_insert", False)):
+                self.MESSAGE_MODEL.objects.bulk_create(saved_messages)
+            else:
+                for new_message in saved_messages:
+                    new_message.save()
+            user_through = self.MESSAGE_MODEL.sent_to_users.through
+            group_through = self.MESSAGE_MODEL.sent_to_groups.through
+            user_through.objects.bulk_create(
+                user_through(message_id=new_message.pk, user_id=user_pk)
+                for new_message, (to_users_pk, _) in zip(saved_messages, recipients)
+                for user_pk in to_users_pk
+            )
+            group_through.objects.bulk_create(
+                group_through(message_id=new_message.pk, group_id=group_pk)
+                for new_message, (_, to_groups_pk) in zip(saved_messages, recipients)
+                for group_pk in to_groups_pk
+            )
+            if settings.DMM_USE_DELIVERY_TABLE:
+                self.DELIVERY_MODEL.objects.deliver_new_messages(saved_messages)
+        messages_bulk_sent.send(sender=self.__class__, message_pks=[new_message.pk for new_message in saved_messages])
+        return [new_message.pk if new_message is not None else None for new_message in new_messages]
+
+    def _get_content_fields(self, messages: list) -> list:
+        """
+        Get model fields values storing content of every message.
+
+        If ``DMM_DEDUPLICATE_BODIES`` is True, content is stored in ``MessageBody`` shared by all messages with the same
+        subject, text and extra, and message itself has empty text. Bodies of all messages are found (or created) with
+        constant number of queries.
+        """
+        if not settings.DMM_DEDUPLICATE_BODIES:
+            return [{"text": message.text, "subject": message.subject, "extra": message.extra} for message in messages]
+        if not messages:
+            return []
+        bodies = self.BODY_MODEL.objects.get_for_contents([(message.subject, message.text, message.extra)
+                                                           for message in messages])
+        return [{"text": "", "body": body} for body in bodies]
+
+    @staticmethod
+    def _bulk_link(through, target_field: str, message_pk, target_pks: Iterable) -> int:
+        """
+        Insert links between message and targets (users or groups) into m2m ``through`` model in batches.
+
+        Duplicated pks are skipped: with ``ignore_conflicts`` if database supports it, otherwise existing links of
+        every batch are selected and filtered out first. Returns number of processed links
+        """
+        connection = connections[router.db_for_write(through)]
+        # supports_ignore_conflicts is missing before Django 2.2
+        ignore_conflicts = getattr(connection.features, "supports_ignore_conflicts", False)
+        linked = 0
+        for chunk in chunked(target_pks, settings.DMM_BULK_BATCH_SIZE):
+            linked += len(chunk)
+            chunk = dict.fromkeys(chunk)
+            if ignore_conflicts:
+                through.objects.bulk_create([through(**{"message_id": message_pk, target_field: target_pk})
+                                             for target_pk in chunk], ignore_conflicts=True)
+                continue
+            existing = set(through.objects.filter(**{"message_id": message_pk, target_field + "__in": list(chunk)})
+                           .values_list(target_field, flat=True))
+            through.objects.bulk_create([through(**{"message_id": message_pk, target_field: target_pk})
+                                         for target_pk in chunk if target_pk not in existing])
+        return linked
+
     def _get_message(self, message_pk):
         if message_pk is not None:
             try:
@@ -98,30 +362,83 @@ class DatabaseStorage(BaseMessageStorage):
         else:
             return None
 
-    def _stored_to_message(self, stored) -> Union[StoredMessage, None]:
+    def _stored_to_message(self, stored, depth: int = 0) -> Union[StoredMessage, None]:
         """
         Convert message from internal storage representation to StoredMessage instance
+
+        ``author``, ``reply_to`` and ``replies`` are materialized on first access. ``reply_to`` chain is converted up
+        to ``DMM_REPLY_TO_DEPTH`` levels (all levels if setting is None), deeper messages are available only by
+        ``reply_to_pk``. Annotated replies count is used if it is present. Deferred ``text`` and ``extra`` are
+        materialized on first access too. If message has shared body, content is taken from it.
         """
         if stored is not None:
+            if stored.body_id is not None:
+                content = stored.body
+                deferred_fields = ()
+            else:
+                content = stored
+                deferred_fields = stored.get_deferred_fields() if settings.DMM_DEFER_MESSAGE_FIELDS else ()
+            text = Deferred(getattr, content, "text") if "text" in deferred_fields else content.text
+            extra = Deferred(getattr, content, "extra") if "extra" in deferred_fields else content.extra
+            if settings.DMM_REPLY_TO_DEPTH is None or depth < settings.DMM_REPLY_TO_DEPTH:
+                reply_to = Deferred(self._reply_to_to_message, stored, depth + 1)
+            else:
+                reply_to = None
+            if hasattr(stored, "dmm_replies_count"):
+                replies_count = partial(int, stored.dmm_replies_count)
+            else:
+                replies_count = partial(self._count_replies, stored)
             return StoredMessage(
                 stored.level,
-                stored.text,
-                stored.subject,
+                text,
+                content.subject,
                 # raw_text=stored.raw_text,
-                stored.extra,
+                extra,
                 stored.html_safe,
-                author=stored.author,
+                author=Deferred(getattr, stored, "author"),
                 user_generated=stored.user_generated,
-                reply_to=self._stored_to_message(stored.reply_to),
+                reply_to=reply_to,
+                reply_to_pk=stored.reply_to_id,
                 pk=stored.pk,
                 created=stored.created,
                 modified=stored.modified,
-                replies=MessageIterator(stored.replies.all(), self._stored_to_message),
-                replies_count=stored.replies.all().count
+                replies=Deferred(self._replies_to_messages, stored),
+                replies_count=replies_count
             )
         else:
             return None
 
+    def _reply_to_to_message(self, stored, depth: int) -> Union[StoredMessage, None]:
+        return self._stored_to_message(stored.reply_to, depth)
+
+    def _replies_to_messages(self, stored) -> MessageIterator:
+        return MessageIterator(stored.replies.all(), self._stored_to_message)
+
+    @staticmethod
+    def _count_replies(stored) -> int:
+        return stored.replies.all().count()
+
+    def _mark_read_bulk(self, messages: Iterable):
+        self.MESSAGE_MODEL.mark_read_bulk(self.user, self._get_pks(messages))
+
+    def _mark_unread_bulk(self, messages: Iterable):
+        self.MESSAGE_MODEL.mark_unread_bulk(self.user, self._get_pks(messages))
+
+    def _archive_bulk(self, messages: Iterable):
+        self.MESSAGE_MODEL.archive_bulk(self.user, self._get_pks(messages))
+
+    def _unarchive_bulk(self, messages: Iterable):
+        self.MESSAGE_MODEL.unarchive_bulk(self.user, self._get_pks(messages))
+
+    @staticmethod
+    def _get_pks(messages: Iterable) -> Iterable:
+        """
+        Get pks of messages from MessageIterator queryset with one query without fetching and converting messages
+        """
+        if isinstance(messages, MessageIterator) and isinstance(messages.stored_messages, QuerySet):
+            return messages.stored_messages.order_by().prefetch_related(None).values_list("pk", flat=True)
+        return BaseMessageStorage._get_pks(messages)
+
     def _mark_read(self, message_pk):
         message = self._get_message(message_pk)
         message.mark_read(self.user)
@@ -140,7 +457,7 @@ class DatabaseStorage(BaseMessageStorage):
 
     def _get_sent_messages(self) -> Iterable:
         if self.user:
-            return self.user.outbox.all()
+            return self._prepare_messages(self.user.outbox.all())
         else:
             return []
 
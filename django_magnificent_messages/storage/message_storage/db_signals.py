@@ -1,7 +1,12 @@
 from django.dispatch import Signal
 
 message_sent = Signal(providing_args=["message"])
+messages_bulk_sent = Signal(providing_args=["message_pks"])
 message_read = Signal(providing_args=["message", "user"])
 message_unread = Signal(providing_args=["message", "user"])
 message_archived = Signal(providing_args=["message", "user"])
 message_unarchived = Signal(providing_args=["message", "user"])
+messages_bulk_read = Signal(providing_args=["message_pks", "user"])
+messages_bulk_unread = Signal(providing_args=["message_pks", "user"])
+messages_bulk_archived = Signal(providing_args=["message_pks", "user"])
+messages_bulk_unarchived = Signal(providing_args=["message_pks", "user"])
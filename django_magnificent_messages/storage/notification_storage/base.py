@@ -9,6 +9,10 @@ class BaseNotificationStorage(BaseStorage):
     subclassed and the two methods ``_get`` and ``_store`` overridden.
     """
 
+    # Maximal size of stored data or ``None`` if storage is not size limited.
+    # Size limited storages must implement ``_store_not_finished``
+    max_store_size = None
+
     def __init__(self, request, *args, **kwargs):
         super(BaseNotificationStorage, self).__init__(request, *args, **kwargs)
         self.used = False
@@ -16,7 +20,18 @@ class BaseNotificationStorage(BaseStorage):
         self.added_new = False
 
     def __len__(self):
-        return len(self._loaded) + len(self._queued)
+        if hasattr(self, '_loaded_data'):
+            return len(self._loaded_data) + len(self._queued)
+        if not hasattr(self, '_stored_count'):
+            self._stored_count = self._peek()[0]
+        return self._stored_count + len(self._queued)
+
+    def has_notifications(self) -> bool:
+        """
+        Return whether there are any notifications. Stored notifications are not
+        loaded if storage can count them cheaply (see ``_peek``).
+        """
+        return bool(self._queued) or len(self) > 0
 
     def _get_iterator(self):
         if self._queued:
@@ -54,6 +69,18 @@ class BaseNotificationStorage(BaseStorage):
         """
         raise NotImplementedError('subclasses of BaseNotificationStorage must provide a _get() method')
 
+    def _peek(self):
+        """
+        Return number of stored notifications and flag indicating whether all the
+        notifications originally intended to be stored in this storage were stored,
+        e.g., ``(count, all_retrieved)``.
+
+        Storages which can count notifications without decoding them should
+        override this method. Default implementation retrieves notifications.
+        """
+        notifications, all_retrieved = self._get()
+        return len(notifications or []), all_retrieved
+
     def _store(self, notifications, response, *args, **kwargs):
         """
         Store a list of notifications and return a list of any notifications which could
@@ -65,6 +92,14 @@ class BaseNotificationStorage(BaseStorage):
         """
         raise NotImplementedError('subclasses of BaseNotificationStorage must provide a _store() method')
 
+    def _store_not_finished(self, response):
+        """
+        Store only a mark that notifications are stored in next storages. Used
+        by ``FallbackStorage`` to route notifications too large for this storage.
+        """
+        raise NotImplementedError('size limited subclasses of BaseNotificationStorage must provide a '
+                                  '_store_not_finished() method')
+
     def update(self, response):
         """
         Store all unread notifications.
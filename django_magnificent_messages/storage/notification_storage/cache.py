@@ -0,0 +1,108 @@
+import json
+
+from django.core.cache import caches
+
+from django_magnificent_messages.conf import settings
+from django_magnificent_messages.storage.notification_storage.base import BaseNotificationStorage
+from .cookie import NotificationDecoder, NotificationsEncoder
+
+
+class CacheStorage(BaseNotificationStorage):
+    """
+    Store notifications in Django cache (``DMM_NOTIFICATION_CACHE_ALIAS``) for
+    ``DMM_NOTIFICATION_CACHE_TIMEOUT`` seconds.
+
+    Notifications are keyed by session key, so like with session and cookie
+    storages every browser has its own notifications. Session is saved only
+    once, if it does not have session key yet. Requests without session are
+    keyed by user id if user is authenticated, otherwise their notifications
+    are returned as unstored. Session backends without stable server-side keys
+    (e.g. signed cookies) are not supported.
+
+    Cache is written only if new notifications were added or stored ones were
+    consumed, or if session key was changed during request (e.g. cycled on
+    login), so stored notifications have to be moved to the new key.
+    """
+    key_prefix = 'dmm:notifications'
+
+    def __init__(self, request, *args, **kwargs):
+        super().__init__(request, *args, **kwargs)
+        self._cache = caches[settings.DMM_NOTIFICATION_CACHE_ALIAS]
+        # Unknown until notifications are retrieved
+        self._stored = True
+        # Key of stored notifications, current key may change during request
+        self._stored_key = self._get_cache_key()
+
+    def _get_cache_key(self, create_session=False):
+        session = getattr(self.request, 'session', None)
+        if session is not None:
+            # Sessions without server-side keys are not supported
+            if getattr(session, 'session_key', None) is None and create_session and hasattr(session, 'create'):
+                session.create()
+            if getattr(session, 'session_key', None) is not None:
+                return '%s:session:%s' % (self.key_prefix, session.session_key)
+            return None
+        user = getattr(self.request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return '%s:user:%s' % (self.key_prefix, user.pk)
+        return None
+
+    def _get(self, *args, **kwargs):
+        """
+        Retrieve a list of notifications from cache. This notification storage
+        always stores everything it is given, so return True for the
+        all_retrieved flag.
+        """
+        if self._stored_key is None:
+            self._stored_key = self._get_cache_key()
+        key = self._stored_key
+        data = self._cache.get(key) if key is not None else None
+        self._stored = data is not None
+        return self.deserialize_notifications(data), True
+
+    def _store(self, notifications, response, *args, **kwargs):
+        """
+        Store a list of notifications to cache and return notifications which
+        could not be stored because there is no key for current request.
+        """
+        if notifications:
+            key = self._get_cache_key(create_session=True)
+            if key is None:
+                return notifications
+            self._cache.set(key, self.serialize_notifications(notifications),
+                            settings.DMM_NOTIFICATION_CACHE_TIMEOUT)
+            if self._stored and self._stored_key not in (None, key):
+                self._cache.delete(self._stored_key)
+            self._stored = True
+            self._stored_key = key
+        elif self._stored:
+            if self._stored_key is not None:
+                self._cache.delete(self._stored_key)
+            self._stored = False
+        return []
+
+    def update(self, response):
+        """
+        Store notifications and move ones, which were not retrieved, to new
+        key if session key was changed during request.
+        """
+        unstored = super().update(response)
+        key = self._get_cache_key()
+        if self._stored and key is not None and self._stored_key not in (None, key):
+            data = self._cache.get(self._stored_key)
+            if data is not None:
+                self._cache.set(key, data, settings.DMM_NOTIFICATION_CACHE_TIMEOUT)
+                self._cache.delete(self._stored_key)
+            self._stored_key = key
+        return unstored
+
+    @staticmethod
+    def serialize_notifications(notifications):
+        encoder = NotificationsEncoder(separators=(',', ':'))
+        return encoder.encode(notifications)
+
+    @staticmethod
+    def deserialize_notifications(data):
+        if data and isinstance(data, str):
+            return json.loads(data, cls=NotificationDecoder)
+        return data
@@ -1,4 +1,7 @@
+import base64
+import binascii
 import json
+import zlib
 
 from django import VERSION
 from django.conf import settings
@@ -9,6 +12,8 @@ from django.http import SimpleCookie
 from django.utils.crypto import constant_time_compare, salted_hmac
 from django.utils.safestring import SafeData, mark_safe
 
+from django_magnificent_messages import constants
+
 
 class NotificationsEncoder(json.JSONEncoder):
     """
@@ -47,6 +52,100 @@ class NotificationDecoder(json.JSONDecoder):
         return self.process_notifications(decoded)
 
 
+class CompactNotificationsCodec:
+    """
+    Encode list of notifications into compact cookie-safe string and back.
+
+    Every ``Message`` becomes marker-free array ``[level_code, text, subject, extra]`` (trailing ``None`` values are
+    omitted). Level code of default levels is ``level // 10``, negative if text is safe; other levels are encoded as
+    ``[level]`` or ``[level, 1]`` if text is safe. String items are stored as is and ``not_finished`` sentinel is
+    encoded as ``0``.
+
+    JSON is base64url-encoded, so ``SimpleCookie`` does not need to quote and escape it. If zlib compressed JSON is
+    shorter, it is used instead and marked with leading ``.``.
+    """
+    not_finished_code = 0
+
+    def __init__(self, not_finished):
+        self.not_finished = not_finished
+
+    @staticmethod
+    def can_encode(notifications) -> bool:
+        return isinstance(notifications, list) and all(isinstance(item, (Message, str)) for item in notifications)
+
+    @staticmethod
+    def _b64encode(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+    @staticmethod
+    def _b64decode(data: str) -> bytes:
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+    @staticmethod
+    def _level_code(level, safe):
+        if level in constants.DEFAULT_LEVELS.values():
+            return -(level // 10) if safe else level // 10
+        return [level, 1] if safe else [level]
+
+    @staticmethod
+    def _parse_level_code(code):
+        if isinstance(code, list):
+            return code[0], len(code) > 1
+        return abs(code) * 10, code < 0
+
+    def encode_item(self, item):
+        if item == self.not_finished:
+            return self.not_finished_code
+        if isinstance(item, Message):
+            encoded = [self._level_code(item.level, isinstance(item.text, SafeData)), item.text, item.subject,
+                       item.extra]
+            while encoded[-1] is None:
+                encoded.pop()
+            return encoded
+        return item
+
+    def decode_item(self, item):
+        if item == self.not_finished_code:
+            return self.not_finished
+        if isinstance(item, list):
+            level, safe = self._parse_level_code(item[0])
+            text = item[1]
+            return Message(level, mark_safe(text) if safe else text, *item[2:])
+        return item
+
+    def dump_item(self, item) -> str:
+        """
+        Return JSON of single encoded item. Items dumped once can be packed in any combination with ``pack``
+        """
+        return json.dumps(self.encode_item(item), separators=(',', ':'))
+
+    def pack(self, dumped_items) -> str:
+        """
+        Return payload for list of items dumped with ``dump_item``
+        """
+        value = ('[%s]' % ','.join(dumped_items)).encode()
+        compressed = zlib.compress(value, 9)
+        if len(compressed) < len(value):
+            return "." + self._b64encode(compressed)
+        return self._b64encode(value)
+
+    def dumps(self, notifications) -> str:
+        return self.pack([self.dump_item(item) for item in notifications])
+
+    def loads(self, payload: str):
+        """
+        Decode payload produced by ``dumps``. Raise ``ValueError`` if payload is malformed.
+        """
+        try:
+            if payload.startswith("."):
+                value = zlib.decompress(self._b64decode(payload[1:]))
+            else:
+                value = self._b64decode(payload)
+        except (binascii.Error, zlib.error) as e:
+            raise ValueError(str(e))
+        return [self.decode_item(item) for item in json.loads(value.decode())]
+
+
 class CookieStorage(BaseNotificationStorage):
     """
     Store messages in a cookie.
@@ -57,6 +156,12 @@ class CookieStorage(BaseNotificationStorage):
     # restrict the session cookie to 1/2 of 4kb. See #18781.
     max_cookie_size = 2048
     not_finished = '__notificationsnotfinished__'
+    # Prefix of compact cookie format. Cookies without it are decoded as legacy ``hash$json``
+    version_prefix = '2:'
+
+    @property
+    def max_store_size(self):
+        return self.max_cookie_size or None
 
     def _get(self, *args, **kwargs):
         """
@@ -73,6 +178,33 @@ class CookieStorage(BaseNotificationStorage):
             notifications.pop()
         return notifications, all_retrieved
 
+    def _peek(self):
+        """
+        Read notifications count from signed cookie header without decoding
+        notifications. Cookies without header are decoded.
+        """
+        data = self.request.COOKIES.get(self.cookie_name)
+        if data and data.startswith(self.version_prefix):
+            bits = self._split_compact(data)
+            if bits:
+                header, signature, value = bits
+                if constant_time_compare(signature, self._signature('%s:%s' % (header, value))):
+                    try:
+                        return int(header.rstrip('+')), not header.endswith('+')
+                    except ValueError:
+                        pass
+        return super()._peek()
+
+    def _split_compact(self, data):
+        """
+        Split compact cookie value into header, signature and payload. Return
+        ``None`` if value is malformed.
+        """
+        bits = data[len(self.version_prefix):].split(':')
+        if len(bits) == 3:
+            return bits
+        return None
+
     def _update_cookie(self, encoded_data, response):
         """
         Either set the cookie with the encoded data if there is any data to
@@ -111,21 +243,53 @@ class CookieStorage(BaseNotificationStorage):
         if self.max_cookie_size:
             # data is going to be stored eventually by SimpleCookie, which
             # adds its own overhead, which we must account for.
-            cookie = SimpleCookie()  # create outside the loop
+            cookie = SimpleCookie()
 
             def stored_length(val):
                 return len(cookie.value_encode(val)[1])
 
-            while encoded_data and stored_length(encoded_data) > self.max_cookie_size:
+            if encoded_data and stored_length(encoded_data) > self.max_cookie_size:
+                kept_count = self._fit_count(notifications, remove_oldest, stored_length)
                 if remove_oldest:
-                    unstored_notifications.append(notifications.pop(0))
+                    split = len(notifications) - kept_count
+                    unstored_notifications, notifications = notifications[:split], notifications[split:]
                 else:
-                    unstored_notifications.insert(0, notifications.pop())
-                encoded_data = self._encode(notifications + [self.not_finished],
-                                            encode_empty=bool(unstored_notifications))
+                    notifications, unstored_notifications = notifications[:kept_count], notifications[kept_count:]
+                encoded_data = self._encode(notifications + [self.not_finished], encode_empty=True)
         self._update_cookie(encoded_data, response)
         return unstored_notifications
 
+    def _store_not_finished(self, response):
+        self._update_cookie(self._encode([self.not_finished], encode_empty=True), response)
+
+    def _fit_count(self, notifications, remove_oldest, stored_length):
+        """
+        Return the largest number of notifications (newest ones if ``remove_oldest``,
+        oldest ones otherwise) which fit into the cookie together with the
+        not_finished sentinel.
+
+        Every notification is dumped to JSON once and the number is found by
+        binary search, so only O(log n) payloads are packed and signed.
+        """
+        codec = CompactNotificationsCodec(self.not_finished)
+        dumped = [codec.dump_item(notification) for notification in notifications]
+        sentinel = codec.dump_item(self.not_finished)
+
+        def fits(count):
+            kept = dumped[len(dumped) - count:] if remove_oldest else dumped[:count]
+            encoded = self._pack(codec.pack(kept + [sentinel]), count, False)
+            return stored_length(encoded) <= self.max_cookie_size
+
+        # All notifications do not fit, otherwise _store would not get here
+        low, high = 0, len(dumped) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if fits(middle):
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
     @staticmethod
     def _hash(value):
         """
@@ -135,15 +299,41 @@ class CookieStorage(BaseNotificationStorage):
         key_salt = 'django_magnificent_messages'
         return salted_hmac(key_salt, value).hexdigest()
 
+    @staticmethod
+    def _signature(value):
+        """
+        Same HMAC as ``_hash``, but base64url-encoded to save cookie space
+        """
+        key_salt = 'django_magnificent_messages'
+        return CompactNotificationsCodec._b64encode(salted_hmac(key_salt, value).digest())
+
+    def _pack(self, value, count, all_stored):
+        """
+        Return compact cookie value for payload of ``count`` notifications.
+
+        Count header (followed by ``+`` if not_finished sentinel was stored) is
+        signed together with payload, so ``_peek`` reads it without decoding.
+        """
+        header = '%d%s' % (count, '' if all_stored else '+')
+        return '%s%s:%s:%s' % (self.version_prefix, header, self._signature('%s:%s' % (header, value)), value)
+
     def _encode(self, notifications, encode_empty=False):
         """
         Return an encoded version of the notifications list which can be stored as
         plain text.
 
+        Lists of notifications are encoded in compact format
+        (``2:<count>:<signature>:<payload>``, see ``CompactNotificationsCodec``
+        and ``_pack``), other data falls back to legacy ``<hash>$<json>`` format.
+
         Since the data will be retrieved from the client-side, the encoded data
         also contains a hash to ensure that the data was not tampered with.
         """
         if notifications or encode_empty:
+            if CompactNotificationsCodec.can_encode(notifications):
+                value = CompactNotificationsCodec(self.not_finished).dumps(notifications)
+                all_stored = not (notifications and notifications[-1] == self.not_finished)
+                return self._pack(value, len(notifications) - (0 if all_stored else 1), all_stored)
             encoder = NotificationsEncoder(separators=(',', ':'))
             value = encoder.encode(notifications)
             return '%s$%s' % (self._hash(value), value)
@@ -157,6 +347,17 @@ class CookieStorage(BaseNotificationStorage):
         """
         if not data:
             return None
+        if data.startswith(self.version_prefix):
+            bits = self._split_compact(data)
+            if bits:
+                header, signature, value = bits
+                if constant_time_compare(signature, self._signature('%s:%s' % (header, value))):
+                    try:
+                        return CompactNotificationsCodec(self.not_finished).loads(value)
+                    except (ValueError, IndexError, TypeError):
+                        pass
+            self.used = True
+            return None
         bits = data.split('$', 1)
         if len(bits) == 2:
             _hash, value = bits
@@ -1,34 +1,85 @@
+from functools import lru_cache
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from django_magnificent_messages.conf import settings
+from django_magnificent_messages.storage.base import Message
 from .base import BaseNotificationStorage
-from .cookie import CookieStorage
-from .session import SessionStorage
+
+
+@lru_cache(maxsize=None)
+def _load_storage_classes(paths):
+    return tuple(import_string(path) for path in paths)
+
+
+@receiver(setting_changed)
+def _reset_storage_classes(setting, **_):
+    if setting == "DMM_FALLBACK_NOTIFICATION_STORAGES":
+        _load_storage_classes.cache_clear()
 
 
 class FallbackStorage(BaseNotificationStorage):
     """
     Try to store all notifications in the first storage. Store any unstored
     messages in each subsequent storages.
+
+    Storages chain is set by ``storage_classes`` attribute or, if it is
+    ``None``, by ``DMM_FALLBACK_NOTIFICATION_STORAGES`` setting. Storages are
+    instantiated on first use, so if first storage contains all notifications
+    (or there are none), other storages are not touched at all.
+
+    Notifications which total text size exceeds ``DMM_NOTIFICATION_ROUTE_SIZE``
+    are not tried in size limited storages (see ``max_store_size``); such
+    storage only stores a mark that notifications are stored further.
     """
-    storage_classes = (CookieStorage, SessionStorage)
+    storage_classes = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.storages = [storage_class(*args, **kwargs)
-                         for storage_class in self.storage_classes]
+        self._storage_args = args
+        self._storage_kwargs = kwargs
+        self._storage_classes = self.get_storage_classes()
+        self._storage_instances = [None] * len(self._storage_classes)
         self._used_storages = set()
 
+    def get_storage_classes(self):
+        if self.storage_classes is not None:
+            return self.storage_classes
+        return _load_storage_classes(tuple(settings.DMM_FALLBACK_NOTIFICATION_STORAGES))
+
+    def _get_storage(self, index):
+        storage = self._storage_instances[index]
+        if storage is None:
+            storage = self._storage_classes[index](*self._storage_args, **self._storage_kwargs)
+            self._storage_instances[index] = storage
+        return storage
+
+    def _iter_storages(self):
+        for index in range(len(self._storage_instances)):
+            yield self._get_storage(index)
+
+    @property
+    def storages(self):
+        """
+        All storages of chain. Instantiates storages, which were not used yet
+        """
+        return list(self._iter_storages())
+
     def _get(self, *args, **kwargs):
         """
         Get a single list of notifications from all notification storages.
         """
         all_notifications = []
         all_retrieved = False
-        for storage in self.storages:
+        for index, storage in enumerate(self._iter_storages()):
             notifications, all_retrieved = storage._get()
             # If the backend hasn't been used, no more retrieval is necessary.
             if notifications is None:
                 break
-            if notifications:
-                self._used_storages.add(storage)
+            if notifications or not all_retrieved:
+                self._used_storages.add(index)
             all_notifications.extend(notifications)
             # If this notification_storage class contained all the messages, no further
             # retrieval is necessary
@@ -36,6 +87,32 @@ class FallbackStorage(BaseNotificationStorage):
                 break
         return all_notifications, all_retrieved
 
+    def _peek(self):
+        """
+        Count notifications in all notification storages.
+        """
+        count = 0
+        all_retrieved = False
+        for storage in self._iter_storages():
+            stored_count, all_retrieved = storage._peek()
+            count += stored_count
+            if all_retrieved:
+                break
+        return count, all_retrieved
+
+    @staticmethod
+    def _estimate_size(notifications):
+        """
+        Return cheap estimate of notifications size: total length of their texts
+        """
+        size = 0
+        for notification in notifications:
+            if isinstance(notification, Message):
+                size += len(notification.text) + len(notification.subject or '') + len(str(notification.extra or ''))
+            else:
+                size += len(str(notification))
+        return size
+
     def _store(self, notifications, response, *args, **kwargs):
         """
         Store the notifications and return any unstored notifications after trying all
@@ -44,12 +121,18 @@ class FallbackStorage(BaseNotificationStorage):
         For each notification storage, any notifications not stored are passed on to the
         next backend.
         """
-        for storage in self.storages:
+        last_index = len(self._storage_instances) - 1
+        route = notifications and self._estimate_size(notifications) > settings.DMM_NOTIFICATION_ROUTE_SIZE
+        for index in range(last_index + 1):
             if notifications:
+                storage = self._get_storage(index)
+                if route and storage.max_store_size is not None and index < last_index:
+                    storage._store_not_finished(response)
+                    continue
                 notifications = storage._store(notifications, response, remove_oldest=False)
             # Even if there are no more messages, continue iterating to ensure
             # storages which contained messages are flushed.
-            elif storage in self._used_storages:
-                storage._store([], response)
-                self._used_storages.remove(storage)
+            elif index in self._used_storages:
+                self._get_storage(index)._store([], response)
+                self._used_storages.remove(index)
         return notifications
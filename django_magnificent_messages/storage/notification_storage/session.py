@@ -1,4 +1,5 @@
 import json
+import threading
 
 from django.conf import settings
 from .cookie import (
@@ -11,8 +12,15 @@ from django_magnificent_messages.storage.notification_storage.base import BaseNo
 class SessionStorage(BaseNotificationStorage):
     """
     Store notifications in the session (that is, django.contrib.sessions).
+
+    Session is modified only if stored notifications are changed, so session
+    backend does not save it on requests that only read notifications state.
+    Number of such avoided writes is counted in ``avoided_writes`` class
+    attribute.
     """
     session_key = '_notifications'
+    avoided_writes = 0
+    _avoided_writes_lock = threading.Lock()
 
     def __init__(self, request, *args, **kwargs):
         if not hasattr(request, 'session'):
@@ -28,18 +36,42 @@ class SessionStorage(BaseNotificationStorage):
         always stores everything it is given, so return True for the
         all_retrieved flag.
         """
-        return self.deserialize_notifications(self.request.session.get(self.session_key)), True
+        data = self.request.session.get(self.session_key)
+        # Serialized notifications are their own fingerprint: equal data means nothing was added or consumed
+        self._loaded_fingerprint = data
+        return self.deserialize_notifications(data), True
+
+    def _peek(self):
+        if self.session_key not in self.request.session:
+            return 0, True
+        return super()._peek()
 
     def _store(self, notifications, response, *args, **kwargs):
         """
         Store a list of notifications to the request's session.
         """
-        if notifications:
-            self.request.session[self.session_key] = self.serialize_notifications(notifications)
+        data = self.serialize_notifications(notifications) if notifications else None
+        if data == self._get_stored_fingerprint():
+            self._count_avoided_write()
+        elif data is not None:
+            self.request.session[self.session_key] = data
         else:
             self.request.session.pop(self.session_key, None)
+        self._loaded_fingerprint = data
         return []
 
+    def _get_stored_fingerprint(self):
+        try:
+            return self._loaded_fingerprint
+        except AttributeError:
+            # Notifications were not retrieved by this storage
+            return self.request.session.get(self.session_key)
+
+    @classmethod
+    def _count_avoided_write(cls):
+        with cls._avoided_writes_lock:
+            cls.avoided_writes += 1
+
     @staticmethod
     def serialize_notifications(notifications):
         encoder = NotificationsEncoder(separators=(',', ':'))
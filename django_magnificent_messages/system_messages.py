@@ -7,7 +7,7 @@ from .backend import MessageBackend
 from . import constants
 
 __all__ = (
-    'add', 'secondary', 'primary', 'info', 'success', 'warning', 'error',
+    'add', 'secondary', 'primary', 'info', 'success', 'warning', 'error', 'broadcast',
 )
 
 
@@ -123,3 +123,37 @@ def error(request: HttpRequest,
     """Add a message with the ``ERROR`` level."""
     add(request, constants.ERROR, text, subject, extra, to_users_pk, to_groups_pk, fail_silently, html_safe,
         reply_to_pk)
+
+
+def broadcast(request: HttpRequest,
+              level: int = constants.SECONDARY,
+              text: str = None,
+              subject: str = None,
+              extra: object = None,
+              to_users_pk: Iterable = tuple(),
+              to_groups_pk: Iterable = tuple(),
+              fail_silently: bool = False,
+              html_safe: bool = False,
+              reply_to_pk=None) -> None:
+    """
+    Attempt to send a system message to large number of recipients using the 'django_magnificent_messages' app.
+
+    ``to_users_pk`` and ``to_groups_pk`` may be generators or queryset iterators, they are consumed in batches of
+    ``DMM_BULK_BATCH_SIZE`` pks.
+    """
+    try:
+        backend = request.dmm_backend  # type: MessageBackend
+    except AttributeError:
+        if not isinstance(request, HttpRequest):
+            raise TypeError(
+                "broadcast() argument must be an HttpRequest object, not "
+                "'%s'." % request.__class__.__name__
+            )
+        if not fail_silently:
+            raise MessageFailure(
+                'You cannot add messages without installing '
+                'django_magnificent_messages.middleware.MessageMiddleware'
+            )
+    else:
+        return backend.broadcast_message(level, text, subject, extra, to_users_pk, to_groups_pk, False, html_safe,
+                                         reply_to_pk)
@@ -0,0 +1,30 @@
+"""
+Helpers for django-magnificent-messages
+"""
+from itertools import islice
+from typing import Awaitable, Callable, Iterable, Iterator
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    """
+    Split iterable into lists of ``size`` items (last one may be shorter) without materializing whole iterable
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_sync(func: Callable, *args, **kwargs) -> Awaitable:
+    """
+    Call sync function (e.g. one using Django ORM) from async code.
+
+    Function runs in the thread shared by all thread sensitive sync code of request, so database connections and
+    other thread-bound state are reused instead of opened in new thread for every call.
+
+    ``asgiref`` is imported here, so this module is importable with Django versions, which do not ship it
+    """
+    from asgiref.sync import sync_to_async
+    return sync_to_async(func, thread_sensitive=True)(*args, **kwargs)
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings, SimpleTestCase
+
+from django_magnificent_messages import fields
+from django_magnificent_messages.fields import COMPRESSED_MARKER, compress_text, decompress_text
+
+
+@override_settings(DMM_COMPRESS_MESSAGES=True, DMM_COMPRESSION_THRESHOLD=10)
+class TestCompression(SimpleTestCase):
+    def test_roundtrip(self):
+        value = "Ünicode text " * 10
+        compressed = compress_text(value)
+        self.assertTrue(compressed.startswith(COMPRESSED_MARKER + fields.ZLIB_CODE))
+        self.assertEqual(value, decompress_text(compressed))
+
+    def test_not_compressed(self):
+        self.assertEqual("Short", compress_text("Short"))
+        # Incompressible value is left as is
+        self.assertEqual("0123456789abcdef", compress_text("0123456789abcdef"))
+        with override_settings(DMM_COMPRESS_MESSAGES=False):
+            self.assertEqual("Long text " * 10, compress_text("Long text " * 10))
+
+    @override_settings(DMM_COMPRESSION_METHOD="zstd")
+    def test_zstd_not_installed(self):
+        with mock.patch.object(fields, "zstandard", None):
+            compressed = compress_text("Long text " * 10)
+            self.assertTrue(compressed.startswith(COMPRESSED_MARKER + fields.ZLIB_CODE))
+            with self.assertRaises(ImproperlyConfigured):
+                decompress_text(COMPRESSED_MARKER + fields.ZSTD_CODE + compressed[2:])
+
+    def test_marker_roundtrip(self):
+        """Plain values starting with marker should be escaped, whether compression is enabled or not"""
+        for value in (COMPRESSED_MARKER + "hello world", COMPRESSED_MARKER + fields.ZLIB_CODE, COMPRESSED_MARKER):
+            self.assertEqual(value, decompress_text(compress_text(value)))
+            with override_settings(DMM_COMPRESS_MESSAGES=False):
+                self.assertEqual(COMPRESSED_MARKER + fields.RAW_CODE + value, compress_text(value))
+                self.assertEqual(value, decompress_text(compress_text(value)))
+
+    def test_legacy_marker_values(self):
+        """Values with marker stored before escaping should be read as is"""
+        for value in (COMPRESSED_MARKER + "hello world", COMPRESSED_MARKER + fields.ZLIB_CODE + "not base64!",
+                      COMPRESSED_MARKER + fields.ZLIB_CODE + "aGVsbG8="):
+            self.assertEqual(value, decompress_text(value))
@@ -2,14 +2,15 @@
 Tests for `django-magnificent-messages` models module.
 """
 import datetime
+import math
 
 from django.core import checks, serializers
 from django.core.exceptions import ValidationError
 from django.core.serializers.base import DeserializationError
 from django.db import connection
-from django.test import TestCase
+from django.test import override_settings, TestCase
 
-from django_magnificent_messages.fields import JSONField
+from django_magnificent_messages.fields import JSONField, LazyJSON, OrjsonJSONCodec, StdlibJSONCodec
 from tests import models
 
 
@@ -121,3 +122,64 @@ class TestJsonField(TestCase):
             for deserialized_object in serializers.deserialize("json", data):
                 deserialized_object.save()
 
+
+    def test_codecs(self):
+        value = {"b": [1, 2.5, None], "a": "Ünicode"}
+        for codec in (StdlibJSONCodec, OrjsonJSONCodec):
+            with self.subTest(codec=codec.__name__):
+                self.assertEqual(value, codec.loads(codec.dumps(value)))
+                self.assertTrue(codec.dumps(value).startswith('{"a":'))
+                with self.assertRaises(TypeError):
+                    codec.dumps(datetime.date.today())
+                with self.assertRaises(ValueError):
+                    codec.loads("{{")
+
+    def test_orjson_codec_fallback(self):
+        """JSON rejected by orjson is decoded by standard json module"""
+        self.assertTrue(math.isnan(OrjsonJSONCodec.loads("[NaN]")[0]))
+
+    @override_settings(DMM_JSON_CODEC="django_magnificent_messages.fields.OrjsonJSONCodec")
+    def test_codec_setting(self):
+        models.JSONFieldDefaultModel.objects.create(id=1, field={"b": 1, "a": [1, 2]})
+        self.assertEqual({"b": 1, "a": [1, 2]}, models.JSONFieldDefaultModel.objects.get(id=1).field)
+        with self.assertRaises(ValidationError):
+            self._test_default(datetime.date.today())
+
+    def test_native(self):
+        field = JSONField(native=True)
+        self.assertIs(True, field.deconstruct()[3]["native"])
+        self.assertNotIn("native", JSONField().deconstruct()[3])
+        if getattr(connection.features, "supports_json_field", False):
+            self.assertEqual(connection.data_types["JSONField"], field.db_type(connection))
+        self.assertEqual("text", JSONField(native=False).db_type(connection))
+        model_field = models.JSONFieldDefaultModel._meta.get_field("field")
+        self.assertEqual("text", model_field.db_type(connection))
+        with override_settings(DMM_NATIVE_JSON_FIELD=True):
+            self.assertEqual(field.db_type(connection), model_field.db_type(connection))
+            if getattr(connection.features, "supports_json_field", False):
+                self.assertEqual(connection.data_type_check_constraints.get("JSONField") % {"column": "field"},
+                                 model_field.db_check(connection))
+
+    @override_settings(DMM_LAZY_JSON_FIELD=True)
+    def test_lazy(self):
+        models.JSONFieldDefaultModel.objects.create(id=1, field={"aaa": [1, 2]})
+        j = models.JSONFieldDefaultModel.objects.get(id=1)
+        self.assertIsInstance(j.field, LazyJSON)
+        self.assertFalse(j.field.is_decoded)
+        # Not decoded value is saved as is
+        j.save()
+        self.assertFalse(j.field.is_decoded)
+        self.assertEqual({"aaa": [1, 2]}, j.field)
+        self.assertEqual([1, 2], j.field["aaa"])
+        self.assertTrue(j.field.is_decoded)
+        j.field["bbb"] = 1
+        j.save()
+        self.assertEqual({"aaa": [1, 2], "bbb": 1}, models.JSONFieldDefaultModel.objects.get(id=1).field)
+
+    @override_settings(DMM_LAZY_JSON_FIELD=True)
+    def test_lazy_bad_json(self):
+        with connection.cursor() as cursor:
+            cursor.execute("insert into \"default\"(id, field) values (1, '{{');")
+        j = models.JSONFieldDefaultModel.objects.get(id=1)
+        with self.assertRaises(ValidationError):
+            j.field["aaa"]
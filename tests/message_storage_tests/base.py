@@ -1,8 +1,11 @@
 import json
 
 from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage
+from django.db import connection
 from django.db.models import Q
 from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from django_magnificent_messages import constants, models
@@ -391,6 +394,16 @@ class BaseMessageStorageTestCases:
             self.assertEqual(2, self.carol_storage.sent_count)
             self.assertEqual(0, self.anonymous_storage.sent_count)
 
+        def test_counts(self):
+            """
+            Counts should be the same as separate count properties return
+            """
+            self.assertEqual({"all": 2, "read": 1, "unread": 1, "archived": 1, "new": 2}, self.alice_storage.counts)
+            self.assertEqual({"all": 3, "read": 1, "unread": 2, "archived": 1, "new": 3}, self.bob_storage.counts)
+            self.assertEqual({"all": 0, "read": 0, "unread": 0, "archived": 0, "new": 0}, self.carol_storage.counts)
+            self.assertEqual({"all": 0, "read": 0, "unread": 0, "archived": 0, "new": 0},
+                             self.anonymous_storage.counts)
+
         def test_alice_all(self):
             """
             Alice has 2 messages - "Bob message go group1", "Read message".
@@ -630,3 +643,33 @@ class BaseMessageStorageTestCases:
             self.assertIn(self.read_message, list(page_1))
             self.assertIn(self.bob_message_to_group1, list(page_2))
             self.assertIn(self.alice_message_to_bob, list(page_3))
+
+        def test_cursor_pagination(self):
+            p = self.bob_storage.all.cursor_paginate(2)
+
+            with CaptureQueriesContext(connection) as ctx:
+                page_1 = p.get_page()
+            # Only one extra row is fetched, messages are never counted
+            self.assertTrue(ctx.captured_queries[0]["sql"].endswith("LIMIT 3"))
+            self.assertNotIn("COUNT(", " ".join(query["sql"] for query in ctx.captured_queries))
+            self.assertEqual([self.read_message.pk, self.bob_message_to_group1.pk], [m.pk for m in page_1])
+            self.assertTrue(page_1.has_next())
+            self.assertFalse(page_1.has_previous())
+            self.assertIsNone(page_1.previous_cursor)
+
+            page_2 = p.get_page(page_1.next_cursor)
+            self.assertEqual([self.alice_message_to_bob.pk], [m.pk for m in page_2])
+            self.assertFalse(page_2.has_next())
+            self.assertIsNone(page_2.next_cursor)
+
+            page_1 = p.get_page(page_2.previous_cursor)
+            self.assertEqual([self.read_message.pk, self.bob_message_to_group1.pk], [m.pk for m in page_1])
+            self.assertFalse(page_1.has_previous())
+            self.assertTrue(page_1.has_next())
+
+        def test_cursor_pagination_invalid_cursor(self):
+            p = self.bob_storage.all.cursor_paginate(2)
+            with self.assertRaises(InvalidPage):
+                p.get_page("invalid")
+            with self.assertRaises(InvalidPage):
+                p.get_page(p.get_page().next_cursor[:-1])
@@ -0,0 +1,107 @@
+from django.core.cache import caches
+from django.test import override_settings, RequestFactory, SimpleTestCase, TestCase
+
+from django_magnificent_messages import constants
+from django_magnificent_messages.storage.message_storage.counter_cache import get_counter_cache, LocalLRUCache
+from django_magnificent_messages.storage.message_storage.db import DatabaseStorage
+from tests.message_storage_tests.base import TestStoragesMixin
+from tests.utils import TestMessagesMixin
+
+COUNTER_CACHE = "django_magnificent_messages.storage.message_storage.counter_cache.CounterCache"
+
+
+@override_settings(DMM_COUNTER_CACHE=COUNTER_CACHE)
+class CounterCacheTestCase(TestMessagesMixin, TestStoragesMixin, TestCase):
+    """
+    Test messages are created directly with models (without signals), so cache is cleared after that
+    """
+    STORAGE = DatabaseStorage
+
+    def setUp(self) -> None:
+        self.create_test_users()
+        self.create_test_messages()
+        self.rf = RequestFactory()
+        self.create_test_storages()
+        caches["default"].clear()
+        get_counter_cache()._local.clear()
+
+    def test_cached_counts(self):
+        """Counts should be computed once and then served from cache"""
+        self.bob_storage._inbox
+        with self.assertNumQueries(1):
+            self.assertEqual(2, self.bob_storage.unread_count)
+        with self.assertNumQueries(0):
+            self.assertEqual(2, self.bob_storage.unread_count)
+            self.assertEqual(3, self.bob_storage.new_count)
+
+    def test_shared_cache_miss_recompute(self):
+        """If counts expired from shared cache, they should be recomputed"""
+        self.bob_storage.counts
+        caches["default"].clear()
+        get_counter_cache()._local.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(3, self.bob_storage.all_count)
+
+    def test_sent_message_increments(self):
+        self.bob_storage.counts
+        self.alice_storage.counts
+        self.carol_storage.send_message(constants.INFO, "Hi, group1!", to_groups_pk=[self.group1.pk])
+        with self.assertNumQueries(0):
+            self.assertEqual({"all": 4, "read": 1, "unread": 3, "archived": 1, "new": 4}, self.bob_storage.counts)
+            self.assertEqual({"all": 3, "read": 1, "unread": 2, "archived": 1, "new": 3}, self.alice_storage.counts)
+
+    @override_settings(DMM_COUNTER_CACHE_MAX_INCREMENTS=1)
+    def test_sent_to_many_clears(self):
+        """Message sent to more recipients than DMM_COUNTER_CACHE_MAX_INCREMENTS should clear counts"""
+        self.bob_storage.counts
+        self.carol_storage.send_message(constants.INFO, "Hi, group1!", to_groups_pk=[self.group1.pk])
+        self.assertIsNone(get_counter_cache().get(self.bob.pk))
+        self.assertEqual(4, self.bob_storage.all_count)
+
+    def test_evicted_version(self):
+        """Entries of old versions should not be served after version key eviction"""
+        self.bob_storage.counts
+        counter_cache = get_counter_cache()
+        counter_cache.clear()
+        caches["default"].delete(counter_cache.version_key)
+        counter_cache._local.clear()
+        self.assertIsNone(counter_cache.get(self.bob.pk))
+
+    def test_broadcast_clears(self):
+        self.bob_storage.counts
+        self.carol_storage.broadcast_message(constants.INFO, "Broadcast", to_users_pk=iter([self.bob.pk]))
+        self.assertEqual(4, self.bob_storage.all_count)
+
+    def test_read_state_change_invalidates(self):
+        self.bob_storage.counts
+        self.bob_storage.mark_read(self.alice_message_to_bob.pk)
+        self.assertEqual({"all": 3, "read": 2, "unread": 1, "archived": 1, "new": 3}, self.bob_storage.counts)
+        self.bob_storage.archive(self.alice_message_to_bob.pk)
+        self.assertEqual({"all": 2, "read": 1, "unread": 1, "archived": 2, "new": 2}, self.bob_storage.counts)
+
+    def test_bulk_state_change_invalidates(self):
+        self.bob_storage.counts
+        self.bob_storage.mark_read_bulk(self.bob_storage.unread)
+        self.assertEqual(0, self.bob_storage.unread_count)
+
+    def test_update_last_checked_invalidates(self):
+        self.bob_storage.counts
+        self.bob_storage.update_last_checked()
+        self.assertEqual(0, self.bob_storage.new_count)
+
+
+class LocalLRUCacheTestCase(SimpleTestCase):
+    def test_eviction(self):
+        cache = LocalLRUCache(2, 60)
+        cache.set(1, "a")
+        cache.set(2, "b")
+        cache.get(1)
+        cache.set(3, "c")
+        self.assertEqual("a", cache.get(1))
+        self.assertIsNone(cache.get(2))
+        self.assertEqual("c", cache.get(3))
+
+    def test_expiration(self):
+        cache = LocalLRUCache(2, -1)
+        cache.set(1, "a")
+        self.assertIsNone(cache.get(1))
@@ -1,7 +1,22 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+import django
+from django.conf import settings
+from django.core.paginator import EmptyPage
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
 from django.urls import reverse
 
-from django_magnificent_messages.models import MessageNotSentToUserError
+from django_magnificent_messages import constants, MessageBackend
+from django_magnificent_messages.fields import COMPRESSED_MARKER
+from django_magnificent_messages.models import Delivery, Message, MessageBody, MessageNotSentToUserError
+from django_magnificent_messages.storage.message_storage import base
+from django_magnificent_messages.storage.message_storage.base import MessageIterator, MessageNotFoundError
 from django_magnificent_messages.storage.message_storage.db import DatabaseStorage
+from django_magnificent_messages.storage.message_storage.db_signals import message_sent, messages_bulk_sent
 from tests.message_storage_tests.base import BaseMessageStorageTestCases
 
 
@@ -26,6 +41,47 @@ class DatabaseStorageExistingTestCase(BaseMessageStorageTestCases.ExistingMessag
         self.assertEqual([], list(response.context['dmm']["messages"]["unread"]()))
         self.assertEqual([], list(response.context['dmm']["messages"]["archived"]()))
 
+    def test_counts_single_query(self):
+        """All inbox counts should be computed with one query"""
+        self.bob_storage._inbox
+        with self.assertNumQueries(1):
+            self.bob_storage.counts
+
+    def test_backend_counts_single_query(self):
+        """Backend count properties should share one counts query"""
+        r = self.rf.get("/")
+        r.user = self.bob
+        r.session = {}
+        backend = MessageBackend(r)
+        backend._message_storage._inbox
+        with self.assertNumQueries(1):
+            self.assertEqual(3, backend.all_messages_count)
+            self.assertEqual(2, backend.unread_messages_count)
+            self.assertEqual(3, backend.new_messages_count)
+
+    def test_lazy_inbox(self):
+        """Storage should not query database until messages are accessed"""
+        r = self.rf.get("/")
+        r.user = self.bob
+        with self.assertNumQueries(0):
+            storage = DatabaseStorage(r)
+        self.assertEqual(self.bob, storage._inbox.user)
+
+    @override_settings(DMM_INBOX_CACHE_ALIAS="default")
+    def test_cached_inbox(self):
+        """Cached inbox should be resolved without queries and keep last check date"""
+        caches["default"].clear()
+        self.bob_storage.update_last_checked()
+        r = self.rf.get("/")
+        r.user = self.bob
+        storage = DatabaseStorage(r)
+        with self.assertNumQueries(0):
+            inbox = storage._inbox
+        self.assertEqual(self.bob_storage._inbox.pk, inbox.pk)
+        self.assertEqual(self.bob_storage._inbox.last_checked, inbox.last_checked)
+        self.assertEqual(0, storage.new_count)
+        caches["default"].clear()
+
     def test_mark_read_self(self):
         self.bob_storage.mark_read(self.alice_message_to_bob.pk)
         messages = list(self.bob_storage.read)
@@ -90,6 +146,423 @@ class DatabaseStorageExistingTestCase(BaseMessageStorageTestCases.ExistingMessag
                                       "<Message: 4> was not sent to user, who tried to archive it"):
             self.carol_storage.archive(self.archived_message.pk)
 
+    @override_settings(DMM_BULK_BATCH_SIZE=2)
+    def test_broadcast(self):
+        """Broadcast should consume recipients generator in batches and send one bulk signal"""
+        signals = []
+
+        def receiver(**kwargs):
+            signals.append(kwargs["message_pks"])
+
+        messages_bulk_sent.connect(receiver)
+        message_sent.connect(receiver)
+        try:
+            message = self.carol_storage.broadcast_message(constants.INFO, "Broadcast",
+                                                           to_users_pk=(u.pk for u in (self.alice, self.bob,
+                                                                                       self.carol, self.alice)),
+                                                           to_groups_pk=iter([self.group2.pk]))
+        finally:
+            messages_bulk_sent.disconnect(receiver)
+            message_sent.disconnect(receiver)
+        self.assertEqual([[message.pk]], signals)
+        self.assertIsNone(message.author)
+        self.assertFalse(message.user_generated)
+        self.assertEqual(3, Message.objects.get(pk=message.pk).sent_to_users.count())
+        self.assertEqual(4, self.bob_storage.all_count)
+        self.assertEqual(2, self.alice_storage.unread_count)
+
+    def test_broadcast_without_ignore_conflicts(self):
+        """Duplicated recipients should be skipped if database can't ignore conflicts"""
+        with mock.patch.object(connection.features, "supports_ignore_conflicts", False):
+            message = self.carol_storage.broadcast_message(constants.INFO, "Broadcast",
+                                                           to_users_pk=iter([self.bob.pk, self.alice.pk, self.bob.pk]))
+        self.assertEqual({self.alice.pk, self.bob.pk},
+                         set(Message.objects.get(pk=message.pk).sent_to_users.values_list("pk", flat=True)))
+
+    def test_backend_broadcast_returns_message(self):
+        r = self.rf.get("/")
+        r.user = self.carol
+        r.session = {}
+        message = MessageBackend(r).broadcast_message(constants.INFO, "Broadcast", to_users_pk=[self.bob.pk])
+        self.assertEqual("Broadcast", message.text)
+
+    def test_broadcast_no_recipients(self):
+        """Message without recipients should not be saved"""
+        self.assertIsNone(self.carol_storage.broadcast_message(constants.INFO, "Broadcast", to_users_pk=iter([])))
+        self.assertEqual(4, Message.objects.count())
+
+    @override_settings(DMM_BULK_BATCH_SIZE=2)
+    def test_send_messages_bulk(self):
+        """Bulk send should work without request and send one bulk signal per batch"""
+        signals = []
+
+        def receiver(**kwargs):
+            signals.append(kwargs["message_pks"])
+
+        storage = DatabaseStorage(None)
+        specs = (
+            {"level": constants.INFO, "text": "Hi, Alice!", "to_users_pk": [self.alice.pk]},
+            {"level": constants.INFO, "text": "", "to_users_pk": [self.alice.pk]},
+            {"level": constants.INFO, "text": "Hi, group2!", "to_groups_pk": [self.group2.pk],
+             "reply_to_pk": self.read_message.pk},
+            {"level": constants.INFO, "text": "Hi, Bob!", "to_users_pk": iter([self.bob.pk, self.bob.pk])},
+        )
+        messages_bulk_sent.connect(receiver)
+        message_sent.connect(receiver)
+        try:
+            pks = storage.send_messages_bulk(specs)
+        finally:
+            messages_bulk_sent.disconnect(receiver)
+            message_sent.disconnect(receiver)
+        self.assertIsNone(pks[1])
+        self.assertEqual([[pks[0]], [pks[2], pks[3]]], signals)
+        self.assertEqual(["Hi, Alice!", "Hi, group2!", "Hi, Bob!"],
+                         [Message.objects.get(pk=pk).text for pk in (pks[0], pks[2], pks[3])])
+        self.assertEqual(self.read_message.pk, Message.objects.get(pk=pks[2]).reply_to_id)
+        self.assertEqual(5, self.bob_storage.all_count)
+        self.assertEqual(3, self.alice_storage.all_count)
+
+    def test_send_messages_bulk_empty_iterators(self):
+        """Messages with empty recipients iterators should not be saved"""
+        pks = DatabaseStorage(None).send_messages_bulk([
+            {"level": constants.INFO, "text": "Nobody", "to_users_pk": (pk for pk in ()), "to_groups_pk": iter([])},
+            {"level": constants.INFO, "text": "Hi, Bob!", "to_users_pk": (pk for pk in [self.bob.pk])},
+        ])
+        self.assertIsNone(pks[0])
+        self.assertEqual("Hi, Bob!", Message.objects.get(pk=pks[1]).text)
+        self.assertEqual(5, Message.objects.count())
+
+    def test_send_messages_bulk_reply_to_not_found(self):
+        with self.assertRaises(MessageNotFoundError):
+            DatabaseStorage(None).send_messages_bulk([
+                {"level": constants.INFO, "text": "Reply", "to_users_pk": [self.bob.pk], "reply_to_pk": 100}
+            ])
+        self.assertEqual(4, Message.objects.count())
+
+    def test_mark_read_bulk_iterator(self):
+        """Marking all unread messages should take constant number of queries"""
+        self.bob_storage._inbox
+        # Delivery flags are updated with one more statement
+        with self.assertNumQueries(5 if settings.DMM_USE_DELIVERY_TABLE else 4):
+            self.bob_storage.mark_read_bulk(self.bob_storage.unread)
+        self.assertEqual(0, self.bob_storage.unread_count)
+        self.bob_storage.archive_bulk(self.bob_storage.all)
+        self.assertEqual(0, self.bob_storage.all_count)
+        self.assertEqual(4, self.bob_storage.archived_count)
+        self.bob_storage.unarchive_bulk([self.alice_message_to_bob.pk])
+        self.bob_storage.mark_unread_bulk([self.alice_message_to_bob.pk])
+        self.assertEqual(1, self.bob_storage.unread_count)
+
+    def test_mark_read_bulk_other(self):
+        with self.assertRaises(MessageNotSentToUserError):
+            self.carol_storage.mark_read_bulk([self.alice_message_to_bob.pk])
+
+    def _render_bob_messages(self):
+        for message in self.bob_storage.all:
+            message.replies_count()
+            for reply in message.replies:
+                reply.reply_to.text
+            if message.reply_to is not None:
+                message.reply_to.author
+                message.reply_to.reply_to_pk
+
+    @override_settings(DMM_PREFETCH_REPLIES=True, DMM_REPLY_TO_DEPTH=1)
+    def test_prefetch_replies_constant_queries(self):
+        """Converting messages should take same number of queries regardless of replies and reply_to chains"""
+        self.bob_storage._inbox
+        reply_to_pk = self.alice_message_to_bob.pk
+        for i in range(3):
+            reply_to_pk = self.alice_storage.send_message(constants.INFO, "Reply {0}".format(i),
+                                                          to_users_pk=[self.bob.pk], reply_to_pk=reply_to_pk).pk
+        with self.assertNumQueries(6) as ctx:
+            self._render_bob_messages()
+        for i in range(3):
+            reply_to_pk = self.alice_storage.send_message(constants.INFO, "Reply {0}".format(i),
+                                                          to_users_pk=[self.bob.pk], reply_to_pk=reply_to_pk).pk
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self._render_bob_messages()
+        last = self.bob_storage.get_message(reply_to_pk)
+        self.assertEqual(1, next(iter(self.bob_storage.all.filter(pk=last.reply_to_pk))).replies_count())
+
+    @override_settings(DMM_REPLY_TO_DEPTH=1)
+    def test_reply_to_depth(self):
+        first = self.alice_storage.send_message(constants.INFO, "First", to_users_pk=[self.bob.pk])
+        second = self.alice_storage.send_message(constants.INFO, "Second", to_users_pk=[self.bob.pk],
+                                                 reply_to_pk=first.pk)
+        third = self.alice_storage.send_message(constants.INFO, "Third", to_users_pk=[self.bob.pk],
+                                                reply_to_pk=second.pk)
+        message = next(iter(self.bob_storage.all.filter(pk=third.pk)))
+        self.assertEqual("Second", message.reply_to.text)
+        self.assertIsNone(message.reply_to.reply_to)
+        self.assertEqual(first.pk, message.reply_to.reply_to_pk)
+
+    def test_stream(self):
+        """Streamed messages should be fetched by chunks with relations prefetched per chunk"""
+        self.bob_storage._inbox
+        # Messages are read from one cursor, every chunk takes one query for each of four prefetched relations
+        with self.assertNumQueries(9):
+            messages = list(self.bob_storage.all.stream(chunk_size=2))
+            for message in messages:
+                message.text
+        self.assertEqual([m.pk for m in self.bob_storage.all], [m.pk for m in messages])
+
+    def test_lazy_chunks(self):
+        """Lazy iterator should fetch messages by chunks instead of one query per message"""
+        self.bob_storage._inbox
+        messages = MessageIterator(self.bob_storage.all.stored_messages, self.bob_storage._stored_to_message,
+                                   fetch_all=False, chunk_size=2)
+        # Two chunks, every chunk takes one query for messages and one for each of four prefetched relations
+        expected = [m.pk for m in self.bob_storage.all]
+        with self.assertNumQueries(10):
+            self.assertEqual(expected, [m.pk for m in messages])
+        with self.assertNumQueries(5):
+            self.assertEqual(self.read_message.pk, next(iter(messages)).pk)
+
+    @override_settings(DMM_DEFER_MESSAGE_FIELDS=("text", "extra"))
+    def test_deferred_fields(self):
+        """Deferred fields should be loaded on first access for all fetched messages with one query"""
+        self.bob_storage._inbox
+        expected = [(m.text, m.extra) for m in self.bob_storage.all]
+        with self.assertNumQueries(5):
+            messages = list(self.bob_storage.all)
+        with self.assertNumQueries(1):
+            self.assertEqual([text for text, _ in expected], [m.text for m in messages])
+        with self.assertNumQueries(1):
+            self.assertEqual([extra for _, extra in expected], [m.extra for m in messages])
+        with self.assertNumQueries(0):
+            [(m.text, m.extra) for m in messages]
+
+    @override_settings(DMM_STREAM_MESSAGES=True, DMM_STREAM_CHUNK_SIZE=2)
+    def test_stream_setting(self):
+        messages = self.bob_storage.all.filter(level=constants.INFO)
+        self.assertEqual(3, len(list(messages)))
+        self.assertEqual(3, len(list(messages)))
+
+
+    @override_settings(DMM_COUNTER_CACHE="django_magnificent_messages.storage.message_storage.counter_cache."
+                                         "CounterCache")
+    def test_paginate_cached_count(self):
+        """Paginator should take count from counter cache instead of counting messages"""
+        self.bob_storage._inbox
+        self.bob_storage.counts
+        paginator = self.bob_storage.all.paginate(2)
+        with self.assertNumQueries(0):
+            self.assertEqual(3, paginator.count)
+            self.assertEqual(2, paginator.num_pages)
+        self.assertEqual(2, len(paginator.page(1)))
+
+    def test_paginate_count(self):
+        self.assertEqual(5, self.bob_storage.all.paginate(2, count=10).num_pages)
+        self.assertEqual(1, self.bob_storage.all.paginate(2, count=lambda: 1).num_pages)
+        # Filtered iterator can't use storage count
+        with self.assertNumQueries(1):
+            self.assertEqual(1, self.bob_storage.all.filter(pk=self.read_message.pk).paginate(2).count)
+
+    def test_paginate_estimate_count(self):
+        """Planner estimates are not available on SQLite, so exact count is used"""
+        self.assertEqual(3, self.bob_storage.all.filter(level=constants.INFO).paginate(
+            2, estimate_count=True).count)
+
+    def test_estimate_count_postgresql(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.fetchone.return_value = ('[{"Plan": {"Plan Rows": 42}}]',)
+        fake_connection = mock.Mock(vendor="postgresql", **{"cursor.return_value": cursor})
+        with mock.patch.object(base, "connections", {"default": fake_connection}):
+            self.assertEqual(42, base.estimate_count(Message.objects.all()))
+        self.assertTrue(cursor.__enter__.return_value.execute.call_args[0][0].startswith("EXPLAIN (FORMAT JSON) "))
+
+    def test_paginate_low_estimate(self):
+        """Pages past too low estimated count should be available if they have messages"""
+        expected = [m.pk for m in self.bob_storage.all]
+        with mock.patch.object(base, "estimate_count", return_value=1):
+            paginator = self.bob_storage.all.filter(level=constants.INFO).paginate(1, estimate_count=True)
+            self.assertEqual(1, paginator.num_pages)
+            self.assertTrue(paginator.page(1).has_next())
+            page = paginator.page(3)
+            self.assertEqual([expected[2]], [m.pk for m in page])
+            self.assertFalse(page.has_next())
+            with self.assertRaises(EmptyPage):
+                paginator.page(4)
+
+
+    def _get_raw_message(self, pk):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT text, extra FROM mm_message WHERE id = %s", [pk])
+            return cursor.fetchone()
+
+    @override_settings(DMM_COMPRESS_MESSAGES=True, DMM_COMPRESSION_THRESHOLD=100)
+    def test_compression(self):
+        text = "<p>Long text</p>" * 100
+        extra = {"items": list(range(100))}
+        message = self.alice_storage.send_message(constants.INFO, text, extra=extra, to_users_pk=[self.bob.pk])
+        raw_text, raw_extra = self._get_raw_message(message.pk)
+        self.assertTrue(raw_text.startswith(COMPRESSED_MARKER))
+        self.assertTrue(raw_extra.startswith(COMPRESSED_MARKER))
+        self.assertLess(len(raw_text), len(text) // 10)
+        stored = next(iter(self.bob_storage.all.filter(pk=message.pk)))
+        self.assertEqual(text, stored.text)
+        self.assertEqual(extra, stored.extra)
+        # Short values are not compressed
+        message = self.alice_storage.send_message(constants.INFO, "Short", extra={"a": 1}, to_users_pk=[self.bob.pk])
+        self.assertEqual(("Short", '{"a": 1}'), self._get_raw_message(message.pk))
+
+    def test_text_with_compression_marker(self):
+        text = COMPRESSED_MARKER + "hello world"
+        message = self.alice_storage.send_message(constants.INFO, text, to_users_pk=[self.bob.pk])
+        self.assertEqual(text, next(iter(self.bob_storage.all.filter(pk=message.pk))).text)
+
+    def test_compress_command(self):
+        text = "Long text " * 200
+        message = self.alice_storage.send_message(constants.INFO, text, to_users_pk=[self.bob.pk])
+        with override_settings(DMM_COMPRESS_MESSAGES=True):
+            call_command("dmm_compress_messages", batch_size=2, stdout=StringIO())
+        self.assertTrue(self._get_raw_message(message.pk)[0].startswith(COMPRESSED_MARKER))
+        self.assertEqual(text, next(iter(self.bob_storage.all.filter(pk=message.pk))).text)
+        self.assertEqual(self.read_message.text, next(iter(self.bob_storage.read)).text)
+        call_command("dmm_compress_messages", stdout=StringIO())
+        self.assertEqual(text, self._get_raw_message(message.pk)[0])
+
+    def test_compress_command_without_bulk_update(self):
+        """Rows should be rewritten one by one if manager has no bulk_update"""
+        text = "Long text " * 200
+        message = self.alice_storage.send_message(constants.INFO, text, to_users_pk=[self.bob.pk])
+        with override_settings(DMM_COMPRESS_MESSAGES=True), \
+                mock.patch.object(type(Message.objects), "bulk_update", None), \
+                mock.patch.object(type(MessageBody.objects), "bulk_update", None):
+            call_command("dmm_compress_messages", batch_size=2, stdout=StringIO())
+        self.assertTrue(self._get_raw_message(message.pk)[0].startswith(COMPRESSED_MARKER))
+        self.assertEqual(text, next(iter(self.bob_storage.all.filter(pk=message.pk))).text)
+
+    @skipUnless(django.VERSION >= (3, 1), "Async tests require Django 3.1")
+    async def test_async_api(self):
+        message = await self.alice_storage.asend_message(constants.INFO, "Async", to_users_pk=[self.bob.pk])
+        self.assertEqual(3, await self.bob_storage.aunread_count())
+        self.assertEqual(message.pk, (await self.bob_storage.aunread())[0].pk)
+        await self.bob_storage.amark_read_bulk([message.pk])
+        self.assertEqual({"all": 4, "read": 2, "unread": 2, "archived": 1, "new": 4}, await self.bob_storage.acounts())
+        self.assertEqual("Async", (await self.bob_storage.aget_message(message.pk)).text)
+
+    @override_settings(DMM_DEDUPLICATE_BODIES=True)
+    def test_deduplicate_bodies(self):
+        """Messages with identical content should share one body, fetched with one query per page"""
+        extra = {"tenant": None, "items": [1, 2]}
+        sent = [self.alice_storage.send_message(constants.INFO, "Announcement", "Subject", extra=extra,
+                                                to_users_pk=[self.bob.pk]) for _ in range(2)]
+        sent.append(self.alice_storage.broadcast_message(constants.INFO, "Announcement", "Subject", extra=extra,
+                                                         to_users_pk=iter([self.bob.pk])))
+        pks = DatabaseStorage(None).send_messages_bulk([
+            {"level": constants.INFO, "text": "Announcement", "subject": "Subject", "extra": extra,
+             "to_users_pk": [self.bob.pk]},
+            {"level": constants.INFO, "text": "Other", "to_users_pk": [self.bob.pk]},
+        ])
+        self.assertEqual(2, MessageBody.objects.count())
+        body = MessageBody.objects.get(text="Announcement")
+        self.assertEqual({m.pk for m in sent} | {pks[0]}, set(body.messages.values_list("pk", flat=True)))
+        self.assertEqual("", self._get_raw_message(pks[0])[0])
+        self.assertEqual("Announcement", sent[0].text)
+        self.bob_storage._inbox
+        # One query for messages, one for bodies and one for each of four prefetched relations
+        with self.assertNumQueries(6):
+            messages = list(self.bob_storage.all)
+        with self.assertNumQueries(0):
+            contents = {m.pk: (m.subject, m.text, m.extra) for m in messages}
+        self.assertEqual(("Subject", "Announcement", extra), contents[pks[0]])
+        self.assertEqual((None, "Other", None), contents[pks[1]])
+        self.assertEqual(self.read_message.text, contents[self.read_message.pk][1])
+        self.assertEqual("Announcement", Message.objects.get(pk=pks[0]).content_text)
+        self.assertEqual("Other", Message.objects.get(pk=pks[1]).content_text)
+        self.assertEqual(extra, Message.objects.get(pk=pks[0]).content_extra)
+        self.assertEqual(self.read_message.text, Message.objects.get(pk=self.read_message.pk).content_text)
+
+    @override_settings(DMM_DEDUPLICATE_BODIES=True)
+    def test_delete_orphan_bodies(self):
+        first = self.alice_storage.send_message(constants.INFO, "Announcement", to_users_pk=[self.bob.pk])
+        second = self.alice_storage.send_message(constants.INFO, "Announcement", to_users_pk=[self.bob.pk])
+        self.alice_storage.send_message(constants.INFO, "Other", to_users_pk=[self.bob.pk])
+        Message.objects.filter(pk=first.pk).delete()
+        Message.objects.filter(text="", body__text="Other").delete()
+        call_command("dmm_delete_orphan_bodies", batch_size=1, stdout=StringIO())
+        self.assertEqual(["Announcement"], list(MessageBody.objects.values_list("text", flat=True)))
+        self.assertEqual("Announcement", Message.objects.get(pk=second.pk).content_text)
+
+    def test_bodies_without_ignore_conflicts(self):
+        """Bodies created concurrently should be reused if database can't ignore conflicts"""
+        existing = MessageBody.objects.get_for_contents([(None, "Announcement", None)])[0]
+        in_bulk = MessageBody.objects.in_bulk
+        lookups = []
+
+        def missing_on_first_lookup(*args, **kwargs):
+            lookups.append(args)
+            return {} if len(lookups) == 1 else in_bulk(*args, **kwargs)
+
+        with mock.patch.object(connection.features, "supports_ignore_conflicts", False), \
+                mock.patch.object(MessageBody.objects, "in_bulk", side_effect=missing_on_first_lookup):
+            bodies = MessageBody.objects.get_for_contents([(None, "Announcement", None), (None, "Other", None)])
+        self.assertEqual(existing.pk, bodies[0].pk)
+        self.assertEqual("Other", bodies[1].text)
+        self.assertEqual(2, MessageBody.objects.count())
+
 
 class DatabaseStorageClearTestCase(BaseMessageStorageTestCases.ClearTestCase):
     STORAGE = DatabaseStorage
+
+
+@override_settings(DMM_USE_DELIVERY_TABLE=True)
+class DatabaseStorageDeliveryExistingTestCase(DatabaseStorageExistingTestCase):
+    def test_deliveries_created(self):
+        """
+        Every recipient (direct or through group) should get one delivery record with actual read/archived state
+        """
+        self.assertEqual(7, Delivery.objects.count())
+        self.assertTrue(Delivery.objects.get(message_id=self.read_message.pk, user=self.bob).read)
+        self.assertFalse(Delivery.objects.get(message_id=self.read_message.pk, user=self.bob).archived)
+        self.assertTrue(Delivery.objects.get(message_id=self.archived_message.pk, user=self.alice).archived)
+
+    def test_delivery_flags_follow_actions(self):
+        self.bob_storage.mark_read(self.alice_message_to_bob.pk)
+        self.assertTrue(Delivery.objects.get(message_id=self.alice_message_to_bob.pk, user=self.bob).read)
+        self.bob_storage.mark_unread(self.alice_message_to_bob.pk)
+        self.assertFalse(Delivery.objects.get(message_id=self.alice_message_to_bob.pk, user=self.bob).read)
+        self.bob_storage.archive(self.alice_message_to_bob.pk)
+        self.assertTrue(Delivery.objects.get(message_id=self.alice_message_to_bob.pk, user=self.bob).archived)
+        self.bob_storage.unarchive(self.alice_message_to_bob.pk)
+        self.assertFalse(Delivery.objects.get(message_id=self.alice_message_to_bob.pk, user=self.bob).archived)
+
+    def test_remove_recipient(self):
+        """
+        Removing recipient should remove delivery only if message is not delivered through group
+        """
+        message = Message.objects.get(pk=self.read_message.pk)
+        message.sent_to_users.remove(self.alice)
+        self.assertFalse(Delivery.objects.filter(message=message, user=self.alice).exists())
+        message.sent_to_groups.clear()
+        self.assertFalse(Delivery.objects.filter(message=message).exists())
+
+    def test_broadcast_deliveries(self):
+        message = self.carol_storage.broadcast_message(constants.INFO, "Broadcast", to_users_pk=[self.alice.pk],
+                                                       to_groups_pk=[self.group2.pk])
+        self.assertEqual({self.alice.pk, self.bob.pk},
+                         set(Delivery.objects.filter(message_id=message.pk).values_list("user_id", flat=True)))
+
+    def test_send_messages_bulk_deliveries(self):
+        pks = DatabaseStorage(None).send_messages_bulk([
+            {"level": constants.INFO, "text": "Hi, Alice!", "to_users_pk": [self.alice.pk]},
+            {"level": constants.INFO, "text": "Hi, group1!", "to_users_pk": [self.alice.pk],
+             "to_groups_pk": [self.group1.pk]},
+        ])
+        self.assertEqual([self.alice.pk], list(Delivery.objects.filter(message_id=pks[0])
+                                               .values_list("user_id", flat=True)))
+        self.assertEqual({self.alice.pk, self.bob.pk},
+                         set(Delivery.objects.filter(message_id=pks[1]).values_list("user_id", flat=True)))
+
+    def test_rebuild_command(self):
+        Delivery.objects.all().delete()
+        call_command("dmm_rebuild_deliveries", stdout=StringIO())
+        self.assertEqual(7, Delivery.objects.count())
+        self.assertEqual(1, self.alice_storage.read_count)
+        self.assertEqual(1, self.bob_storage.archived_count)
+
+
+@override_settings(DMM_USE_DELIVERY_TABLE=True)
+class DatabaseStorageDeliveryClearTestCase(DatabaseStorageClearTestCase):
+    pass
@@ -0,0 +1,148 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.sessions.backends.cache import SessionStore
+from django.core.cache import caches
+from django.http import HttpRequest
+from django.test import TestCase
+from django.utils.safestring import SafeData, mark_safe
+
+from django_magnificent_messages import constants
+from django_magnificent_messages.storage.base import Message
+from django_magnificent_messages.storage.notification_storage.cache import CacheStorage
+from .base import BaseTests
+
+
+def set_cache_data(storage, messages):
+    """
+    Sets the messages into the cache and remove the backend's loaded data cache.
+    """
+    storage._cache.set(storage._get_cache_key(create_session=True), storage.serialize_notifications(messages))
+    if hasattr(storage, '_loaded_data'):
+        del storage._loaded_data
+
+
+def stored_cache_notifications_count(storage):
+    key = storage._get_cache_key()
+    data = storage.deserialize_notifications(storage._cache.get(key, [])) if key else []
+    return len(data)
+
+
+class CacheTests(BaseTests, TestCase):
+    storage_class = CacheStorage
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+
+    def get_request(self):
+        request = super().get_request()
+        request.session = SessionStore()
+        request.user = AnonymousUser()
+        return request
+
+    def stored_notifications_count(self, storage, response):
+        return stored_cache_notifications_count(storage)
+
+    def test_get(self):
+        storage = self.storage_class(self.get_request())
+        example_messages = ['test', 'me']
+        set_cache_data(storage, example_messages)
+        self.assertEqual(list(storage), example_messages)
+
+    def test_safedata(self):
+        """
+        A text containing SafeData keeps its safe status when retrieved from
+        the text notification_storage.
+        """
+        storage = self.get_storage()
+        message = Message(constants.SECONDARY, mark_safe("<b>Hello Django!</b>"))
+        set_cache_data(storage, [message])
+        self.assertIsInstance(list(storage)[0].text, SafeData)
+
+    def test_user_key(self):
+        """
+        Notifications of authenticated user without session are keyed by user id
+        """
+        request = HttpRequest()
+        request.user = User(pk=1, username='bob')
+        storage = self.storage_class(request)
+        storage.add(constants.INFO, 'Test text')
+        storage.update(self.get_response())
+        self.assertEqual([Message(constants.INFO, 'Test text')], list(self.storage_class(request)))
+
+    def test_user_sessions_separated(self):
+        """
+        Notifications of authenticated user are keyed by session, so other sessions of same user do not see them
+        """
+        request = self.get_request()
+        request.user = User(pk=1, username='bob')
+        storage = self.storage_class(request)
+        storage.add(constants.INFO, 'Test text')
+        storage.update(self.get_response())
+        self.assertEqual([Message(constants.INFO, 'Test text')], list(self.storage_class(request)))
+        other_request = self.get_request()
+        other_request.user = request.user
+        other_request.session.create()
+        self.assertEqual([], list(self.storage_class(other_request)))
+
+    def test_session_created(self):
+        request = self.get_request()
+        storage = self.storage_class(request)
+        storage.add(constants.INFO, 'Test text')
+        self.assertIsNone(request.session.session_key)
+        storage.update(self.get_response())
+        self.assertIsNotNone(request.session.session_key)
+        self.assertEqual([Message(constants.INFO, 'Test text')], list(self.storage_class(request)))
+
+    def test_no_key(self):
+        """
+        Notifications are returned as unstored if there is no user and session
+        """
+        storage = self.storage_class(HttpRequest())
+        storage.add(constants.INFO, 'Test text')
+        self.assertEqual([Message(constants.INFO, 'Test text')], storage.update(self.get_response()))
+
+    def test_no_unneeded_writes(self):
+        """
+        Cache is not written if nothing was added and there was nothing to consume
+        """
+        storage = self.storage_class(self.get_request())
+        with mock.patch.object(storage._cache, 'set') as cache_set, \
+                mock.patch.object(storage._cache, 'delete') as cache_delete:
+            list(storage)
+            storage.update(self.get_response())
+        cache_set.assert_not_called()
+        cache_delete.assert_not_called()
+
+        storage = self.storage_class(self.get_request())
+        set_cache_data(storage, [Message(constants.INFO, 'Test text')])
+        with mock.patch.object(storage._cache, 'delete', wraps=storage._cache.delete) as cache_delete:
+            list(storage)
+            storage.update(self.get_response())
+        cache_delete.assert_called_once()
+        self.assertEqual(0, stored_cache_notifications_count(storage))
+
+    def test_session_key_cycled(self):
+        """
+        Stored notifications are moved to new key if session key is cycled during request, e.g. on login
+        """
+        request = self.get_request()
+        storage = self.storage_class(request)
+        storage.add(constants.INFO, 'Test text')
+        storage.update(self.get_response())
+        old_key = storage._get_cache_key()
+
+        storage = self.storage_class(request)
+        request.session.cycle_key()
+        storage.update(self.get_response())
+        self.assertNotEqual(old_key, storage._get_cache_key())
+        self.assertIsNone(storage._cache.get(old_key))
+        self.assertEqual([Message(constants.INFO, 'Test text')], list(self.storage_class(request)))
+
+        storage = self.storage_class(request)
+        request.session.cycle_key()
+        storage.add(constants.INFO, 'Other text')
+        storage.update(self.get_response())
+        self.assertEqual([Message(constants.INFO, 'Test text'), Message(constants.INFO, 'Other text')],
+                         list(self.storage_class(request)))
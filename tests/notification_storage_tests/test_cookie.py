@@ -1,12 +1,16 @@
 import json
+import random
+import string
+from unittest import mock
 
 import django
 
 from django_magnificent_messages import constants
 from django_magnificent_messages.storage.base import Message
 from django_magnificent_messages.storage.notification_storage.cookie import (
-    CookieStorage, NotificationDecoder, NotificationsEncoder,
+    CompactNotificationsCodec, CookieStorage, NotificationDecoder, NotificationsEncoder,
 )
+from django.http import SimpleCookie
 from django.test import SimpleTestCase, override_settings
 from django.utils.safestring import SafeData, mark_safe
 
@@ -27,6 +31,14 @@ def set_cookie_data(storage, messages, invalid=False, encode_empty=False):
         del storage._loaded_data
 
 
+def incompressible_text(size, seed=0):
+    """
+    Return random text of given size, which does not shrink when compressed
+    """
+    rnd = random.Random(seed)
+    return ''.join(rnd.choice(string.ascii_letters + string.digits) for _ in range(size))
+
+
 def stored_cookie_notifications_count(storage, response):
     """
     Return an integer containing the number of messages stored.
@@ -69,7 +81,7 @@ class CookieTests(BaseTests, SimpleTestCase):
         response = self.get_response()
         storage.add(constants.INFO, 'test')
         storage.update(response)
-        self.assertIn('test', response.cookies['notifications'].value)
+        self.assertEqual([Message(constants.INFO, 'test')], storage._decode(response.cookies['notifications'].value))
         self.assertEqual(response.cookies['notifications']['domain'], '.example.com')
         self.assertEqual(response.cookies['notifications']['expires'], '')
         self.assertIs(response.cookies['notifications']['secure'], True)
@@ -108,20 +120,20 @@ class CookieTests(BaseTests, SimpleTestCase):
         response = self.get_response()
 
         # When storing as a cookie, the cookie has constant overhead of approx
-        # 54 chars, and each text has a constant overhead of about 37 chars
-        # and a variable overhead of zero in the best case. We aim for a text
+        # 50 chars, and each incompressible text takes about its own size
+        # (base64 overhead is compensated by compression). We aim for a text
         # size which will fit 4 messages into the cookie, but not 5.
         # See also FallbackTest.test_session_fallback
-        msg_size = int((CookieStorage.max_cookie_size - 54) / 4.5 - 37)
+        msg_size = int((CookieStorage.max_cookie_size - 50) / 4.5)
         for i in range(5):
-            storage.add(constants.INFO, str(i) * msg_size)
+            storage.add(constants.INFO, incompressible_text(msg_size, i))
         unstored_messages = storage.update(response)
 
         cookie_storing = self.stored_notifications_count(storage, response)
         self.assertEqual(cookie_storing, 4)
 
         self.assertEqual(len(unstored_messages), 1)
-        self.assertEqual(unstored_messages[0].text, '0' * msg_size)
+        self.assertEqual(unstored_messages[0].text, incompressible_text(msg_size, 0))
 
     def test_json_encoder_decoder(self):
         """
@@ -158,3 +170,107 @@ class CookieTests(BaseTests, SimpleTestCase):
         self.assertIsInstance(encode_decode(mark_safe("<b>Hello Django!</b>")), SafeData)
         self.assertNotIsInstance(encode_decode("<b>Hello Django!</b>"), SafeData)
 
+    def test_compact_format(self):
+        """
+        Notifications are stored in versioned compact format, repetitive data is compressed
+        """
+        storage = self.get_storage()
+        messages = [Message(constants.INFO, 'Test text', 'Subject', {'url': '/'}), Message(constants.ERROR, 'error'),
+                    Message(constants.SUCCESS, mark_safe('<b>safe</b>')), Message(35, 'custom level'),
+                    'plain', CookieStorage.not_finished]
+        encoded = storage._encode(messages)
+        self.assertTrue(encoded.startswith(CookieStorage.version_prefix))
+        decoded = storage._decode(encoded)
+        self.assertEqual(messages, decoded)
+        self.assertIsInstance(decoded[2].text, SafeData)
+        self.assertNotIsInstance(decoded[0].text, SafeData)
+
+        messages = [Message(constants.INFO, 'Same text %s' % i) for i in range(50)]
+        legacy = NotificationsEncoder(separators=(',', ':')).encode(messages)
+        encoded = storage._encode(messages)
+        self.assertTrue(encoded.split(':')[-1].startswith('.'))
+        self.assertLess(len(encoded) * 3, len(legacy))
+        self.assertEqual(messages, storage._decode(encoded))
+
+    def test_legacy_format(self):
+        """
+        Cookies in legacy ``hash$json`` format are still decoded
+        """
+        storage = self.get_storage()
+        messages = [Message(constants.INFO, 'Test text'), CookieStorage.not_finished]
+        value = NotificationsEncoder(separators=(',', ':')).encode(messages)
+        self.assertEqual(messages, storage._decode('%s$%s' % (storage._hash(value), value)))
+
+    def test_compact_format_tampered(self):
+        storage = self.get_storage()
+        encoded = storage._encode([Message(constants.INFO, 'Test text')])
+        prefix, header, signature, value = encoded.split(':')
+        self.assertIsNone(storage._decode(':'.join([prefix, header, signature, value[:-2]])))
+        self.assertIsNone(storage._decode(':'.join([prefix, header, signature, '.' + value])))
+        self.assertIsNone(storage._decode(':'.join([prefix, '2', signature, value])))
+        self.assertIsNone(storage._decode(':'.join([prefix, header, value])))
+
+    def test_compact_format_without_header(self):
+        """
+        Compact cookies without count header are invalid
+        """
+        storage = self.get_storage()
+        value = CompactNotificationsCodec(CookieStorage.not_finished).dumps([Message(constants.INFO, 'Test text')])
+        encoded = '%s%s:%s' % (CookieStorage.version_prefix, storage._signature(value), value)
+        self.assertIsNone(storage._decode(encoded))
+        self.assertTrue(storage.used)
+
+    def test_store_many_notifications(self):
+        """
+        Largest possible number of newest (or oldest, if ``remove_oldest`` is False)
+        notifications is stored into cookie
+        """
+        storage = self.get_storage()
+        notifications = [Message(constants.INFO, incompressible_text(40, i)) for i in range(300)]
+        for remove_oldest in (True, False):
+            response = self.get_response()
+            unstored = storage._store(list(notifications), response, remove_oldest=remove_oldest)
+            stored = storage._decode(response.cookies['notifications'].value)
+            self.assertEqual(CookieStorage.not_finished, stored.pop())
+            self.assertEqual(len(notifications), len(stored) + len(unstored))
+            if remove_oldest:
+                self.assertEqual(notifications, unstored + stored)
+                one_more = notifications[-len(stored) - 1:]
+            else:
+                self.assertEqual(notifications, stored + unstored)
+                one_more = notifications[:len(stored) + 1]
+            self.assertLessEqual(len(SimpleCookie().value_encode(response.cookies['notifications'].value)[1]),
+                                 CookieStorage.max_cookie_size)
+            response = self.get_response()
+            storage._update_cookie(storage._encode(one_more + [CookieStorage.not_finished]), response)
+            self.assertGreater(len(SimpleCookie().value_encode(response.cookies['notifications'].value)[1]),
+                               CookieStorage.max_cookie_size)
+
+    def test_peek(self):
+        """
+        Notifications are counted by signed cookie header without decoding them
+        """
+        storage = self.storage_class(self.get_request())
+        set_cookie_data(storage, [Message(constants.INFO, 'Test text %s' % i) for i in range(3)])
+        with mock.patch.object(CompactNotificationsCodec, 'loads') as loads:
+            self.assertTrue(storage.has_notifications())
+            self.assertEqual(3, len(storage))
+            self.assertEqual((3, True), storage._peek())
+        loads.assert_not_called()
+        self.assertEqual(3, len(list(storage)))
+
+        storage = self.storage_class(self.get_request())
+        set_cookie_data(storage, [Message(constants.INFO, 'Test text'), CookieStorage.not_finished])
+        self.assertEqual((1, False), storage._peek())
+
+        storage = self.storage_class(self.get_request())
+        self.assertFalse(storage.has_notifications())
+        set_cookie_data(storage, [Message(constants.INFO, 'Test text')], invalid=True)
+        self.assertEqual(0, len(storage))
+
+    def test_peek_forged_header(self):
+        storage = self.storage_class(self.get_request())
+        set_cookie_data(storage, [Message(constants.INFO, 'Test text')])
+        prefix, header, signature, value = storage.request.COOKIES[CookieStorage.cookie_name].split(':')
+        storage.request.COOKIES[CookieStorage.cookie_name] = ':'.join([prefix, '5', signature, value])
+        self.assertEqual(0, len(storage))
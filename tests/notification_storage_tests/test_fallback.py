@@ -1,10 +1,15 @@
-from django.test import SimpleTestCase
+from unittest import mock
+
+from django.test import override_settings, SimpleTestCase
 
 from django_magnificent_messages import constants
+from django_magnificent_messages.storage.base import Message
+from django_magnificent_messages.storage.notification_storage.cache import CacheStorage
 from django_magnificent_messages.storage.notification_storage.cookie import CookieStorage
 from django_magnificent_messages.storage.notification_storage.fallback import FallbackStorage
+from django_magnificent_messages.storage.notification_storage.session import SessionStorage
 from .base import BaseTests
-from .test_cookie import set_cookie_data, stored_cookie_notifications_count
+from .test_cookie import incompressible_text, set_cookie_data, stored_cookie_notifications_count
 from .test_session import set_session_data, stored_session_notifications_count
 
 
@@ -126,9 +131,9 @@ class FallbackTests(BaseTests, SimpleTestCase):
         storage = self.get_storage()
         response = self.get_response()
         # see comment in CookieTests.test_cookie_max_length()
-        msg_size = int((CookieStorage.max_cookie_size - 54) / 4.5 - 37)
+        msg_size = int((CookieStorage.max_cookie_size - 50) / 4.5)
         for i in range(5):
-            storage.add(constants.INFO, str(i) * msg_size)
+            storage.add(constants.INFO, incompressible_text(msg_size, i))
         storage.update(response)
         cookie_storing = self.stored_cookie_notifications_count(storage, response)
         self.assertEqual(cookie_storing, 4)
@@ -142,9 +147,81 @@ class FallbackTests(BaseTests, SimpleTestCase):
         """
         storage = self.get_storage()
         response = self.get_response()
-        storage.add(constants.INFO, 'x' * 5000)
+        storage.add(constants.INFO, incompressible_text(5000))
         storage.update(response)
         cookie_storing = self.stored_cookie_notifications_count(storage, response)
         self.assertEqual(cookie_storing, 0)
         session_storing = self.stored_session_notifications_count(storage, response)
-        self.assertEqual(session_storing, 1)
\ No newline at end of file
+        self.assertEqual(session_storing, 1)
+
+    def test_peek(self):
+        """
+        Notifications are counted without decoding cookie and session is not
+        read if cookie contains all notifications
+        """
+        storage = self.storage_class(self.get_request())
+        cookie_storage = self.get_cookie_storage(storage)
+        session_storage = self.get_session_storage(storage)
+        set_cookie_data(cookie_storage, ['cookie', CookieStorage.not_finished])
+        set_session_data(session_storage, ['session 1', 'session 2'])
+        self.assertEqual(3, len(storage))
+        self.assertTrue(storage.has_notifications())
+
+        storage = self.storage_class(self.get_request())
+        set_cookie_data(self.get_cookie_storage(storage), ['cookie'])
+        with mock.patch.object(SessionStorage, '_peek') as session_peek:
+            self.assertEqual(1, len(storage))
+        session_peek.assert_not_called()
+
+    def test_lazy_storages(self):
+        """
+        Session storage is not instantiated if cookie contains all notifications
+        """
+        storage = self.storage_class(self.get_request())
+        self.assertEqual([], list(storage))
+        storage.update(self.get_response())
+        self.assertEqual([None], storage._storage_instances[1:])
+
+        storage = self.storage_class(self.get_request())
+        set_cookie_data(storage._get_storage(0), ['cookie'])
+        self.assertEqual(['cookie'], list(storage))
+        self.assertEqual([None], storage._storage_instances[1:])
+
+    @override_settings(DMM_NOTIFICATION_ROUTE_SIZE=100)
+    def test_size_routing(self):
+        """
+        Large notifications are stored straight to session, cookie only marks that
+        """
+        storage = self.get_storage()
+        response = self.get_response()
+        storage.add(constants.INFO, 'x' * 60)
+        storage.add(constants.INFO, 'y' * 60)
+        storage.update(response)
+        self.assertEqual(0, self.stored_cookie_notifications_count(storage, response))
+        self.assertEqual(2, self.stored_session_notifications_count(storage, response))
+
+        request = self.get_request()
+        request.COOKIES = {CookieStorage.cookie_name: response.cookies[CookieStorage.cookie_name].value}
+        request.session.update(storage.request.session)
+        storage = self.storage_class(request)
+        self.assertEqual([Message(constants.INFO, 'x' * 60), Message(constants.INFO, 'y' * 60)], list(storage))
+        response = self.get_response()
+        storage.update(response)
+        self.assertEqual('', response.cookies[CookieStorage.cookie_name].value)
+        self.assertEqual(0, self.stored_session_notifications_count(storage, response))
+
+    @override_settings(DMM_FALLBACK_NOTIFICATION_STORAGES=(
+        'django_magnificent_messages.storage.notification_storage.cookie.CookieStorage',
+        'django_magnificent_messages.storage.notification_storage.cache.CacheStorage',
+    ))
+    def test_storages_setting(self):
+        storage = self.storage_class(self.get_request())
+        self.assertEqual([CookieStorage, CacheStorage], [type(s) for s in storage.storages])
+
+    def test_storage_classes_imported_once(self):
+        """Storage classes should be imported once, not on every storage instantiation"""
+        self.storage_class(self.get_request())
+        with mock.patch('django_magnificent_messages.storage.notification_storage.fallback.import_string') as imp:
+            storage = self.storage_class(self.get_request())
+            storage.storages
+        imp.assert_not_called()
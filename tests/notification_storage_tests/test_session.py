@@ -1,3 +1,4 @@
+from django.contrib.sessions.backends.cache import SessionStore
 from django.http import HttpRequest
 from django.test import TestCase
 from django.utils.safestring import SafeData, mark_safe
@@ -57,4 +58,37 @@ class SessionTests(BaseTests, TestCase):
         storage = self.get_storage()
         message = Message(constants.SECONDARY, mark_safe("<b>Hello Django!</b>"))
         set_session_data(storage, [message])
-        self.assertIsInstance(list(storage)[0].text, SafeData)
\ No newline at end of file
+        self.assertIsInstance(list(storage)[0].text, SafeData)
+    def test_unchanged_not_written(self):
+        """
+        Session is not modified if notifications were not added or consumed
+        """
+        request = self.get_request()
+        request.session = SessionStore()
+        storage = self.storage_class(request)
+        set_session_data(storage, [Message(constants.INFO, 'Test text')])
+        request.session.modified = False
+        avoided_writes = SessionStorage.avoided_writes
+
+        # Stored notifications are stored again unchanged
+        storage.add(constants.INFO, 'Test text', extra=1)
+        storage._queued = []
+        storage.update(self.get_response())
+        self.assertFalse(request.session.modified)
+
+        storage = self.storage_class(request)
+        storage.update(self.get_response())
+        self.assertFalse(request.session.modified)
+
+        storage = self.storage_class(request)
+        storage.add(constants.INFO, 'Another text')
+        storage.update(self.get_response())
+        self.assertTrue(request.session.modified)
+        self.assertEqual(2, stored_session_notifications_count(storage))
+
+        request.session = SessionStore()
+        storage = self.storage_class(request)
+        list(storage)
+        storage.update(self.get_response())
+        self.assertFalse(request.session.modified)
+        self.assertEqual(avoided_writes + 2, SessionStorage.avoided_writes)
@@ -1,8 +1,14 @@
+from unittest import skipUnless
+
+import django
+from django.http import HttpResponse
 from django.test import TestCase, RequestFactory
 
-from django_magnificent_messages import messages, INFO, system_messages, notifications
+from django_magnificent_messages import messages, INFO, MessageBackend, system_messages, notifications
 from django_magnificent_messages.messages import MessageFailure
+from django_magnificent_messages.middleware import MessageMiddleware
 from django_magnificent_messages.notifications import NotificationFailure
+from tests.utils import TestMessagesMixin
 
 
 class TestApiExceptions(TestCase):
@@ -49,8 +55,58 @@ class TestApiExceptions(TestCase):
         r = self.rf.get("/")
 
         self.assertEqual(0, notifications.count(r))
+        self.assertFalse(notifications.has(r))
         self.assertEqual(0, messages.new_count(r))
         self.assertEqual(0, messages.all_count(r))
         self.assertEqual(0, messages.read_count(r))
         self.assertEqual(0, messages.unread_count(r))
         self.assertEqual(0, messages.archived_count(r))
+        self.assertEqual({"all": 0, "read": 0, "unread": 0, "archived": 0, "new": 0}, messages.counts(r))
+
+
+@skipUnless(django.VERSION >= (3, 1), "Async tests require Django 3.1")
+class TestAsyncApi(TestMessagesMixin, TestCase):
+    def setUp(self) -> None:
+        self.create_test_users()
+        self.create_test_messages()
+        self.rf = RequestFactory()
+
+    def _get_request(self, user):
+        r = self.rf.get("/")
+        r.user = user
+        r.session = {}
+        return r
+
+    async def test_async_middleware(self):
+        async def view(request):
+            self.assertEqual(2, await messages.aunread_count(request))
+            await messages.ainfo(request, "Hi, Alice!", to_users_pk=[self.alice.pk])
+            await notifications.ainfo(request, "Sent")
+            return HttpResponse()
+
+        r = self._get_request(self.bob)
+        await MessageMiddleware(view)(r)
+        self.assertEqual(1, await notifications.acount(r))
+        self.assertEqual(["Sent"], [n.text for n in await notifications.aget(r)])
+        alice_r = self._get_request(self.alice)
+        alice_r.dmm_backend = MessageBackend(alice_r)
+        self.assertEqual("Hi, Alice!", (await messages.anew(alice_r))[0].text)
+
+    async def test_async_middleware_unused(self):
+        """Notifications should not be stored if they were not used"""
+        async def view(request):
+            return HttpResponse()
+
+        r = self._get_request(self.bob)
+        await MessageMiddleware(view)(r)
+        self.assertFalse(r.dmm_backend.notifications_changed)
+        self.assertEqual({}, r.session)
+
+    async def test_async_no_middleware(self):
+        r = self.rf.get("/")
+        self.assertEqual([], await messages.aall(r))
+        self.assertEqual(0, await messages.aall_count(r))
+        self.assertFalse(await notifications.ahas(r))
+        with self.assertRaises(MessageFailure):
+            await messages.aadd(r, INFO, "Test")
+        await messages.amark_read(r, 1, fail_silently=True)
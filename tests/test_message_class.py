@@ -3,6 +3,7 @@ from django.utils.translation import gettext_lazy as _
 
 from django_magnificent_messages import constants
 from django_magnificent_messages.storage.base import Message
+from django_magnificent_messages.storage.message_storage.base import Deferred, StoredMessage
 
 
 class MessageTestCase(TestCase):
@@ -76,3 +77,27 @@ class MessageTestCase(TestCase):
         m = Message(constants.INFO, "Text", "Subject", {"1": ["a", "b"], "2": {3: 4, 5: 6}, "3": "aaaa", "4": 4})
         self.assertEqual(Message(**d), m)
 
+
+
+class StoredMessageTestCase(TestCase):
+    def test_deferred_attributes(self):
+        """Deferred attributes should be computed once on first access"""
+        calls = []
+
+        def get_author():
+            calls.append(1)
+            return "author"
+
+        m = StoredMessage(constants.INFO, "Text", author=Deferred(get_author), reply_to=None)
+        self.assertEqual([], calls)
+        self.assertEqual("author", m.author)
+        self.assertEqual("author", m.author)
+        self.assertEqual([1], calls)
+        self.assertIsNone(m.reply_to)
+        self.assertEqual((), m.replies)
+
+    def test_slots(self):
+        m = StoredMessage(constants.INFO, "Text", pk=1, custom="value")
+        self.assertEqual("value", m.custom)
+        self.assertEqual({"custom": "value"}, vars(m))
+        self.assertEqual({}, vars(StoredMessage(constants.INFO, "Text", pk=1)))
@@ -1,9 +1,10 @@
 from django.contrib.auth.models import Group, User
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.test import override_settings, TestCase
 
 from django_magnificent_messages import constants
 from django_magnificent_messages.models import Message, MessageNotSentToUserError, Inbox
+from django_magnificent_messages.storage.message_storage.base import InvalidMessagePkError, MessageError
 from tests.utils import TestMessagesMixin
 
 
@@ -68,6 +69,61 @@ class MessageModelTestCase(TestMessagesMixin, TestCase):
                                       "<Message: 4> was not sent to user, who tried to unarchive"):
             self.archived_message.unarchive(self.carol)
 
+    def test_recipients_check_queries(self):
+        """
+        Recipients check should take one query regardless of recipients number and be memoized for user
+        """
+        User.objects.bulk_create(User(username="user{0}".format(i)) for i in range(50))
+        self.bob_message_to_group1.sent_to_users.add(*User.objects.filter(username__startswith="user"))
+        message = Message.objects.get(pk=self.bob_message_to_group1.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(message._is_user_in_recipients(self.alice))
+            self.assertTrue(message._is_user_in_recipients(self.alice))
+        with self.assertNumQueries(1):
+            self.assertFalse(message._is_user_in_recipients(self.carol))
+        message.sent_to_users.add(self.carol)
+        self.assertTrue(message._is_user_in_recipients(self.carol))
+
+    def test_mark_read_bulk(self):
+        """Bulk mark should validate recipients with one query and insert relations with one statement"""
+        with self.assertNumQueries(3):
+            marked = Message.mark_read_bulk(self.alice, [self.bob_message_to_group1.pk, str(self.read_message.pk)])
+        self.assertEqual([self.bob_message_to_group1.pk, self.read_message.pk], marked)
+        self.assertIn(self.alice, self.bob_message_to_group1.read_by.all())
+        Message.mark_unread_bulk(self.alice, marked)
+        self.assertEqual(0, self.alice.read_messages.count())
+
+    def test_archive_bulk(self):
+        Message.archive_bulk(self.bob, [self.alice_message_to_bob.pk, self.bob_message_to_group1.pk])
+        self.assertEqual(3, self.bob.archived_messages.count())
+        Message.unarchive_bulk(self.bob, [self.alice_message_to_bob.pk, self.archived_message.pk])
+        self.assertEqual([self.bob_message_to_group1], list(self.bob.archived_messages.all()))
+
+    def test_mark_read_bulk_not_to_you(self):
+        """If some messages were not sent to user, nothing should be changed"""
+        with self.assertRaisesMessage(MessageNotSentToUserError, "Messages [1] were not sent to user"):
+            Message.mark_read_bulk(self.alice, [self.alice_message_to_bob.pk, self.bob_message_to_group1.pk])
+        self.assertEqual(1, self.alice.read_messages.count())
+
+    @override_settings(DMM_BULK_BATCH_SIZE=1)
+    def test_change_state_bulk_chunked(self):
+        """Messages should be validated and changed in chunks of DMM_BULK_BATCH_SIZE"""
+        pks = [self.alice_message_to_bob.pk, self.bob_message_to_group1.pk, self.archived_message.pk]
+        # One validation query per chunk, then existing relations lookup and insert of not archived ones per chunk
+        with self.assertNumQueries(8):
+            self.assertEqual(sorted(pks), Message.archive_bulk(self.bob, pks))
+        self.assertEqual(3, self.bob.archived_messages.count())
+        with self.assertRaisesMessage(MessageNotSentToUserError, "Messages [1] were not sent to user"):
+            Message.mark_read_bulk(self.alice, [self.alice_message_to_bob.pk, self.bob_message_to_group1.pk])
+        self.assertEqual(1, self.alice.read_messages.count())
+
+    def test_change_state_bulk_invalid_pk(self):
+        with self.assertRaises(MessageError):
+            Message.mark_read_bulk(self.alice, [self.bob_message_to_group1.pk, "not a pk"])
+        with self.assertRaisesMessage(InvalidMessagePkError, "Invalid message pk `not a pk`"):
+            Message.mark_read_bulk(self.alice, ["not a pk"])
+        self.assertEqual(1, self.alice.read_messages.count())
+
 
 class InboxModelTestCase(TestMessagesMixin, TestCase):
     def setUp(self) -> None:
@@ -132,6 +188,16 @@ class InboxModelTestCase(TestMessagesMixin, TestCase):
         self.assertEqual(0, self.carol_inbox.new_count)
 
 
+    def test_counts(self):
+        """
+        Inbox.counts should return all counts with single query
+        """
+        with self.assertNumQueries(1):
+            counts = self.bob_inbox.counts()
+        self.assertEqual({"all": 3, "read": 1, "unread": 2, "archived": 1, "new": 3}, counts)
+        self.assertEqual({"all": 2, "read": 1, "unread": 1, "archived": 1, "new": 2}, self.alice_inbox.counts())
+        self.assertEqual({"all": 0, "read": 0, "unread": 0, "archived": 0, "new": 0}, self.carol_inbox.counts())
+
     def test_alice_all(self):
         """
         Alice has 2 messages - "Bob message go group1", "Read message".